@@ -5,11 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.security import create_access_token, verify_password
-from app.db.session import get_db
+from app.db.session import get_db, get_sync_db
 from app.models.models import User
 from app.schemas.schemas import Token, TokenPayload, User as UserSchema
 
@@ -18,20 +20,20 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def _token_data(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data.sub).first()
+
+
+def _check_user(user: Optional[User]) -> User:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -39,7 +41,23 @@ def get_current_user(
     return user
 
 
-def get_current_active_user(
+async def get_current_user(
+    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _token_data(token)
+    return _check_user(await db.scalar(select(User).where(User.id == token_data.sub)))
+
+
+# 供以普通 def 定义、使用 get_sync_db 的端点使用
+# 与端点共享同一个同步会话，每个请求只占用一个数据库连接
+def get_current_user_sync(
+    db: Session = Depends(get_sync_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = _token_data(token)
+    return _check_user(db.scalar(select(User).where(User.id == token_data.sub)))
+
+
+async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_active:
@@ -47,7 +65,7 @@ def get_current_active_user(
     return current_user
 
 
-def get_current_admin_user(
+async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if current_user.role != "admin":
@@ -57,14 +75,32 @@ def get_current_admin_user(
     return current_user
 
 
+def get_current_active_user_sync(
+    current_user: User = Depends(get_current_user_sync),
+) -> User:
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+def get_current_admin_user_sync(
+    current_user: User = Depends(get_current_user_sync),
+) -> User:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return current_user
+
+
 @router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+async def login_access_token(
+    db: AsyncSession = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await db.scalar(select(User).where(User.username == form_data.username))
     if not user or not verify_password(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -84,7 +120,7 @@ def login_access_token(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(
+async def refresh_token(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
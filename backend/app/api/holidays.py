@@ -0,0 +1,86 @@
+from typing import Any, List, Optional
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import get_current_active_user, get_current_admin_user
+from app.db.session import get_db
+from app.models.models import Holiday, User
+from app.schemas.schemas import HolidayCreate, Holiday as HolidaySchema
+from app.scheduler.holidays import holiday_calendar, load_calendar, reclassify_shifts
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[HolidaySchema])
+async def get_holidays(
+    db: AsyncSession = Depends(get_db),
+    year: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    获取节假日日历，可按年份筛选
+    """
+    query = select(Holiday)
+    if year:
+        query = query.where(Holiday.date >= date(year, 1, 1), Holiday.date <= date(year, 12, 31))
+    return (await db.scalars(query.order_by(Holiday.date))).all()
+
+
+@router.post("/", response_model=HolidaySchema)
+async def create_holiday(
+    *,
+    db: AsyncSession = Depends(get_db),
+    holiday_in: HolidayCreate,
+    reclassify: bool = True,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    添加节假日或调休工作日，仅管理员可访问
+    reclassify=true 时同时更新当天已有班次的工作日 / 节假日类型
+    """
+    holiday = await db.scalar(select(Holiday).where(Holiday.date == holiday_in.date))
+    if holiday:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Holiday already exists for this date",
+        )
+
+    holiday = Holiday(**holiday_in.model_dump())
+    db.add(holiday)
+    await db.flush()
+    if reclassify:
+        await db.run_sync(lambda session: reclassify_shifts(session, holiday.date, load_calendar(session)))
+    await db.commit()
+    holiday_calendar.invalidate()
+    await db.refresh(holiday)
+    return holiday
+
+
+@router.delete("/{holiday_id}", response_model=HolidaySchema)
+async def delete_holiday(
+    *,
+    db: AsyncSession = Depends(get_db),
+    holiday_id: str,
+    reclassify: bool = True,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    删除节假日或调休工作日，仅管理员可访问
+    """
+    holiday = await db.scalar(select(Holiday).where(Holiday.id == holiday_id))
+    if not holiday:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Holiday not found",
+        )
+
+    await db.delete(holiday)
+    await db.flush()
+    if reclassify:
+        await db.run_sync(lambda session: reclassify_shifts(session, holiday.date, load_calendar(session)))
+    await db.commit()
+    holiday_calendar.invalidate()
+    return holiday
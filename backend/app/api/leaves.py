@@ -0,0 +1,122 @@
+from typing import Any, List, Optional
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.auth import get_current_active_user, get_current_active_user_sync
+from app.db.session import get_db, get_sync_db
+from app.models.models import ScheduleAssignment, Shift, StaffLeave, User
+from app.schemas.schemas import StaffLeaveCreate, StaffLeave as StaffLeaveSchema
+from app.scheduler.repair import repair_shifts
+
+router = APIRouter()
+
+LEAVE_KINDS = ("leave", "unavailable")
+
+
+@router.get("/", response_model=List[StaffLeaveSchema])
+async def get_leaves(
+    db: AsyncSession = Depends(get_db),
+    user_id: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    获取请假记录，可按用户和时间范围筛选；非管理员只能查看自己的记录
+    """
+    query = select(StaffLeave)
+    if current_user.role != "admin":
+        query = query.where(StaffLeave.user_id == current_user.id)
+    elif user_id:
+        query = query.where(StaffLeave.user_id == user_id)
+    if start_time:
+        query = query.where(StaffLeave.end_time > start_time)
+    if end_time:
+        query = query.where(StaffLeave.start_time < end_time)
+    return (await db.scalars(query.order_by(StaffLeave.start_time))).all()
+
+
+@router.post("/", response_model=StaffLeaveSchema)
+def create_leave(
+    *,
+    db: Session = Depends(get_sync_db),
+    leave_in: StaffLeaveCreate,
+    repair: bool = True,
+    current_user: User = Depends(get_current_active_user_sync),
+) -> Any:
+    """
+    登记请假或不可排班时段；非管理员只能为自己登记
+    管理员登记且 repair=true 时，同时把该用户从请假期间已排的班次中移出并补人
+    """
+    if current_user.id != leave_in.user_id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Can only register leave for yourself",
+        )
+    
+    if leave_in.kind not in LEAVE_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Leave kind must be one of {', '.join(LEAVE_KINDS)}",
+        )
+    
+    if leave_in.end_time <= leave_in.start_time:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End time must be after start time",
+        )
+    
+    user = db.query(User).filter(User.id == leave_in.user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    
+    leave = StaffLeave(**leave_in.model_dump())
+    db.add(leave)
+    db.flush()
+    if repair and current_user.role == "admin":
+        affected = db.scalars(
+            select(ScheduleAssignment.shift_id).join(Shift).where(
+                ScheduleAssignment.user_id == leave.user_id,
+                Shift.end_time > leave.start_time,
+                Shift.start_time < leave.end_time,
+            )
+        )
+        repair_shifts(db, affected.all())
+    db.commit()
+    db.refresh(leave)
+    return leave
+
+
+@router.delete("/{leave_id}", response_model=StaffLeaveSchema)
+async def delete_leave(
+    *,
+    db: AsyncSession = Depends(get_db),
+    leave_id: str,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    删除请假记录；非管理员只能删除自己的记录
+    """
+    leave = await db.scalar(select(StaffLeave).where(StaffLeave.id == leave_id))
+    if not leave:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Leave not found",
+        )
+    
+    if current_user.id != leave.user_id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    
+    await db.delete(leave)
+    await db.commit()
+    return leave
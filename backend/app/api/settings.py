@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, List, Optional
 
 from app.api.auth import get_current_admin_user
@@ -11,27 +12,27 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[SystemSettingSchema])
-def get_settings(
-    db: Session = Depends(get_db),
+async def get_settings(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     获取系统设置，仅管理员可访问
     """
-    settings = db.query(SystemSetting).all()
+    settings = (await db.scalars(select(SystemSetting))).all()
     return settings
 
 
 @router.get("/{key}", response_model=SystemSettingSchema)
-def get_setting_by_key(
+async def get_setting_by_key(
     key: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     获取指定键的系统设置，仅管理员可访问
     """
-    setting = db.query(SystemSetting).filter(SystemSetting.key == key).first()
+    setting = await db.scalar(select(SystemSetting).where(SystemSetting.key == key))
     if not setting:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -41,9 +42,9 @@ def get_setting_by_key(
 
 
 @router.put("/{key}", response_model=SystemSettingSchema)
-def update_setting(
+async def update_setting(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     key: str,
     setting_in: SystemSettingUpdate,
     current_user: User = Depends(get_current_admin_user),
@@ -51,7 +52,7 @@ def update_setting(
     """
     更新系统设置，仅管理员可访问
     """
-    setting = db.query(SystemSetting).filter(SystemSetting.key == key).first()
+    setting = await db.scalar(select(SystemSetting).where(SystemSetting.key == key))
     
     if not setting:
         # 如果设置不存在，创建新设置
@@ -69,6 +70,6 @@ def update_setting(
         setting.updated_by = current_user.id
     
     db.add(setting)
-    db.commit()
-    db.refresh(setting)
+    await db.commit()
+    await db.refresh(setting)
     return setting
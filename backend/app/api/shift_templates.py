@@ -0,0 +1,178 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.auth import get_current_admin_user
+from app.db.session import get_db
+from app.models.models import ShiftTemplate, User
+from app.schemas.schemas import ShiftTemplateCreate, ShiftTemplateUpdate, ShiftTemplate as ShiftTemplateSchema
+from app.schemas.schemas import ShiftTemplateExpand, ShiftTemplateExpansion
+from app.scheduler.holidays import holiday_calendar
+from app.scheduler.templates import expand_templates, insert_template_shifts
+
+router = APIRouter()
+
+
+def _validate_template(template: ShiftTemplate) -> None:
+    if template.shift_family not in ("DAY", "NIGHT"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Shift family must be 'DAY' or 'NIGHT'",
+        )
+    if not 0 < template.duration_minutes <= 24 * 60:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Duration must be between 1 minute and 24 hours",
+        )
+    if not 0 < template.weekdays < 1 << 7:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Weekdays must be a non-empty 7-bit mask",
+        )
+    if template.valid_until is not None and template.valid_until < template.valid_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Valid until must not be before valid from",
+        )
+
+
+@router.get("/", response_model=List[ShiftTemplateSchema])
+async def get_shift_templates(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取班次模板列表，仅管理员可访问
+    """
+    return (await db.scalars(select(ShiftTemplate).order_by(ShiftTemplate.name))).all()
+
+
+@router.post("/", response_model=ShiftTemplateSchema)
+async def create_shift_template(
+    *,
+    db: AsyncSession = Depends(get_db),
+    template_in: ShiftTemplateCreate,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    创建班次模板，仅管理员可访问
+    """
+    if await db.scalar(select(ShiftTemplate).where(ShiftTemplate.name == template_in.name)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Template name already exists",
+        )
+    template = ShiftTemplate(**template_in.model_dump())
+    _validate_template(template)
+    db.add(template)
+    await db.commit()
+    await db.refresh(template)
+    return template
+
+
+@router.post("/expand", response_model=ShiftTemplateExpansion)
+async def expand_shift_templates(
+    *,
+    db: AsyncSession = Depends(get_db),
+    expand_in: ShiftTemplateExpand,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    在服务端把班次模板展开为日期范围内的班次，仅管理员可访问
+    已展开过的班次会被跳过，可重复执行
+    """
+    if expand_in.start_date > expand_in.end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="End date must not be before start date",
+        )
+
+    query = select(ShiftTemplate)
+    if expand_in.template_ids is not None:
+        query = query.where(ShiftTemplate.id.in_(expand_in.template_ids))
+    else:
+        query = query.where(ShiftTemplate.is_active == True)
+    templates = (await db.scalars(query)).all()
+    if not templates:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No shift templates found",
+        )
+
+    calendar = (await db.run_sync(holiday_calendar.get)).merged(expand_in.holidays, expand_in.workdays)
+    rows = expand_templates(templates, expand_in.start_date, expand_in.end_date, calendar)
+    created = await db.run_sync(insert_template_shifts, rows)
+    await db.commit()
+    return {"created": created, "skipped": len(rows) - created}
+
+
+@router.get("/{template_id}", response_model=ShiftTemplateSchema)
+async def get_shift_template(
+    template_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取指定班次模板，仅管理员可访问
+    """
+    template = await db.scalar(select(ShiftTemplate).where(ShiftTemplate.id == template_id))
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shift template not found",
+        )
+    return template
+
+
+@router.put("/{template_id}", response_model=ShiftTemplateSchema)
+async def update_shift_template(
+    *,
+    db: AsyncSession = Depends(get_db),
+    template_id: str,
+    template_in: ShiftTemplateUpdate,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    更新班次模板，仅管理员可访问
+    已展开的班次不受影响，只作用于之后新展开的班次
+    """
+    template = await db.scalar(select(ShiftTemplate).where(ShiftTemplate.id == template_id))
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shift template not found",
+        )
+
+    for field, value in template_in.model_dump(exclude_unset=True).items():
+        setattr(template, field, value)
+    _validate_template(template)
+
+    db.add(template)
+    await db.commit()
+    await db.refresh(template)
+    return template
+
+
+@router.delete("/{template_id}", response_model=ShiftTemplateSchema)
+async def delete_shift_template(
+    *,
+    db: AsyncSession = Depends(get_db),
+    template_id: str,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    删除班次模板，仅管理员可访问
+    已展开的班次保留，只解除与模板的关联
+    """
+    template = await db.scalar(select(ShiftTemplate).where(ShiftTemplate.id == template_id))
+    if not template:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shift template not found",
+        )
+
+    await db.delete(template)
+    await db.commit()
+    return template
@@ -1,22 +1,110 @@
-from typing import Any, List, Optional
-from datetime import datetime, date
+from typing import Any, Iterable, Iterator, List, Optional, Union
+from datetime import datetime, date, timedelta, timezone
+import asyncio
+import json
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 
-from app.api.auth import get_current_active_user, get_current_admin_user
-from app.db.session import get_db
-from app.models.models import Shift, ScheduleAssignment, User
+from app.api.auth import get_current_active_user, get_current_admin_user, get_current_admin_user_sync
+from app.core.config import settings
+from app.core.idempotency import claim_key, complete_key, find_record, replay_response, request_fingerprint, stored_response
+from app.db.session import SessionLocal, get_db, get_sync_db
+from app.models.models import Shift, ScheduleAssignment, ScheduleVersion, User
 from app.schemas.schemas import ShiftCreate, ShiftUpdate, Shift as ShiftSchema
 from app.schemas.schemas import ScheduleAssignmentCreate, ScheduleAssignment as ScheduleAssignmentSchema
+from app.schemas.schemas import ScheduleJob as ScheduleJobSchema, ScheduleRepair as ScheduleRepairSchema
+from app.schemas.schemas import ScheduleDiff as ScheduleDiffSchema, ScheduleScore as ScheduleScoreSchema
+from app.schemas.schemas import FairnessStats as FairnessStatsSchema, CoverageReport as CoverageReportSchema
+from app.schemas.schemas import ShiftCoverage as ShiftCoverageSchema
+from app.schemas.schemas import ScheduleVersion as ScheduleVersionSchema, ScheduleVersionDetail as ScheduleVersionDetailSchema
+from app.schemas.schemas import ScheduleVersionPublish as ScheduleVersionPublishSchema
+from app.scheduler.availability import load_availability
+from app.scheduler.coverage import coverage_gaps
+from app.scheduler.fairness import load_ledger
+from app.scheduler.holidays import SHIFT_FAMILIES, holiday_calendar, local_date
+from app.scheduler.intervals import IntervalIndex
+from app.scheduler.jobs import job_manager
+from app.scheduler.locks import RangeLockTimeout, schedule_range_lock
+from app.scheduler.persistence import is_overlap_violation, on_duty_filter
+from app.scheduler.repair import repair_shifts, repair_user
+from app.scheduler.service import GenerationError, generate, preview, submit_generation_job
+from app.scheduler.strategies import STRATEGIES
+from app.scheduler.versions import OVERLAP_DETAIL, VersionError, create_draft, publish, rollback, version_changes, window_checksum
 
 router = APIRouter()
 
+# 流式响应的媒体类型与每批序列化、从数据库读取的行数
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+
+# 响应中序列化的排班关系；异步会话不能在序列化时隐式加载，须随查询一并加载
+ASSIGNMENT_LOADERS = (selectinload(ScheduleAssignment.user), selectinload(ScheduleAssignment.shift))
+
+
+def _ndjson(items: Iterable[Any]) -> Iterator[str]:
+    """
+    把 Pydantic 模型逐条序列化为 NDJSON，按批输出
+    """
+    batch: List[str] = []
+    for item in items:
+        batch.append(item.model_dump_json())
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def _schedule_filters(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    user_id: Optional[Any] = None,
+) -> List[Any]:
+    conditions = []
+    if start_date:
+        conditions.append(Shift.start_time >= start_date)
+    if end_date:
+        conditions.append(Shift.end_time <= end_date)
+    if user_id is not None:
+        conditions.append(ScheduleAssignment.user_id == user_id)
+    return conditions
+
+
+def _stream_schedules(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    user_id: Optional[Any] = None,
+) -> Iterator[ScheduleAssignmentSchema]:
+    """
+    以 yield_per 分批读取排班并逐条转换，内存占用与结果总量无关
+
+    响应在端点返回后才开始发送，因此使用独立的会话，而不依赖请求的会话。
+    """
+    db = SessionLocal()
+    try:
+        query = (
+            select(ScheduleAssignment)
+            .join(Shift)
+            .join(User)
+            .where(*_schedule_filters(start_date, end_date, user_id))
+            .options(contains_eager(ScheduleAssignment.user), contains_eager(ScheduleAssignment.shift))
+            .order_by(Shift.start_time, ScheduleAssignment.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        for assignment in db.scalars(query):
+            yield ScheduleAssignmentSchema.model_validate(assignment, from_attributes=True)
+    finally:
+        db.close()
+
 
 @router.get("/", response_model=List[ShiftSchema])
-def get_shifts(
-    db: Session = Depends(get_db),
+async def get_shifts(
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     shift_type: Optional[str] = None,
@@ -25,30 +113,63 @@ def get_shifts(
     """
     获取班次列表，可按日期范围和类型筛选
     """
-    query = db.query(Shift)
+    query = select(Shift)
     
     # 应用筛选条件
     if start_date:
-        query = query.filter(Shift.start_time >= start_date)
+        query = query.where(Shift.start_time >= start_date)
     if end_date:
-        query = query.filter(Shift.end_time <= end_date)
+        query = query.where(Shift.end_time <= end_date)
     if shift_type:
-        query = query.filter(Shift.shift_type == shift_type)
+        query = query.where(Shift.shift_type == shift_type)
     
-    shifts = query.all()
+    shifts = (await db.scalars(query)).all()
     return shifts
 
 
+# 排班相关API
+# 须在 /{shift_id} 之前注册，否则 /schedules 会被当作班次ID匹配
+@router.get("/schedules", response_model=List[ScheduleAssignmentSchema])
+async def get_schedules(
+    db: AsyncSession = Depends(get_db),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    stream: bool = Query(False),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    获取排班表，可按日期范围筛选
+    stream=true 时以 NDJSON 逐行返回，适合大范围导出
+    """
+    # 非管理员只能查看自己的排班
+    user_id = current_user.id if current_user.role != "admin" else None
+    
+    if stream:
+        # 流式读取使用独立的同步会话；请求的会话在响应发送完之前不会被依赖关闭，先释放其连接
+        await db.close()
+        return StreamingResponse(
+            _ndjson(_stream_schedules(start_date, end_date, user_id)),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    
+    schedules = (await db.scalars(
+        select(ScheduleAssignment).join(Shift).where(
+            *_schedule_filters(start_date, end_date, user_id)
+        ).options(*ASSIGNMENT_LOADERS)
+    )).all()
+    return schedules
+
+
 @router.get("/{shift_id}", response_model=ShiftSchema)
-def get_shift_by_id(
+async def get_shift_by_id(
     shift_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     获取指定班次信息
     """
-    shift = db.query(Shift).filter(Shift.id == shift_id).first()
+    shift = await db.scalar(select(Shift).where(Shift.id == shift_id))
     if not shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -58,14 +179,15 @@ def get_shift_by_id(
 
 
 @router.post("/", response_model=ShiftSchema)
-def create_shift(
+async def create_shift(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     shift_in: ShiftCreate,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     创建新班次，仅管理员可访问
+    shift_type 可只给出 DAY / NIGHT，由节假日日历自动区分工作日与节假日
     """
     # 检查时间范围是否有效
     if shift_in.start_time >= shift_in.end_time:
@@ -74,30 +196,37 @@ def create_shift(
             detail="End time must be after start time",
         )
     
+    # 只给出类别（DAY / NIGHT）时按节假日日历确定工作日或节假日
+    shift_type = shift_in.shift_type
+    if shift_type in SHIFT_FAMILIES:
+        shift_type = (await db.run_sync(holiday_calendar.get)).shift_type(shift_type, local_date(shift_in.start_time))
+    
     # 创建新班次
     shift = Shift(
         start_time=shift_in.start_time,
         end_time=shift_in.end_time,
-        shift_type=shift_in.shift_type,
+        shift_type=shift_type,
         required_mentors=shift_in.required_mentors,
         required_staff=shift_in.required_staff,
     )
     db.add(shift)
-    db.commit()
-    db.refresh(shift)
+    await db.commit()
+    await db.refresh(shift)
     return shift
 
 
 @router.put("/{shift_id}", response_model=ShiftSchema)
 def update_shift(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_sync_db),
     shift_id: str,
     shift_in: ShiftUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    repair_schedule: bool = False,
+    current_user: User = Depends(get_current_admin_user_sync),
 ) -> Any:
     """
     更新班次信息，仅管理员可访问
+    repair_schedule=true 时只对该班次做增量排班修复，其他排班保持不变
     """
     shift = db.query(Shift).filter(Shift.id == shift_id).first()
     if not shift:
@@ -127,27 +256,43 @@ def update_shift(
             detail="End time must be after start time",
         )
     
+    if update_data.get("shift_type") in SHIFT_FAMILIES:
+        start_time = update_data.get("start_time", shift.start_time)
+        calendar = holiday_calendar.get(db)
+        update_data["shift_type"] = calendar.shift_type(update_data["shift_type"], local_date(start_time))
+    
     # 更新班次对象
     for field, value in update_data.items():
         setattr(shift, field, value)
     
     db.add(shift)
-    db.commit()
+    try:
+        if repair_schedule:
+            repair_shifts(db, [shift.id])
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_overlap_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Shift time change overlaps other shifts of assigned users",
+            )
+        raise
     db.refresh(shift)
     return shift
 
 
 @router.delete("/{shift_id}", response_model=ShiftSchema)
-def delete_shift(
+async def delete_shift(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     shift_id: str,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     删除班次，仅管理员可访问
     """
-    shift = db.query(Shift).filter(Shift.id == shift_id).first()
+    shift = await db.scalar(select(Shift).where(Shift.id == shift_id))
     if not shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,150 +300,537 @@ def delete_shift(
         )
     
     # 检查是否有关联的排班
-    assignments = db.query(ScheduleAssignment).filter(ScheduleAssignment.shift_id == shift_id).all()
+    assignments = (await db.scalars(select(ScheduleAssignment).where(ScheduleAssignment.shift_id == shift_id))).all()
     if assignments:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete shift with existing assignments",
         )
     
-    db.delete(shift)
-    db.commit()
+    await db.delete(shift)
+    await db.commit()
     return shift
 
 
-# 排班相关API
-@router.get("/schedules", response_model=List[ScheduleAssignmentSchema])
-def get_schedules(
-    db: Session = Depends(get_db),
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-    current_user: User = Depends(get_current_active_user),
+# 运行求解器或持有排班范围锁的端点使用同步会话，以普通 def 在线程池中执行，
+# 避免CPU密集的求解与进程内锁的等待阻塞事件循环
+@router.post(
+    "/schedules/generate",
+    response_model=Union[List[ScheduleAssignmentSchema], ScheduleJobSchema, ScheduleDiffSchema],
+)
+def generate_schedule(
+    *,
+    db: Session = Depends(get_sync_db),
+    response: Response,
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    background: bool = Query(False),
+    dry_run: bool = Query(False),
+    time_budget: Optional[float] = Query(None, gt=0, le=settings.SCHEDULER_MAX_TIME_BUDGET_SECONDS),
+    strategy: Optional[str] = Query(None),
+    stream: bool = Query(False),
+    rolling: bool = Query(False),
+    warm_start: bool = Query(True),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    current_user: User = Depends(get_current_admin_user_sync),
 ) -> Any:
     """
-    获取排班表，可按日期范围筛选
+    自动生成排班表，仅管理员可访问
+    background=true 时放入后台任务并立即返回任务信息，可通过 /schedules/jobs/{job_id} 查询进度
+    dry_run=true 时只返回与现有排班的差异（新增、移除、调动），不写入任何数据
+    time_budget 为时间预算（秒），在预算内以局部搜索改进贪心解，到时返回当前最优解；
+    后台任务的改进过程可通过 /schedules/jobs/{job_id}/events 以SSE订阅
+    strategy 指定求解策略（round_robin / greedy / local_search / exact），默认按问题规模自动选择
+    stream=true 时提交后以 NDJSON 逐行返回生成的排班
+    rolling=true 时按滚动时域逐窗口（默认 4 周、重叠 1 周）求解，适合全年排班；不影响 dry_run
+    warm_start=true（默认）时以上一周期的排班热启动，延续轮转与累计负载
+    重叠日期范围的生成串行执行；带 Idempotency-Key 请求头重试时直接返回第一次的结果，
+    流式请求的重试则重新读出该日期范围已提交的排班，后台任务的重试返回任务的当前状态
     """
-    query = db.query(ScheduleAssignment).join(Shift)
+    if strategy is not None and strategy not in STRATEGIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown solver strategy '{strategy}'",
+        )
     
-    # 应用筛选条件
-    if start_date:
-        query = query.filter(Shift.start_time >= start_date)
-    if end_date:
-        query = query.filter(Shift.end_time <= end_date)
+    if dry_run:
+        try:
+            diff, solution, score = preview(db, start_date, end_date, time_budget, strategy, warm_start)
+        except GenerationError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        return ScheduleDiffSchema(
+            added=[{"shift_id": shift_id, "user_id": user_id} for shift_id, user_id in diff.added],
+            removed=[{"shift_id": shift_id, "user_id": user_id} for shift_id, user_id in diff.removed],
+            moved=[
+                {"user_id": user_id, "from_shift_id": from_shift, "to_shift_id": to_shift}
+                for user_id, from_shift, to_shift in diff.moved
+            ],
+            unchanged=diff.unchanged,
+            unfilled=solution.unfilled,
+            score=ScheduleScoreSchema.model_validate(score, from_attributes=True),
+            strategy=solution.strategy,
+        )
     
-    # 非管理员只能查看自己的排班
-    if current_user.role != "admin":
-        query = query.filter(ScheduleAssignment.user_id == current_user.id)
+    stream = stream and not background
+    window_start = datetime.combine(start_date, datetime.min.time())
+    window_end = datetime.combine(end_date, datetime.max.time())
+    fingerprint = request_fingerprint(
+        current_user.id, start_date, end_date, background, time_budget, strategy, stream, rolling, warm_start,
+    )
     
-    schedules = query.all()
-    return schedules
+    def replay() -> Optional[Response]:
+        if not idempotency_key:
+            return None
+        if not stream and not background:
+            return stored_response(db, idempotency_key, "generate_schedule", fingerprint)
+        record = find_record(db, idempotency_key, "generate_schedule", fingerprint)
+        if record is None:
+            return None
+        if background:
+            # 任务已不在本进程中（如重启后）时返回记录的快照
+            job = job_manager.get(json.loads(record.response)["id"])
+            return replay_response(record, job and ScheduleJobSchema.model_validate(job, from_attributes=True))
+        return StreamingResponse(
+            _ndjson(_stream_schedules(window_start, window_end)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"Idempotent-Replayed": "true"},
+        )
+    
+    replayed = replay()
+    if replayed is not None:
+        return replayed
+    
+    try:
+        with schedule_range_lock(db, start_date, end_date):
+            # 等待锁期间，同一个键的并发请求可能已经完成
+            replayed = replay()
+            if replayed is not None:
+                return replayed
+            
+            # 求解之前先占用幂等键；同一个键的并发请求（不同日期范围，不共用锁）
+            # 在主键上等待本事务结束，随后重放本次的结果
+            record = None
+            if idempotency_key:
+                try:
+                    record = claim_key(db, idempotency_key, "generate_schedule", fingerprint, current_user.id)
+                except IntegrityError:
+                    db.rollback()
+                    replayed = replay()
+                    if replayed is not None:
+                        return replayed
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="A request with this Idempotency-Key is still in progress",
+                    )
+            
+            if background:
+                response.status_code = status.HTTP_202_ACCEPTED
+                result = ScheduleJobSchema.model_validate(
+                    submit_generation_job(start_date, end_date, time_budget, strategy, rolling, warm_start),
+                    from_attributes=True,
+                )
+                stored = result
+            elif stream:
+                # 不取回写入的行，提交后与重放相同地从数据库分批读出，内存占用与排班总量无关
+                generation = generate(
+                    db, start_date, end_date, time_budget=time_budget, strategy=strategy,
+                    rolling=rolling, warm_start=warm_start, returning=False,
+                )
+                result = StreamingResponse(
+                    _ndjson(_stream_schedules(window_start, window_end)),
+                    media_type=NDJSON_MEDIA_TYPE,
+                )
+                stored = {"streamed": len(generation.solution.assignments)}
+            else:
+                result = generate(
+                    db, start_date, end_date, time_budget=time_budget, strategy=strategy,
+                    rolling=rolling, warm_start=warm_start,
+                ).to_schemas()
+                stored = result
+            
+            if record is not None:
+                complete_key(db, record, response.status_code or status.HTTP_200_OK, stored)
+            db.commit()
+    except RangeLockTimeout as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.detail)
+    except GenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    return result
 
 
-@router.post("/schedules/generate", response_model=List[ScheduleAssignmentSchema])
-def generate_schedule(
+@router.get("/schedules/jobs/{job_id}", response_model=ScheduleJobSchema)
+async def get_schedule_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    查询排班生成任务的阶段、进度、耗时和结果，仅管理员可访问
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+@router.get("/schedules/jobs/{job_id}/events")
+async def stream_schedule_job_events(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    以SSE推送排班生成任务的进度与目标函数改进，任务结束后关闭，仅管理员可访问
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+
+    async def events():
+        sent = 0
+        last_progress = None
+        while True:
+            finished = job.finished
+            improvements = job.improvements[sent:]
+            sent += len(improvements)
+            for item in improvements:
+                yield f"event: improvement\ndata: {json.dumps(item)}\n\n"
+            state = {"status": job.status, "phase": job.phase, "progress": job.progress}
+            if state != last_progress:
+                last_progress = state
+                yield f"event: progress\ndata: {json.dumps(state)}\n\n"
+            if finished:
+                yield f"event: end\ndata: {json.dumps({'status': job.status, 'error': job.error})}\n\n"
+                return
+            await asyncio.sleep(settings.SCHEDULER_EVENT_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/schedules/jobs/{job_id}", response_model=ScheduleJobSchema)
+async def cancel_schedule_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    取消排班生成任务，仅管理员可访问
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    if job.finished:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot cancel a job with status '{job.status}'",
+        )
+    return job_manager.cancel(job_id)
+
+
+@router.post("/schedules/repair", response_model=ScheduleRepairSchema)
+def repair_schedule(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_sync_db),
+    user_id: Optional[str] = None,
+    shift_id: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user_sync),
+) -> Any:
+    """
+    增量修复排班，仅管理员可访问
+    指定用户时修复其今后的班次，指定班次时只修复该班次；只替换失效的排班
+    """
+    if not user_id and not shift_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either user_id or shift_id is required",
+        )
+    
+    if shift_id:
+        shift = db.query(Shift).filter(Shift.id == shift_id).first()
+        if not shift:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Shift not found",
+            )
+        result = repair_shifts(db, [shift.id])
+    else:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found",
+            )
+        result = repair_user(db, user.id, since=datetime.now(timezone.utc))
+    
+    added = result.to_schemas()
+    db.commit()
+    return {
+        "affected_shifts": result.affected_shifts,
+        "removed": result.removed,
+        "added": added,
+        "unfilled": result.unfilled,
+    }
+
+
+@router.get("/schedules/versions", response_model=List[ScheduleVersionSchema])
+async def get_schedule_versions(
+    db: AsyncSession = Depends(get_db),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取排班版本列表，按创建时间倒序，仅管理员可访问
+    """
+    query = select(ScheduleVersion)
+    if status_filter:
+        query = query.where(ScheduleVersion.status == status_filter)
+    return (await db.scalars(query.order_by(ScheduleVersion.created_at.desc()))).all()
+
+
+@router.post("/schedules/versions", response_model=ScheduleVersionSchema)
+def create_schedule_version(
+    *,
+    db: Session = Depends(get_sync_db),
+    name: str = Query(..., max_length=100),
     start_date: date = Query(...),
     end_date: date = Query(...),
-    current_user: User = Depends(get_current_admin_user),
+    time_budget: Optional[float] = Query(None, gt=0, le=settings.SCHEDULER_MAX_TIME_BUDGET_SECONDS),
+    strategy: Optional[str] = Query(None),
+    warm_start: bool = Query(True),
+    current_user: User = Depends(get_current_admin_user_sync),
 ) -> Any:
     """
-    自动生成排班表，仅管理员可访问
+    生成排班草稿版本，仅管理员可访问
+    与 dry_run 相同地在内存中求解，只保存相对于现有排班的新增与移除，不改动排班表；
+    发布后才生效；求解不持有日期范围锁，发布时若窗口内排班已被改动则返回 409
     """
-    # 这里应该实现排班算法，根据需求文档中的规则自动生成排班
-    # 由于算法复杂度较高，这里只实现一个简单的示例
-    
-    # 获取指定日期范围内的班次
-    shifts = db.query(Shift).filter(
-        and_(
-            Shift.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Shift.end_time <= datetime.combine(end_date, datetime.max.time())
+    if strategy is not None and strategy not in STRATEGIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown solver strategy '{strategy}'",
         )
-    ).all()
     
-    if not shifts:
+    window = (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date, datetime.max.time()),
+    )
+    # 在求解之前记录校验和：求解期间的改动只会让发布被拒绝，而不会被漏掉
+    checksum = window_checksum(db, window)
+    try:
+        diff, solution, _ = preview(db, start_date, end_date, time_budget, strategy, warm_start)
+    except GenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    version = create_draft(db, name, start_date, end_date, window, diff, solution, checksum, current_user.id)
+    db.commit()
+    db.refresh(version)
+    return version
+
+
+@router.post("/schedules/versions/rollback", response_model=ScheduleVersionPublishSchema)
+def rollback_schedule_version(
+    *,
+    db: Session = Depends(get_sync_db),
+    current_user: User = Depends(get_current_admin_user_sync),
+) -> Any:
+    """
+    回滚当前已发布的排班版本，仅管理员可访问
+    反向应用其增量并把已发布指针退回到其基线版本；被回滚的版本恢复为草稿，可重新发布
+    """
+    head = db.query(ScheduleVersion).filter(ScheduleVersion.status == "published").first()
+    if not head:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="No shifts found in the specified date range",
+            detail="No published schedule version to roll back",
         )
     
-    # 获取所有活跃用户
-    users = db.query(User).filter(User.is_active == True).all()
+    try:
+        with schedule_range_lock(db, head.start_date, head.end_date):
+            rolled_back, base, inserted, deleted = rollback(db)
+            db.commit()
+    except RangeLockTimeout as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.detail)
+    except VersionError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=OVERLAP_DETAIL if is_overlap_violation(e) else "Schedule versions were changed concurrently",
+        )
     
-    if not users:
+    return {
+        "published_version_id": base.id if base else None,
+        "version": rolled_back,
+        "inserted": inserted,
+        "deleted": deleted,
+    }
+
+
+@router.get("/schedules/versions/{version_id}", response_model=ScheduleVersionDetailSchema)
+async def get_schedule_version(
+    *,
+    db: AsyncSession = Depends(get_db),
+    version_id: str,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取排班版本及其全部增量，仅管理员可访问
+    """
+    version = await db.scalar(select(ScheduleVersion).where(ScheduleVersion.id == version_id))
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="No active users found",
+            detail="Schedule version not found",
+        )
+    # 不经过 version.changes 关系，增量按班次时间排序读取
+    detail = ScheduleVersionSchema.model_validate(version, from_attributes=True).model_dump()
+    detail["changes"] = await db.run_sync(version_changes, version.id)
+    return ScheduleVersionDetailSchema.model_validate(detail, from_attributes=True)
+
+
+@router.post("/schedules/versions/{version_id}/publish", response_model=ScheduleVersionPublishSchema)
+def publish_schedule_version(
+    *,
+    db: Session = Depends(get_sync_db),
+    version_id: str,
+    current_user: User = Depends(get_current_admin_user_sync),
+) -> Any:
+    """
+    发布排班草稿版本，仅管理员可访问
+    把草稿的增量应用到排班表并移动已发布指针；草稿须以当前已发布版本为基线，否则返回 409
+    """
+    version = db.query(ScheduleVersion).filter(ScheduleVersion.id == version_id).first()
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Schedule version not found",
         )
     
-    # 清除指定日期范围内的现有排班
-    existing_assignments = db.query(ScheduleAssignment).join(Shift).filter(
-        and_(
-            Shift.start_time >= datetime.combine(start_date, datetime.min.time()),
-            Shift.end_time <= datetime.combine(end_date, datetime.max.time())
-        )
-    ).all()
-    
-    for assignment in existing_assignments:
-        db.delete(assignment)
-    
-    # 简单的排班逻辑：轮流分配用户到班次
-    assignments = []
-    user_index = 0
-    
-    for shift in shifts:
-        # 根据班次类型和需求分配不同数量的人员
-        required_staff = shift.required_staff
-        
-        for _ in range(required_staff):
-            # 确保不超出用户列表范围
-            if user_index >= len(users):
-                user_index = 0
-            
-            # 检查用户角色是否符合班次类型
-            user = users[user_index]
-            
-            # 白班只能分配给白班人员，夜班只能分配给夜班人员
-            if ("DAY" in shift.shift_type and user.role == "day_shift") or \
-               ("NIGHT" in shift.shift_type and user.role == "night_shift") or \
-               user.role == "admin":  # 管理员可以被分配到任何班次
-                
-                # 如果是新人，确保其师傅也被分配到同一班次
-                if user.is_trainee and user.mentor_id:
-                    mentor = db.query(User).filter(User.id == user.mentor_id).first()
-                    if mentor:
-                        assignment = ScheduleAssignment(
-                            user_id=mentor.id,
-                            shift_id=shift.id,
-                            is_primary=True
-                        )
-                        db.add(assignment)
-                        assignments.append(assignment)
-                
-                # 创建排班分配
-                assignment = ScheduleAssignment(
-                    user_id=user.id,
-                    shift_id=shift.id,
-                    is_primary=True
-                )
-                db.add(assignment)
-                assignments.append(assignment)
-            
-            user_index += 1
-    
-    db.commit()
-    
-    # 刷新所有对象以获取完整数据
-    for assignment in assignments:
-        db.refresh(assignment)
+    try:
+        with schedule_range_lock(db, version.start_date, version.end_date):
+            inserted, deleted = publish(db, version)
+            db.commit()
+    except RangeLockTimeout as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.detail)
+    except VersionError as e:
+        db.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=OVERLAP_DETAIL if is_overlap_violation(e) else "Schedule versions were changed concurrently",
+        )
     
-    return assignments
+    return {
+        "published_version_id": version.id,
+        "version": version,
+        "inserted": inserted,
+        "deleted": deleted,
+    }
+
+
+@router.get("/schedules/on-duty", response_model=List[ScheduleAssignmentSchema])
+async def get_on_duty(
+    db: AsyncSession = Depends(get_db),
+    at: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    获取某一时刻在岗的排班，默认为当前时刻
+    """
+    at = at or datetime.now(timezone.utc)
+    return (await db.scalars(
+        select(ScheduleAssignment).join(Shift).where(on_duty_filter(db, at)).options(*ASSIGNMENT_LOADERS)
+    )).all()
+
+
+@router.get("/schedules/coverage", response_model=CoverageReportSchema)
+async def get_schedule_coverage(
+    db: AsyncSession = Depends(get_db),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    检查日期范围内各班次的在岗人数与师傅人数，只返回缺人、超员或缺师傅的班次，仅管理员可访问
+    以一条分组查询完成，适用于全年范围
+    """
+    window_start = datetime.combine(start_date, datetime.min.time())
+    window_end = datetime.combine(end_date, datetime.max.time())
+    report = CoverageReportSchema()
+    for row in await db.run_sync(coverage_gaps, window_start, window_end):
+        entry = ShiftCoverageSchema(
+            shift_id=row.id,
+            start_time=row.start_time,
+            end_time=row.end_time,
+            shift_type=row.shift_type,
+            required_staff=row.required_staff,
+            staffed=row.staffed,
+            required_mentors=row.required_mentors,
+            mentors=row.mentors,
+            shortfall=max(row.required_staff - row.staffed, 0),
+            excess=max(row.staffed - row.required_staff, 0),
+            mentor_shortfall=max(row.required_mentors - row.mentors, 0),
+        )
+        report.understaffed += entry.shortfall > 0
+        report.overstaffed += entry.excess > 0
+        report.missing_mentors += entry.mentor_shortfall > 0
+        report.shifts.append(entry)
+    return report
+
+
+@router.get("/stats/fairness", response_model=List[FairnessStatsSchema])
+async def get_fairness_stats(
+    db: AsyncSession = Depends(get_db),
+    role: Optional[str] = None,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    各用户按班次类型累计的班次数与工时，以及夜班、节假日（含周末）班次合计，仅管理员可访问
+    PostgreSQL 下数据来自公平性台账，开销只与用户数成正比；其他数据库退化为聚合全部排班历史
+    """
+    ledger = await db.run_sync(load_ledger)
+    query = select(User).where(User.is_active == True)
+    if role:
+        query = query.where(User.role == role)
+    
+    stats = []
+    for user in await db.scalars(query.order_by(User.username)):
+        by_type = ledger.get(user.id, {})
+        stats.append(FairnessStatsSchema(
+            user_id=user.id,
+            username=user.username,
+            name=user.name,
+            role=user.role,
+            total_shifts=sum(entry.shift_count for entry in by_type.values()),
+            total_hours=sum(entry.hours for entry in by_type.values()),
+            night_shifts=sum(entry.shift_count for shift_type, entry in by_type.items() if shift_type.startswith("NIGHT")),
+            holiday_shifts=sum(entry.shift_count for shift_type, entry in by_type.items() if shift_type.endswith("_HOLIDAY")),
+            by_type={
+                shift_type: {"shift_count": entry.shift_count, "hours": entry.hours}
+                for shift_type, entry in by_type.items()
+            },
+        ))
+    return stats
 
 
 @router.get("/schedules/user/{user_id}", response_model=List[ScheduleAssignmentSchema])
-def get_user_schedule(
+async def get_user_schedule(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     current_user: User = Depends(get_current_active_user),
@@ -314,29 +846,29 @@ def get_user_schedule(
         )
     
     # 检查用户是否存在
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
     
-    query = db.query(ScheduleAssignment).filter(ScheduleAssignment.user_id == user_id).join(Shift)
+    query = select(ScheduleAssignment).where(ScheduleAssignment.user_id == user_id).join(Shift)
     
     # 应用筛选条件
     if start_date:
-        query = query.filter(Shift.start_time >= start_date)
+        query = query.where(Shift.start_time >= start_date)
     if end_date:
-        query = query.filter(Shift.end_time <= end_date)
+        query = query.where(Shift.end_time <= end_date)
     
-    schedules = query.all()
+    schedules = (await db.scalars(query.options(*ASSIGNMENT_LOADERS))).all()
     return schedules
 
 
 @router.post("/schedules/assign", response_model=ScheduleAssignmentSchema)
-def assign_schedule(
+async def assign_schedule(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     assignment_in: ScheduleAssignmentCreate,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
@@ -344,7 +876,7 @@ def assign_schedule(
     手动分配排班，仅管理员可访问
     """
     # 检查用户是否存在
-    user = db.query(User).filter(User.id == assignment_in.user_id).first()
+    user = await db.scalar(select(User).where(User.id == assignment_in.user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -352,7 +884,7 @@ def assign_schedule(
         )
     
     # 检查班次是否存在
-    shift = db.query(Shift).filter(Shift.id == assignment_in.shift_id).first()
+    shift = await db.scalar(select(Shift).where(Shift.id == assignment_in.shift_id))
     if not shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -360,12 +892,12 @@ def assign_schedule(
         )
     
     # 检查是否已存在相同的排班
-    existing = db.query(ScheduleAssignment).filter(
+    existing = await db.scalar(select(ScheduleAssignment).where(
         and_(
             ScheduleAssignment.user_id == assignment_in.user_id,
             ScheduleAssignment.shift_id == assignment_in.shift_id
         )
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -373,35 +905,74 @@ def assign_schedule(
             detail="Assignment already exists",
         )
     
-    # 创建排班分配
+    # 检查是否与该用户的其他班次重叠或休息时间不足
+    min_rest = timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS)
+    nearby = (await db.execute(select(Shift.start_time, Shift.end_time).join(ScheduleAssignment).where(
+        and_(
+            ScheduleAssignment.user_id == assignment_in.user_id,
+            Shift.end_time > shift.start_time - min_rest,
+            Shift.start_time < shift.end_time + min_rest
+        )
+    ))).all()
+    if IntervalIndex(nearby).conflicts(shift.start_time, shift.end_time, min_rest):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Assignment overlaps another shift or violates minimum rest time",
+        )
+    
+    # 检查用户在该班次期间是否请假或不可排班
+    availability = await db.run_sync(load_availability, shift.start_time, shift.end_time, [assignment_in.user_id])
+    if not availability.is_available(assignment_in.user_id, shift.start_time, shift.end_time):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User is on leave or unavailable during this shift",
+        )
+    
+    # 创建排班分配；以上预检查与并发写入之间存在竞态，
+    # 重复与重叠最终由数据库的唯一约束和排他约束原子地拒绝
     assignment = ScheduleAssignment(
         user_id=assignment_in.user_id,
         shift_id=assignment_in.shift_id,
         is_primary=assignment_in.is_primary
     )
     db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
-    return assignment
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Assignment overlaps another shift",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Assignment already exists",
+        )
+    return await db.scalar(
+        select(ScheduleAssignment).where(ScheduleAssignment.id == assignment.id).options(*ASSIGNMENT_LOADERS)
+    )
 
 
 @router.delete("/schedules/{assignment_id}", response_model=ScheduleAssignmentSchema)
-def delete_schedule_assignment(
+async def delete_schedule_assignment(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     assignment_id: str,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     删除排班分配，仅管理员可访问
     """
-    assignment = db.query(ScheduleAssignment).filter(ScheduleAssignment.id == assignment_id).first()
+    assignment = await db.scalar(
+        select(ScheduleAssignment).where(ScheduleAssignment.id == assignment_id).options(*ASSIGNMENT_LOADERS)
+    )
     if not assignment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Assignment not found",
         )
     
-    db.delete(assignment)
-    db.commit()
+    await db.delete(assignment)
+    await db.commit()
     return assignment
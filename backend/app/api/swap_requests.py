@@ -2,20 +2,70 @@ from typing import Any, List, Optional
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import get_current_active_user, get_current_admin_user
+from app.api.shifts import ASSIGNMENT_LOADERS
 from app.db.session import get_db
 from app.models.models import ShiftSwapRequest, ScheduleAssignment, User, Notification
 from app.schemas.schemas import ShiftSwapRequestCreate, ShiftSwapRequestUpdate, ShiftSwapRequest as ShiftSwapRequestSchema
+from app.scheduler.availability import load_availability
+from app.scheduler.persistence import defer_overlap_check, is_overlap_violation
 
 router = APIRouter()
 
+# 响应中序列化的调班申请关系，随查询一并加载
+SWAP_REQUEST_LOADERS = (
+    selectinload(ShiftSwapRequest.requester),
+    selectinload(ShiftSwapRequest.target),
+    selectinload(ShiftSwapRequest.requester_shift).options(*ASSIGNMENT_LOADERS),
+    selectinload(ShiftSwapRequest.target_shift).options(*ASSIGNMENT_LOADERS),
+)
+
+
+async def _load_request(db: AsyncSession, request_id: Any) -> Optional[ShiftSwapRequest]:
+    """
+    读取调班申请及其关系；已在会话中的对象以数据库中的最新值覆盖
+    """
+    return await db.scalar(
+        select(ShiftSwapRequest)
+        .where(ShiftSwapRequest.id == request_id)
+        .options(*SWAP_REQUEST_LOADERS)
+        .execution_options(populate_existing=True)
+    )
+
+
+def _swap_unavailable(
+    db: Session,
+    requester_shift: ScheduleAssignment,
+    target_shift: Optional[ScheduleAssignment],
+    requester_id: Any,
+    target_id: Any,
+) -> bool:
+    """
+    调班后是否有人落入自己的请假时段：目标人接手申请人的班次，申请人接手目标人的班次（如有）
+    """
+    moves = [(target_id, requester_shift.shift)]
+    if target_shift is not None:
+        moves.append((requester_id, target_shift.shift))
+    availability = load_availability(
+        db,
+        min(shift.start_time for _, shift in moves),
+        max(shift.end_time for _, shift in moves),
+        [user_id for user_id, _ in moves],
+    )
+    return any(
+        not availability.is_available(user_id, shift.start_time, shift.end_time)
+        for user_id, shift in moves
+    )
+
 
 @router.get("/", response_model=List[ShiftSwapRequestSchema])
-def get_swap_requests(
-    db: Session = Depends(get_db),
+async def get_swap_requests(
+    db: AsyncSession = Depends(get_db),
     status: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -23,36 +73,36 @@ def get_swap_requests(
     获取调班申请列表，可按状态筛选
     管理员可查看所有申请，普通用户只能查看与自己相关的申请
     """
-    query = db.query(ShiftSwapRequest)
+    query = select(ShiftSwapRequest).options(*SWAP_REQUEST_LOADERS)
     
     # 应用筛选条件
     if status:
-        query = query.filter(ShiftSwapRequest.status == status)
+        query = query.where(ShiftSwapRequest.status == status)
     
     # 非管理员只能查看与自己相关的申请
     if current_user.role != "admin":
-        query = query.filter(
+        query = query.where(
             or_(
                 ShiftSwapRequest.requester_id == current_user.id,
                 ShiftSwapRequest.target_id == current_user.id
             )
         )
     
-    requests = query.all()
+    requests = (await db.scalars(query)).all()
     return requests
 
 
 @router.get("/{request_id}", response_model=ShiftSwapRequestSchema)
-def get_swap_request_by_id(
+async def get_swap_request_by_id(
     request_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     获取指定调班申请详情
     管理员可查看任何申请，普通用户只能查看与自己相关的申请
     """
-    request = db.query(ShiftSwapRequest).filter(ShiftSwapRequest.id == request_id).first()
+    request = await _load_request(db, request_id)
     if not request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,9 +120,9 @@ def get_swap_request_by_id(
 
 
 @router.post("/", response_model=ShiftSwapRequestSchema)
-def create_swap_request(
+async def create_swap_request(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     request_in: ShiftSwapRequestCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -87,14 +137,14 @@ def create_swap_request(
         )
     
     # 检查申请人和目标人是否存在
-    requester = db.query(User).filter(User.id == request_in.requester_id).first()
+    requester = await db.scalar(select(User).where(User.id == request_in.requester_id))
     if not requester:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Requester not found",
         )
     
-    target = db.query(User).filter(User.id == request_in.target_id).first()
+    target = await db.scalar(select(User).where(User.id == request_in.target_id))
     if not target:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -102,7 +152,7 @@ def create_swap_request(
         )
     
     # 检查申请人的班次是否存在
-    requester_shift = db.query(ScheduleAssignment).filter(ScheduleAssignment.id == request_in.requester_shift_id).first()
+    requester_shift = await db.scalar(select(ScheduleAssignment).where(ScheduleAssignment.id == request_in.requester_shift_id))
     if not requester_shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -117,8 +167,9 @@ def create_swap_request(
         )
     
     # 检查目标人的班次是否存在（如果提供）
+    target_shift = None
     if request_in.target_shift_id:
-        target_shift = db.query(ScheduleAssignment).filter(ScheduleAssignment.id == request_in.target_shift_id).first()
+        target_shift = await db.scalar(select(ScheduleAssignment).where(ScheduleAssignment.id == request_in.target_shift_id))
         if not target_shift:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -132,15 +183,22 @@ def create_swap_request(
                 detail="Target shift does not belong to target",
             )
     
+    # 检查调班后双方是否落入各自的请假时段
+    if await db.run_sync(_swap_unavailable, requester_shift, target_shift, request_in.requester_id, request_in.target_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Swap would place a user on a shift during their leave",
+        )
+    
     # 检查是否已存在相同的申请
-    existing = db.query(ShiftSwapRequest).filter(
+    existing = await db.scalar(select(ShiftSwapRequest).where(
         and_(
             ShiftSwapRequest.requester_id == request_in.requester_id,
             ShiftSwapRequest.requester_shift_id == request_in.requester_shift_id,
             ShiftSwapRequest.target_id == request_in.target_id,
             ShiftSwapRequest.status == "pending"
         )
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(
@@ -152,13 +210,13 @@ def create_swap_request(
     month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(microseconds=1)
     
-    monthly_requests = db.query(ShiftSwapRequest).filter(
+    monthly_requests = await db.scalar(select(func.count()).select_from(ShiftSwapRequest).where(
         and_(
             ShiftSwapRequest.requester_id == request_in.requester_id,
             ShiftSwapRequest.created_at >= month_start,
             ShiftSwapRequest.created_at <= month_end
         )
-    ).count()
+    ))
     
     if monthly_requests >= 3:
         raise HTTPException(
@@ -176,8 +234,7 @@ def create_swap_request(
         status="pending"
     )
     db.add(swap_request)
-    db.commit()
-    db.refresh(swap_request)
+    await db.commit()
     
     # 创建通知
     notification = Notification(
@@ -188,15 +245,15 @@ def create_swap_request(
         related_id=swap_request.id
     )
     db.add(notification)
-    db.commit()
+    await db.commit()
     
-    return swap_request
+    return await _load_request(db, swap_request.id)
 
 
 @router.patch("/{request_id}/respond", response_model=ShiftSwapRequestSchema)
-def respond_to_swap_request(
+async def respond_to_swap_request(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     request_id: str,
     response: str,  # "accepted" or "rejected"
     current_user: User = Depends(get_current_active_user),
@@ -205,7 +262,7 @@ def respond_to_swap_request(
     响应调班申请（接受/拒绝）
     """
     # 检查申请是否存在
-    swap_request = db.query(ShiftSwapRequest).filter(ShiftSwapRequest.id == request_id).first()
+    swap_request = await db.scalar(select(ShiftSwapRequest).where(ShiftSwapRequest.id == request_id))
     if not swap_request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -236,12 +293,11 @@ def respond_to_swap_request(
     # 更新申请状态
     swap_request.status = response
     db.add(swap_request)
-    db.commit()
-    db.refresh(swap_request)
+    await db.commit()
     
     # 创建通知
-    requester = db.query(User).filter(User.id == swap_request.requester_id).first()
-    target = db.query(User).filter(User.id == swap_request.target_id).first()
+    requester = await db.scalar(select(User).where(User.id == swap_request.requester_id))
+    target = await db.scalar(select(User).where(User.id == swap_request.target_id))
     
     notification = Notification(
         user_id=swap_request.requester_id,
@@ -255,7 +311,7 @@ def respond_to_swap_request(
     # 如果接受，还需要管理员审批
     if response == "accepted":
         # 通知管理员
-        admins = db.query(User).filter(User.role == "admin").all()
+        admins = await db.scalars(select(User).where(User.role == "admin"))
         for admin in admins:
             admin_notification = Notification(
                 user_id=admin.id,
@@ -266,15 +322,15 @@ def respond_to_swap_request(
             )
             db.add(admin_notification)
     
-    db.commit()
+    await db.commit()
     
-    return swap_request
+    return await _load_request(db, swap_request.id)
 
 
 @router.patch("/{request_id}/approve", response_model=ShiftSwapRequestSchema)
-def approve_swap_request(
+async def approve_swap_request(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     request_id: str,
     approval: str,  # "approved" or "rejected"
     comment: Optional[str] = None,
@@ -284,7 +340,7 @@ def approve_swap_request(
     管理员审批调班申请，仅管理员可访问
     """
     # 检查申请是否存在
-    swap_request = db.query(ShiftSwapRequest).filter(ShiftSwapRequest.id == request_id).first()
+    swap_request = await db.scalar(select(ShiftSwapRequest).where(ShiftSwapRequest.id == request_id))
     if not swap_request:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -313,11 +369,22 @@ def approve_swap_request(
     
     # 如果批准，执行调班操作
     if approval == "approved":
-        requester_shift = db.query(ScheduleAssignment).filter(ScheduleAssignment.id == swap_request.requester_shift_id).first()
-        
+        # 交换用户时两行会先后更新，中间状态可能暂时重叠
+        await db.run_sync(defer_overlap_check)
+        requester_shift = await db.scalar(select(ScheduleAssignment).where(ScheduleAssignment.id == swap_request.requester_shift_id))
+        target_shift = None
         if swap_request.target_shift_id:
-            target_shift = db.query(ScheduleAssignment).filter(ScheduleAssignment.id == swap_request.target_shift_id).first()
-            
+            target_shift = await db.scalar(select(ScheduleAssignment).where(ScheduleAssignment.id == swap_request.target_shift_id))
+        
+        # 申请提交后双方可能新增了请假
+        if await db.run_sync(_swap_unavailable, requester_shift, target_shift, swap_request.requester_id, swap_request.target_id):
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Swap would place a user on a shift during their leave",
+            )
+        
+        if target_shift is not None:
             # 交换用户ID
             requester_shift.user_id, target_shift.user_id = target_shift.user_id, requester_shift.user_id
             
@@ -328,12 +395,20 @@ def approve_swap_request(
             requester_shift.user_id = swap_request.target_id
             db.add(requester_shift)
     
-    db.commit()
-    db.refresh(swap_request)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_overlap_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Swap would overlap other shifts of the users involved",
+            )
+        raise
     
     # 创建通知
-    requester = db.query(User).filter(User.id == swap_request.requester_id).first()
-    target = db.query(User).filter(User.id == swap_request.target_id).first()
+    requester = await db.scalar(select(User).where(User.id == swap_request.requester_id))
+    target = await db.scalar(select(User).where(User.id == swap_request.target_id))
     
     # 通知申请人
     requester_notification = Notification(
@@ -355,15 +430,15 @@ def approve_swap_request(
     )
     db.add(target_notification)
     
-    db.commit()
+    await db.commit()
     
-    return swap_request
+    return await _load_request(db, swap_request.id)
 
 
 @router.get("/user/{user_id}", response_model=List[ShiftSwapRequestSchema])
-def get_user_swap_requests(
+async def get_user_swap_requests(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     status: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
@@ -379,23 +454,23 @@ def get_user_swap_requests(
         )
     
     # 检查用户是否存在
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
     
-    query = db.query(ShiftSwapRequest).filter(
+    query = select(ShiftSwapRequest).where(
         or_(
             ShiftSwapRequest.requester_id == user_id,
             ShiftSwapRequest.target_id == user_id
         )
-    )
+    ).options(*SWAP_REQUEST_LOADERS)
     
     # 应用筛选条件
     if status:
-        query = query.filter(ShiftSwapRequest.status == status)
+        query = query.where(ShiftSwapRequest.status == status)
     
-    requests = query.all()
+    requests = (await db.scalars(query)).all()
     return requests
@@ -1,21 +1,24 @@
 from typing import Any, List, Optional
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
-from app.api.auth import get_current_active_user, get_current_admin_user
+from app.api.auth import get_current_active_user, get_current_admin_user, get_current_admin_user_sync
 from app.core.security import get_password_hash, verify_password
-from app.db.session import get_db
+from app.db.session import get_db, get_sync_db
 from app.models.models import User
 from app.schemas.schemas import UserCreate, UserUpdate, User as UserSchema
+from app.scheduler.repair import repair_user
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[UserSchema])
-def get_users(
-    db: Session = Depends(get_db),
+async def get_users(
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_admin_user),
@@ -23,12 +26,12 @@ def get_users(
     """
     获取用户列表，仅管理员可访问
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return users
 
 
 @router.get("/me", response_model=UserSchema)
-def get_current_user_info(
+async def get_current_user_info(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -38,15 +41,15 @@ def get_current_user_info(
 
 
 @router.get("/{user_id}", response_model=UserSchema)
-def get_user_by_id(
+async def get_user_by_id(
     user_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     获取指定用户信息，管理员可查看任何用户，普通用户只能查看自己
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,9 +64,9 @@ def get_user_by_id(
 
 
 @router.post("/", response_model=UserSchema)
-def create_user(
+async def create_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_in: UserCreate,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
@@ -71,14 +74,14 @@ def create_user(
     创建新用户，仅管理员可访问
     """
     # 检查用户名是否已存在
-    user = db.query(User).filter(User.username == user_in.username).first()
+    user = await db.scalar(select(User).where(User.username == user_in.username))
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists",
         )
     # 检查邮箱是否已存在
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await db.scalar(select(User).where(User.email == user_in.email))
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -86,7 +89,7 @@ def create_user(
         )
     # 如果是新人且指定了师傅，检查师傅是否存在
     if user_in.is_trainee and user_in.mentor_id:
-        mentor = db.query(User).filter(User.id == user_in.mentor_id).first()
+        mentor = await db.scalar(select(User).where(User.id == user_in.mentor_id))
         if not mentor:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -106,15 +109,15 @@ def create_user(
         trainee_end_date=user_in.trainee_end_date,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.put("/{user_id}", response_model=UserSchema)
-def update_user(
+async def update_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: str,
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -122,7 +125,7 @@ def update_user(
     """
     更新用户信息，管理员可更新任何用户，普通用户只能更新自己
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -151,22 +154,22 @@ def update_user(
         setattr(user, field, value)
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.delete("/{user_id}", response_model=UserSchema)
-def delete_user(
+async def delete_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: str,
     current_user: User = Depends(get_current_admin_user),
 ) -> Any:
     """
     删除用户，仅管理员可访问
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -179,21 +182,23 @@ def delete_user(
             detail="Cannot delete yourself",
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     return user
 
 
 @router.patch("/{user_id}/activate", response_model=UserSchema)
 def activate_user(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_sync_db),
     user_id: str,
     is_active: bool,
-    current_user: User = Depends(get_current_admin_user),
+    repair_schedule: bool = False,
+    current_user: User = Depends(get_current_admin_user_sync),
 ) -> Any:
     """
     激活/禁用用户，仅管理员可访问
+    禁用且 repair_schedule=true 时，增量修复该用户今后的班次
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -210,40 +215,42 @@ def activate_user(
     
     user.is_active = is_active
     db.add(user)
+    if repair_schedule and not is_active:
+        repair_user(db, user.id, since=datetime.now(timezone.utc))
     db.commit()
     db.refresh(user)
     return user
 
 
 @router.get("/trainees", response_model=List[UserSchema])
-def get_trainees(
-    db: Session = Depends(get_db),
+async def get_trainees(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     获取所有新人列表
     """
-    trainees = db.query(User).filter(User.is_trainee == True).all()
+    trainees = (await db.scalars(select(User).where(User.is_trainee == True))).all()
     return trainees
 
 
 @router.get("/mentors", response_model=List[UserSchema])
-def get_mentors(
-    db: Session = Depends(get_db),
+async def get_mentors(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     获取所有师傅列表
     """
     # 师傅可以是任何非新人的用户
-    mentors = db.query(User).filter(User.is_trainee == False).all()
+    mentors = (await db.scalars(select(User).where(User.is_trainee == False))).all()
     return mentors
 
 
 @router.post("/{trainee_id}/assign-mentor/{mentor_id}", response_model=UserSchema)
-def assign_mentor(
+async def assign_mentor(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     trainee_id: str,
     mentor_id: str,
     current_user: User = Depends(get_current_admin_user),
@@ -251,7 +258,7 @@ def assign_mentor(
     """
     为新人分配师傅，仅管理员可访问
     """
-    trainee = db.query(User).filter(User.id == trainee_id).first()
+    trainee = await db.scalar(select(User).where(User.id == trainee_id))
     if not trainee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -263,7 +270,7 @@ def assign_mentor(
             detail="User is not a trainee",
         )
     
-    mentor = db.query(User).filter(User.id == mentor_id).first()
+    mentor = await db.scalar(select(User).where(User.id == mentor_id))
     if not mentor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -277,6 +284,6 @@ def assign_mentor(
     
     trainee.mentor_id = mentor.id
     db.add(trainee)
-    db.commit()
-    db.refresh(trainee)
+    await db.commit()
+    await db.refresh(trainee)
     return trainee
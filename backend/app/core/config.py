@@ -1,8 +1,16 @@
 from pydantic_settings import BaseSettings
 from typing import Optional, Dict, Any, List
+import os
 import secrets
 
 
+# 数据库 -> 异步驱动
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
 class Settings(BaseSettings):
     API_V1_STR: str = "/api"
     SECRET_KEY: str = secrets.token_urlsafe(32)
@@ -20,6 +28,40 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "scheduling"
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # 异步引擎的连接池：请求处理的并发度由连接池而不是线程池决定
+    SQLALCHEMY_POOL_SIZE: int = 20
+    SQLALCHEMY_MAX_OVERFLOW: int = 10
+    # 输出每条 SQL，仅用于本地调试
+    SQLALCHEMY_ECHO: bool = False
+
+    # Scheduler settings
+    SCHEDULER_JOB_WORKERS: int = 2
+    SCHEDULER_JOB_TTL_SECONDS: int = 60 * 60
+    # 班次模板的开始时刻、节假日日期均按该时区的当地时间解释
+    SCHEDULER_TIMEZONE: str = "Asia/Shanghai"
+    # 节假日日历的进程内缓存在该时间后重新加载（秒）
+    HOLIDAY_CALENDAR_TTL_SECONDS: int = 5 * 60
+    # 同一用户两个班次之间的最短休息时间（小时）
+    SCHEDULER_MIN_REST_HOURS: int = 8
+    # 并行求解：进程数、管理员在各班次类别之间轮换的周期（天），以及启用并行的最小总名额
+    # 最小总名额按 benchmarks/run.py 的预设校准：medium（600 名额）并行只快约 1ms，
+    # large（3600）与 xlarge（21600）的求解时间约减半，进程间传输不到 25ms
+    SCHEDULER_SOLVER_PROCESSES: int = os.cpu_count() or 1
+    SCHEDULER_ADMIN_ROTATION_DAYS: int = 14
+    SCHEDULER_PARALLEL_MIN_SEATS: int = 2000
+    # 未指定时间预算时的求解延迟目标（秒），以及精确求解的最大规模（人员 × 班次）
+    SCHEDULER_LATENCY_TARGET_SECONDS: float = 2.0
+    SCHEDULER_EXACT_MAX_SIZE: int = 1500
+    # 滚动时域：每个求解窗口的天数，以及相邻窗口重叠（下一窗口重新求解）的天数
+    SCHEDULER_ROLLING_WINDOW_DAYS: int = 28
+    SCHEDULER_ROLLING_OVERLAP_DAYS: int = 7
+    # 局部搜索时间预算（秒）的上限，以及任务事件流的轮询间隔
+    SCHEDULER_MAX_TIME_BUDGET_SECONDS: float = 120.0
+    SCHEDULER_EVENT_POLL_SECONDS: float = 0.25
+    # 等待重叠日期范围的排班生成锁的最长时间（秒）
+    SCHEDULER_LOCK_TIMEOUT_SECONDS: float = 30.0
+    # 幂等键保存的时长（小时），过期后同一个键会被视为新请求
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
 
     class Config:
         case_sensitive = True
@@ -30,5 +72,15 @@ class Settings(BaseSettings):
             return self.SQLALCHEMY_DATABASE_URI
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    def get_async_database_url(self) -> str:
+        """
+        异步引擎使用的连接串：PostgreSQL 使用 asyncpg，SQLite 使用 aiosqlite
+        """
+        url = self.get_database_url()
+        scheme, sep, rest = url.partition("://")
+        backend = scheme.split("+", 1)[0]
+        driver = ASYNC_DRIVERS.get(backend)
+        return f"{backend}+{driver}{sep}{rest}" if driver else url
+
 
 settings = Settings()
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+import hashlib
+import json
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import IdempotencyKey
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """
+    请求参数的摘要，用于识别同一个幂等键是否被用于不同的请求
+    """
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def find_record(db: Session, key: str, endpoint: str, fingerprint: str) -> Optional[IdempotencyKey]:
+    """
+    查找该端点下幂等键未过期的记录
+
+    同一个键配不同参数时返回 422；记录尚未完成（第一次请求仍在处理）时返回 409。
+    """
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == key,
+        IdempotencyKey.endpoint == endpoint,
+        IdempotencyKey.created_at > _cutoff(),
+    ).first()
+    if record is None:
+        return None
+    if record.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    if record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+        )
+    return record
+
+
+def replay_response(record: IdempotencyKey, content: Any = None) -> JSONResponse:
+    """
+    重放记录的响应；给出 content 时以它代替记录的响应体（如后台任务的当前状态）
+    """
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response) if content is None else jsonable_encoder(content),
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def stored_response(db: Session, key: str, endpoint: str, fingerprint: str) -> Optional[JSONResponse]:
+    """
+    返回该幂等键第一次请求的响应，未记录或已过期时返回 None
+    """
+    record = find_record(db, key, endpoint, fingerprint)
+    if record is None:
+        return None
+    return replay_response(record)
+
+
+def claim_key(db: Session, key: str, endpoint: str, fingerprint: str, user_id=None) -> IdempotencyKey:
+    """
+    在业务写入之前插入未完成的记录，与业务写入在同一事务中提交
+
+    同一个键的并发请求插入同一主键时在唯一索引上等待本事务结束，本事务提交后
+    得到 IntegrityError，回滚后即可重放已记录的响应，不会在求解完成后才失败。
+    顺带清理过期的记录；过期的同名键在此处被删除后重新写入。
+    """
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at <= _cutoff()))
+    record = IdempotencyKey(
+        key=key,
+        endpoint=endpoint,
+        request_hash=fingerprint,
+        user_id=user_id,
+    )
+    db.add(record)
+    db.flush()
+    return record
+
+
+def complete_key(db: Session, record: IdempotencyKey, status_code: int, content: Any) -> None:
+    """
+    记录幂等键对应的响应
+    """
+    record.status_code = status_code
+    record.response = json.dumps(jsonable_encoder(content))
+    db.flush()
@@ -1,13 +1,15 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.declarative import declarative_base
 
 from app.core.config import settings
 
 # 创建同步引擎
+# 用于排班求解、后台任务、流式导出等在线程中运行的代码，以及迁移与基准
 engine = create_engine(
     settings.get_database_url(),
-    echo=True,
+    echo=settings.SQLALCHEMY_ECHO,
 )
 
 # 创建同步会话
@@ -17,12 +19,52 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# 创建异步引擎（asyncpg），用于请求处理
+# 等待数据库时不占用线程池的线程，并发请求数只受连接池大小限制
+_async_options = {}
+if not settings.get_async_database_url().startswith("sqlite"):
+    _async_options.update(
+        pool_size=settings.SQLALCHEMY_POOL_SIZE,
+        max_overflow=settings.SQLALCHEMY_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+async_engine = create_async_engine(
+    settings.get_async_database_url(),
+    echo=settings.SQLALCHEMY_ECHO,
+    **_async_options,
+)
+
+# 创建异步会话；提交后不过期对象，返回给响应序列化时不会再触发隐式加载
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # 创建Base类
 Base = declarative_base()
 
 
-# 依赖函数，用于获取数据库会话
-def get_db():
+# 依赖函数，用于获取异步数据库会话
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# 依赖函数，用于获取同步数据库会话
+# 仅供运行求解器（生成、修复）或持有排班锁的端点使用，这些端点以普通 def 定义，在线程池中执行，不阻塞事件循环：
+#   shifts: update_shift、generate_schedule、repair_schedule、
+#           create_schedule_version、publish_schedule_version、rollback_schedule_version
+#   users: activate_user（repair_schedule=true 时修复排班）
+#   leaves: create_leave（repair=true 时修复排班）
+# 其余端点一律使用 get_db；新增端点只有在调用求解器或排班锁时才使用本依赖
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
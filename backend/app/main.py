@@ -1,10 +1,17 @@
+import logging
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.db.session import get_db
-from app.api import auth, users, shifts, swap_requests, notifications, settings as settings_api
+from app.scheduler.holidays import holiday_calendar
+from app.api import auth, users, shifts, shift_templates, holidays, leaves, swap_requests, notifications, settings as settings_api
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -25,19 +32,31 @@ if settings.BACKEND_CORS_ORIGINS:
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
 app.include_router(shifts.router, prefix=f"{settings.API_V1_STR}/shifts", tags=["shifts"])
+app.include_router(shift_templates.router, prefix=f"{settings.API_V1_STR}/shift-templates", tags=["shift-templates"])
+app.include_router(holidays.router, prefix=f"{settings.API_V1_STR}/holidays", tags=["holidays"])
+app.include_router(leaves.router, prefix=f"{settings.API_V1_STR}/leaves", tags=["leaves"])
 app.include_router(swap_requests.router, prefix=f"{settings.API_V1_STR}/swap-requests", tags=["swap-requests"])
 app.include_router(notifications.router, prefix=f"{settings.API_V1_STR}/notifications", tags=["notifications"])
 app.include_router(settings_api.router, prefix=f"{settings.API_V1_STR}/settings", tags=["settings"])
 
+@app.on_event("startup")
+def load_holiday_calendar():
+    # 启动时把节假日日历加载到内存，班次分类不再查询数据库
+    # 数据库不可用时不阻止启动（由 /health 报告），日历在第一次使用时再加载
+    try:
+        holiday_calendar.load()
+    except SQLAlchemyError:
+        logger.exception("Failed to preload holiday calendar; it will be loaded on first use")
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Scheduling System API"}
 
 @app.get("/health")
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_db)):
     try:
         # 尝试执行一个简单的数据库查询
-        db.execute("SELECT 1")
+        await db.execute(text("SELECT 1"))
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         return {"status": "error", "database": str(e)}
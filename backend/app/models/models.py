@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, CheckConstraint, Integer, Text, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, ForeignKey, DateTime, Date, Time, CheckConstraint, Integer, Float, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -46,11 +46,60 @@ class Shift(Base):
     )
     required_mentors = Column(Integer, default=0)
     required_staff = Column(Integer, default=1)
+    template_id = Column(UUID(as_uuid=True), ForeignKey("shift_templates.id", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # 关系
     assignments = relationship("ScheduleAssignment", back_populates="shift")
+    template = relationship("ShiftTemplate", back_populates="shifts")
+
+    __table_args__ = (
+        # 同一模板在同一时刻只展开一个班次，保证重复展开是幂等的
+        UniqueConstraint(template_id, start_time),
+    )
+
+
+class ShiftTemplate(Base):
+    __tablename__ = "shift_templates"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), unique=True, nullable=False)
+    shift_family = Column(
+        String(10),
+        CheckConstraint("shift_family IN ('DAY', 'NIGHT')"),
+        nullable=False
+    )
+    # 当地时间的开始时刻与持续时长
+    start_time = Column(Time, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    # 重复规则：按位表示星期几（周一为第0位），在有效期内每周重复
+    weekdays = Column(Integer, default=0b1111111)
+    valid_from = Column(Date, nullable=False)
+    valid_until = Column(Date, nullable=True)
+    # 工作日与节假日分别的人数要求
+    workday_required_staff = Column(Integer, default=1)
+    workday_required_mentors = Column(Integer, default=0)
+    holiday_required_staff = Column(Integer, default=1)
+    holiday_required_mentors = Column(Integer, default=0)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 关系
+    shifts = relationship("Shift", back_populates="template", passive_deletes=True)
+
+
+class Holiday(Base):
+    __tablename__ = "holidays"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    date = Column(Date, unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
+    # True 表示周末调休上班的工作日，False 表示节假日
+    is_workday = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class ScheduleAssignment(Base):
@@ -75,6 +124,100 @@ class ScheduleAssignment(Base):
     )
 
 
+# 人员请假或不可排班的时间段，排班生成、手动排班与调班都不会把人员排入其中
+class StaffLeave(Base):
+    __tablename__ = "staff_leaves"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=False)
+    kind = Column(
+        String(20),
+        CheckConstraint("kind IN ('leave', 'unavailable')"),
+        default="leave"
+    )
+    reason = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # 关系
+    user = relationship("User")
+
+    __table_args__ = (
+        CheckConstraint("end_time > start_time"),
+        sqlalchemy.Index("ix_staff_leaves_period", start_time, end_time),
+    )
+
+
+# 每个用户按班次类型累计的班次数与工时
+# PostgreSQL 下由排班表和班次表上的触发器增量维护（见迁移 b83f2d6e0a45），应用代码只读不写
+class FairnessLedger(Base):
+    __tablename__ = "fairness_ledger"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    shift_type = Column(String(20), primary_key=True)
+    shift_count = Column(Integer, nullable=False, default=0)
+    hours = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# 命名的排班版本，只保存相对于基线版本的增量
+# 基线为创建草稿时已发布的版本（为空表示尚无版本）；同一时刻至多一个版本处于 published 状态
+# 发布与回滚把增量回放到 schedule_assignments，排班表始终只保存当前生效的排班
+class ScheduleVersion(Base):
+    __tablename__ = "schedule_versions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), nullable=False)
+    status = Column(
+        String(20),
+        CheckConstraint("status IN ('draft', 'published', 'archived')"),
+        nullable=False,
+        default="draft"
+    )
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    base_version_id = Column(UUID(as_uuid=True), ForeignKey("schedule_versions.id", ondelete="SET NULL"), nullable=True)
+    added_count = Column(Integer, nullable=False, default=0)
+    removed_count = Column(Integer, nullable=False, default=0)
+    # 创建草稿时窗口内排班的校验和，发布时用来检测排班是否已被改动
+    window_checksum = Column(String(64), nullable=True)
+    # 发布后窗口内排班的校验和，回滚时用来检测发布之后是否又有改动
+    published_checksum = Column(String(64), nullable=True)
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 关系
+    changes = relationship("ScheduleVersionChange", back_populates="version", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        # 已发布版本即当前指针，用部分唯一索引保证只有一个
+        sqlalchemy.Index(
+            "uq_schedule_versions_published",
+            status,
+            unique=True,
+            postgresql_where=sqlalchemy.text("status = 'published'"),
+            sqlite_where=sqlalchemy.text("status = 'published'"),
+        ),
+    )
+
+
+# 版本相对于基线的单条增量：add 表示新增排班，remove 表示移除排班
+class ScheduleVersionChange(Base):
+    __tablename__ = "schedule_version_changes"
+
+    version_id = Column(UUID(as_uuid=True), ForeignKey("schedule_versions.id", ondelete="CASCADE"), primary_key=True)
+    shift_id = Column(UUID(as_uuid=True), ForeignKey("shifts.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    action = Column(String(10), CheckConstraint("action IN ('add', 'remove')"), nullable=False)
+    is_primary = Column(Boolean, default=True)
+
+    # 关系
+    version = relationship("ScheduleVersion", back_populates="changes")
+
+
 class ShiftSwapRequest(Base):
     __tablename__ = "shift_swap_requests"
 
@@ -135,3 +278,18 @@ class SystemSetting(Base):
 
     # 关系
     updater = relationship("User")
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # 幂等键按端点区分，不同端点可以使用相同的键
+    key = Column(String(255), primary_key=True)
+    endpoint = Column(String(100), primary_key=True)
+    # 请求参数（含用户）的摘要，同一个键配不同参数时拒绝
+    request_hash = Column(String(64), nullable=False)
+    # 第一次请求处理完成前为空
+    status_code = Column(Integer, nullable=True)
+    response = Column(Text, nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
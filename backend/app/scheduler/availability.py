@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import uuid
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.models import StaffLeave
+
+# 位图中每一位代表的时长
+SLOT_LENGTH = timedelta(minutes=30)
+
+
+class AvailabilityMask:
+    """
+    人员不可用时间的位图
+
+    以 origin 为第 0 位，每 SLOT_LENGTH 一位；每个用户的请假时段编码为一个整数位图，
+    判断某人能否上一个班次只需把班次覆盖的位与其位图做一次按位与。
+    时段按整格向外取整：请假与班次只要落在同一格内就视为冲突。
+    没有任何请假的用户不占用位图。
+    """
+
+    def __init__(self, origin: datetime, slot: timedelta = SLOT_LENGTH):
+        self.origin = origin
+        self.slot = slot
+        self.bits: Dict[uuid.UUID, int] = {}
+        # 班次 (开始, 结束) -> 覆盖的位，同一时刻的班次只计算一次
+        self._spans: Dict[Tuple[datetime, datetime], int] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.bits)
+
+    def span(self, start: datetime, end: datetime) -> int:
+        """
+        [start, end) 覆盖的位；早于 origin 的部分被截去
+        """
+        key = (start, end)
+        bits = self._spans.get(key)
+        if bits is None:
+            first = max((start - self.origin) // self.slot, 0)
+            last = -((self.origin - end) // self.slot)
+            bits = ((1 << (last - first)) - 1) << first if last > first else 0
+            self._spans[key] = bits
+        return bits
+
+    def block(self, user_id: uuid.UUID, start: datetime, end: datetime) -> None:
+        self.bits[user_id] = self.bits.get(user_id, 0) | self.span(start, end)
+
+    def is_available(self, user_id: uuid.UUID, start: datetime, end: datetime) -> bool:
+        bits = self.bits.get(user_id)
+        return not bits or not bits & self.span(start, end)
+
+    def available(self, user_ids: Sequence[uuid.UUID], periods: Sequence[Tuple[datetime, datetime]]) -> np.ndarray:
+        """
+        人员 × 时段 的可用矩阵，只对有请假的人员逐格按位与
+        """
+        result = np.ones((len(user_ids), len(periods)), dtype=bool)
+        spans = [self.span(start, end) for start, end in periods]
+        for i, user_id in enumerate(user_ids):
+            bits = self.bits.get(user_id)
+            if bits:
+                result[i] = [not bits & span for span in spans]
+        return result
+
+
+def build_mask(
+    origin: datetime,
+    leaves: Iterable[Tuple[uuid.UUID, datetime, datetime]],
+) -> AvailabilityMask:
+    mask = AvailabilityMask(origin)
+    for user_id, start, end in leaves:
+        mask.block(user_id, start, end)
+    return mask
+
+
+def load_availability(
+    db: Session,
+    start_time: datetime,
+    end_time: datetime,
+    user_ids: Optional[Iterable[uuid.UUID]] = None,
+) -> AvailabilityMask:
+    """
+    以一条查询读出与 [start_time, end_time) 相交的请假，构建以 start_time 为起点的位图
+
+    start_time 应取自班次时间（而不是请求参数拼出的日期），使时区信息与请假记录一致。
+    user_ids 给出时只读取这些用户的请假。
+    """
+    query = db.query(StaffLeave.user_id, StaffLeave.start_time, StaffLeave.end_time).filter(
+        StaffLeave.end_time > start_time,
+        StaffLeave.start_time < end_time,
+    )
+    if user_ids is not None:
+        query = query.filter(StaffLeave.user_id.in_(list(user_ids)))
+    return build_mask(start_time, query.all())
+
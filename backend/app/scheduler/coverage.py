@@ -0,0 +1,51 @@
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.models import ScheduleAssignment, Shift, User
+
+
+def coverage_gaps(db: Session, window_start: datetime, window_end: datetime) -> List[Row]:
+    """
+    以一条分组查询统计时间窗口内每个班次的在岗人数与师傅人数，只返回人数不等于
+    required_staff 或师傅少于 required_mentors 的班次
+
+    师傅为非新人；所需师傅人数不超过所需人数，与排班引擎一致。
+    每行包含班次字段及 staffed、mentors、required_mentors（已截断）。
+    """
+    required_staff = func.coalesce(Shift.required_staff, 0)
+    required_mentors = case(
+        (func.coalesce(Shift.required_mentors, 0) < required_staff, func.coalesce(Shift.required_mentors, 0)),
+        else_=required_staff,
+    )
+    staffed = func.count(ScheduleAssignment.id)
+    mentors = func.coalesce(
+        func.sum(case((ScheduleAssignment.id.is_(None), 0), (User.is_trainee == True, 0), else_=1)),
+        0,
+    )
+    return db.query(
+        Shift.id,
+        Shift.start_time,
+        Shift.end_time,
+        Shift.shift_type,
+        required_staff.label("required_staff"),
+        required_mentors.label("required_mentors"),
+        staffed.label("staffed"),
+        mentors.label("mentors"),
+    ).outerjoin(
+        ScheduleAssignment, ScheduleAssignment.shift_id == Shift.id
+    ).outerjoin(
+        User, User.id == ScheduleAssignment.user_id
+    ).filter(
+        and_(
+            Shift.start_time >= window_start,
+            Shift.end_time <= window_end,
+        )
+    ).group_by(
+        Shift.id, Shift.start_time, Shift.end_time, Shift.shift_type, Shift.required_staff, Shift.required_mentors
+    ).having(
+        or_(staffed != required_staff, mentors < required_mentors)
+    ).order_by(Shift.start_time, Shift.shift_type).all()
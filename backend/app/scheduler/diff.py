@@ -0,0 +1,56 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+import uuid
+
+from app.scheduler.problem import PlannedAssignment
+
+# (班次ID, 用户ID)
+Pair = Tuple[uuid.UUID, uuid.UUID]
+
+
+@dataclass
+class ScheduleDiff:
+    added: List[Pair] = field(default_factory=list)
+    removed: List[Pair] = field(default_factory=list)
+    # (用户ID, 原班次ID, 新班次ID)
+    moved: List[Tuple[uuid.UUID, uuid.UUID, uuid.UUID]] = field(default_factory=list)
+    unchanged: int = 0
+
+
+def diff_assignments(
+    current: Iterable[Pair],
+    planned: Iterable[PlannedAssignment],
+    shift_start: Dict[uuid.UUID, datetime],
+) -> ScheduleDiff:
+    """
+    比较现有排班与新方案
+
+    同一用户被移除的班次与新增的班次按时间顺序两两配对为“调动”，
+    剩余的分别记为新增和移除。
+    """
+    before: Set[Pair] = set(current)
+    after: Set[Pair] = {(item.shift_id, item.user_id) for item in planned}
+
+    removed_by_user: Dict[uuid.UUID, List[uuid.UUID]] = defaultdict(list)
+    added_by_user: Dict[uuid.UUID, List[uuid.UUID]] = defaultdict(list)
+    for shift_id, user_id in before - after:
+        removed_by_user[user_id].append(shift_id)
+    for shift_id, user_id in after - before:
+        added_by_user[user_id].append(shift_id)
+
+    diff = ScheduleDiff(unchanged=len(before & after))
+    for user_id in set(removed_by_user) | set(added_by_user):
+        removed = sorted(removed_by_user.get(user_id, []), key=shift_start.__getitem__)
+        added = sorted(added_by_user.get(user_id, []), key=shift_start.__getitem__)
+        paired = min(len(removed), len(added))
+        for from_shift, to_shift in zip(removed[:paired], added[:paired]):
+            diff.moved.append((user_id, from_shift, to_shift))
+        diff.removed.extend((shift_id, user_id) for shift_id in removed[paired:])
+        diff.added.extend((shift_id, user_id) for shift_id in added[paired:])
+
+    diff.added.sort(key=lambda pair: shift_start[pair[0]])
+    diff.removed.sort(key=lambda pair: shift_start[pair[0]])
+    diff.moved.sort(key=lambda move: shift_start[move[1]])
+    return diff
@@ -0,0 +1,235 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+import uuid
+
+import numpy as np
+
+from app.scheduler.index import StaffIndex
+from app.scheduler.intervals import UserIntervals
+from app.scheduler.problem import PlannedAssignment, ScheduleProblem, ShiftSlot, Solution, StaffMember
+
+if TYPE_CHECKING:
+    from app.scheduler.availability import AvailabilityMask
+
+# 班次类别 -> 可排的角色，管理员可以被分配到任何班次
+ELIGIBLE_ROLES = {
+    "DAY": ("day_shift", "admin"),
+    "NIGHT": ("night_shift", "admin"),
+}
+
+
+def is_eligible(member: StaffMember, slot: ShiftSlot) -> bool:
+    return member.role in ELIGIBLE_ROLES.get(slot.family, ())
+
+
+class SchedulePlanner:
+    """
+    排班规划器
+
+    把班次 × 可排人员视为指派问题：每个岗位的代价为候选人当前负载（相同时比较
+    该班次类型的累计班次数），按班次时间顺序逐个以最小代价填满 required_staff，其中至少
+    required_mentors 个岗位由非新人（可带教人员）担任；新人只有在其
+    师傅同班时才会被排入。同一用户的班次不重叠，且间隔不少于 min_rest。
+    """
+
+    def __init__(self, index: StaffIndex, min_rest: timedelta = timedelta(0)):
+        self.index = index
+        # 每个用户已排班次的区间索引，用于 O(log n) 判断重叠与休息时间
+        self.intervals = UserIntervals(min_rest)
+        self.members = index.members
+        # 负载向量，下标为人员在索引中的次序
+        self.load = np.zeros(len(self.members), dtype=np.int64)
+        # 预先按班次类别划分候选池（人员下标数组），避免对不符合角色的人员做无效迭代
+        roles = np.array([member.role for member in self.members], dtype=object)
+        self.pools: Dict[str, np.ndarray] = {
+            family: np.flatnonzero(np.isin(roles, allowed))
+            for family, allowed in ELIGIBLE_ROLES.items()
+        }
+        self.solution = Solution()
+        # 最近一次排班的先后次序，负载相同时优先排更早上过班的人；未给出 last_worked 时不启用
+        self.recency: Optional[np.ndarray] = None
+        self._clock = 0
+        # 班次类型 -> 各人员该类型的累计班次数（历史来自 set_type_loads）
+        self.type_load: Dict[str, np.ndarray] = defaultdict(
+            lambda: np.zeros(len(self.members), dtype=np.int64)
+        )
+        # 请假等不可用时段，未给出时不检查
+        self.availability: Optional["AvailabilityMask"] = None
+
+    def is_free(self, user_id: uuid.UUID, slot: ShiftSlot) -> bool:
+        """
+        用户能否上该班次：不在请假时段内，且与已排班次不重叠、休息时间足够
+        """
+        if self.availability is not None and not self.availability.is_available(user_id, slot.start_time, slot.end_time):
+            return False
+        return self.intervals.can_assign(user_id, slot.start_time, slot.end_time)
+
+    def set_last_worked(self, last_worked: Dict[uuid.UUID, datetime]) -> None:
+        """
+        由上一周期各用户最近一次班次的时间初始化轮转次序，没有记录的用户视为最久未上班
+        """
+        if not last_worked:
+            return
+        self.recency = np.full(len(self.members), -1, dtype=np.int64)
+        for rank, user_id in enumerate(sorted(last_worked, key=last_worked.get)):
+            position = self.index.order.get(user_id)
+            if position is not None:
+                self.recency[position] = rank
+        self._clock = len(last_worked)
+
+    def set_type_loads(self, type_load: Dict[uuid.UUID, Dict[str, int]]) -> None:
+        """
+        由公平性台账初始化各班次类型的累计班次数
+        """
+        for user_id, counts in type_load.items():
+            position = self.index.order.get(user_id)
+            if position is None:
+                continue
+            for shift_type, count in counts.items():
+                self.type_load[shift_type][position] = count
+
+    def load_of(self, user_id: uuid.UUID) -> int:
+        position = self.index.order.get(user_id)
+        return 0 if position is None else int(self.load[position])
+
+    def add_load(self, user_id: uuid.UUID, delta: int) -> None:
+        position = self.index.order.get(user_id)
+        if position is not None:
+            self.load[position] += delta
+
+    def set_loads(self, loads: Dict[uuid.UUID, int]) -> None:
+        for user_id, value in loads.items():
+            position = self.index.order.get(user_id)
+            if position is not None:
+                self.load[position] = value
+
+    def _assign(self, member: StaffMember, slot: ShiftSlot, chosen: Dict[uuid.UUID, StaffMember]) -> None:
+        chosen[member.id] = member
+        position = self.index.order[member.id]
+        self.load[position] += 1
+        if self.recency is not None:
+            self.recency[position] = self._clock
+            self._clock += 1
+        self.type_load[slot.shift_type][position] += 1
+        self.intervals.add(member.id, slot.start_time, slot.end_time)
+        self.solution.assignments.append(
+            PlannedAssignment(user_id=member.id, shift_id=slot.id, is_primary=True)
+        )
+
+    def _rank(self, pool: np.ndarray, slot: ShiftSlot) -> np.ndarray:
+        """
+        候选人的优先顺序
+        """
+        # 依次按 负载、该类型累计班次数、最近上班次序（热启动时）、次序 升序；
+        # lexsort 以最后一个键为主键，且是稳定排序
+        keys = [self.type_load[slot.shift_type][pool], self.load[pool]]
+        if self.recency is not None:
+            keys.insert(0, self.recency[pool])
+        return pool[np.lexsort(keys)]
+
+    def fill(self, slot: ShiftSlot, fixed: Iterable[StaffMember] = ()) -> List[StaffMember]:
+        """
+        为单个班次选出人员，返回该班次的全部人员
+
+        fixed 为已在班次上且保持不变的人员，只为剩余名额选人。
+        """
+        required_staff = max(slot.required_staff, 0)
+        required_mentors = min(max(slot.required_mentors, 0), required_staff)
+        pool = self.pools.get(slot.family)
+        if pool is None:
+            pool = np.empty(0, dtype=np.int64)
+        ranked = self._rank(pool, slot)
+        candidates = [
+            member for member in (self.members[i] for i in ranked.tolist())
+            if self.is_free(member.id, slot)
+        ]
+        chosen: Dict[uuid.UUID, StaffMember] = {member.id: member for member in fixed}
+
+        # 先填师傅名额
+        mentors = sum(1 for member in chosen.values() if not member.is_trainee)
+        for member in candidates:
+            if mentors >= required_mentors or len(chosen) >= required_staff:
+                break
+            if not member.is_trainee and member.id not in chosen:
+                self._assign(member, slot, chosen)
+                mentors += 1
+
+        # 再按负载从低到高填其余名额
+        for member in candidates:
+            if len(chosen) >= required_staff:
+                break
+            if member.id in chosen:
+                continue
+            if member.is_trainee and member.mentor_id:
+                mentor = self.index.mentor_of(member)
+                if mentor is None or not is_eligible(mentor, slot):
+                    continue
+                if mentor.id not in chosen:
+                    if not self.is_free(mentor.id, slot):
+                        continue
+                    # 需要同时为师傅留出一个名额
+                    if required_staff - len(chosen) < 2:
+                        continue
+                    self._assign(mentor, slot, chosen)
+            self._assign(member, slot, chosen)
+
+        mentors = sum(1 for member in chosen.values() if not member.is_trainee)
+        if len(chosen) < required_staff:
+            self.solution.unfilled[slot.id] = required_staff - len(chosen)
+        if mentors < required_mentors:
+            self.solution.unfilled_mentors[slot.id] = required_mentors - mentors
+        return list(chosen.values())
+
+
+class RoundRobinPlanner(SchedulePlanner):
+    """
+    轮转规划器：每个班次类别维护一个游标，从游标处依次取人，不做排序
+
+    约束与 SchedulePlanner 相同，只是不按负载择优，适合超大规模问题。
+    """
+
+    def __init__(self, index: StaffIndex, min_rest: timedelta = timedelta(0)):
+        super().__init__(index, min_rest)
+        self.cursors: Dict[str, int] = {family: 0 for family in self.pools}
+
+    def set_last_worked(self, last_worked: Dict[uuid.UUID, datetime]) -> None:
+        """
+        各类别的游标从上一周期最后上班的人之后继续
+        """
+        super().set_last_worked(last_worked)
+        if self.recency is None:
+            return
+        for family, pool in self.pools.items():
+            if len(pool) and self.recency[pool].max() >= 0:
+                self.cursors[family] = int(np.argmax(self.recency[pool])) + 1
+
+    def _rank(self, pool: np.ndarray, slot: ShiftSlot) -> np.ndarray:
+        if not len(pool):
+            return pool
+        cursor = self.cursors[slot.family] % len(pool)
+        self.cursors[slot.family] = cursor + max(slot.required_staff, 0)
+        return np.roll(pool, -cursor)
+
+
+def solve(
+    problem: ScheduleProblem,
+    progress: Optional[Callable[[float], None]] = None,
+    planner_class: type = SchedulePlanner,
+) -> Solution:
+    """
+    求解排班问题，progress 以已完成比例（0~1）定期回调
+    """
+    planner = planner_class(StaffIndex(problem.staff), problem.min_rest)
+    planner.intervals.load(problem.busy)
+    planner.set_loads(problem.prior_load)
+    planner.set_last_worked(problem.last_worked)
+    planner.set_type_loads(problem.type_load)
+    planner.availability = problem.availability
+    slots = sorted(problem.shifts, key=lambda s: (s.start_time, s.shift_type))
+    step = max(len(slots) // 100, 1)
+    for i, slot in enumerate(slots, 1):
+        planner.fill(slot)
+        if progress and i % step == 0:
+            progress(i / len(slots))
+    return planner.solution
@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional, Tuple
+import time
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+from app.scheduler.engine import is_eligible
+from app.scheduler.index import StaffIndex
+from app.scheduler.intervals import UserIntervals
+from app.scheduler.matrix import (
+    WEIGHT_LOAD_VARIANCE,
+    WEIGHT_MENTOR_SHORTFALL,
+    WEIGHT_SHORTFALL,
+    WEIGHT_TYPE_VARIANCE,
+)
+from app.scheduler.problem import PlannedAssignment, ScheduleProblem, ShiftSlot, Solution
+
+
+class _Rows:
+    """
+    以坐标形式累积稀疏约束矩阵的行
+    """
+
+    def __init__(self):
+        self.rows: List[int] = []
+        self.cols: List[int] = []
+        self.vals: List[float] = []
+        self.lower: List[float] = []
+        self.upper: List[float] = []
+
+    def add(self, terms: List[Tuple[int, float]], lower: float, upper: float) -> None:
+        row = len(self.lower)
+        for col, val in terms:
+            self.rows.append(row)
+            self.cols.append(col)
+            self.vals.append(val)
+        self.lower.append(lower)
+        self.upper.append(upper)
+
+    def constraint(self, size: int) -> LinearConstraint:
+        matrix = coo_matrix((self.vals, (self.rows, self.cols)), shape=(len(self.lower), size)).tocsr()
+        return LinearConstraint(matrix, np.array(self.lower), np.array(self.upper))
+
+
+def solve_exact(problem: ScheduleProblem, deadline: float) -> Optional[Solution]:
+    """
+    以混合整数规划精确求解小规模排班问题
+
+    变量为每个可行的 (人员, 班次) 是否排班、每个班次的缺人数与缺师傅数；
+    负载平方和按“第 k 个班次的边际代价为 2k-1”线性化（凸函数，最优解中
+    自然按 k 递增取用），已有 prior_load 的人员从 k = prior_load + 1 起算；
+    各班次类型的负载以同样方式线性化，从 type_load 中的历史累计数起算。目标与 ScheduleScore.objective 的权重一致；缺人权重
+    远大于方差项，因此总人数确定后只差一个常数。
+    硬约束包括人数上限、新人与师傅同班、同一用户的班次不重叠且间隔不少于 min_rest、
+    不排入请假时段。
+    截止时间前未找到可行解时返回 None。
+    """
+    index = StaffIndex(problem.staff)
+    members = index.members
+    slots = sorted(problem.shifts, key=lambda s: (s.start_time, s.shift_type))
+    busy = UserIntervals(problem.min_rest)
+    busy.load(problem.busy)
+
+    # 可行的 (人员, 班次) 对
+    pairs: List[Tuple[int, int]] = []
+    pair_of: Dict[Tuple[int, int], int] = {}
+    for j, slot in enumerate(slots):
+        for i, member in enumerate(members):
+            if not is_eligible(member, slot):
+                continue
+            if not busy.can_assign(member.id, slot.start_time, slot.end_time):
+                continue
+            if problem.availability and not problem.availability.is_available(member.id, slot.start_time, slot.end_time):
+                continue
+            if member.is_trainee and member.mentor_id:
+                mentor = index.mentor_of(member)
+                if mentor is None or not is_eligible(mentor, slot):
+                    continue
+            pair_of[(i, j)] = len(pairs)
+            pairs.append((i, j))
+    # 新人的师傅可能因区间冲突没有变量，此时新人同样不可排
+    for (i, j) in list(pairs):
+        member = members[i]
+        if member.is_trainee and member.mentor_id:
+            if (index.order[index.mentor_of(member).id], j) not in pair_of:
+                del pair_of[(i, j)]
+    pairs = [pair for pair in pairs if pair in pair_of]
+    pair_of = {pair: k for k, pair in enumerate(pairs)}
+
+    by_member: Dict[int, List[int]] = {}
+    for (i, j) in pairs:
+        by_member.setdefault(i, []).append(j)
+    active = max(sum(1 for member in members if any(is_eligible(member, slot) for slot in slots)), 1)
+    type_slots: Dict[str, List[ShiftSlot]] = {}
+    for slot in slots:
+        type_slots.setdefault(slot.shift_type, []).append(slot)
+    type_active = {
+        shift_type: max(sum(1 for member in members if any(is_eligible(member, slot) for slot in group)), 1)
+        for shift_type, group in type_slots.items()
+    }
+
+    # 变量布局：x (pairs) | 缺人 u (slots) | 缺师傅 m (slots) | 负载单位 y | 类型负载单位 z
+    n_x = len(pairs)
+    u0 = n_x
+    m0 = u0 + len(slots)
+    y0 = m0 + len(slots)
+    y_of: Dict[int, List[int]] = {}
+    cursor = y0
+    for i, js in by_member.items():
+        y_of[i] = list(range(cursor, cursor + len(js)))
+        cursor += len(js)
+    z_of: Dict[Tuple[int, str], List[int]] = {}
+    for i, js in by_member.items():
+        for j in js:
+            z_of.setdefault((i, slots[j].shift_type), []).append(j)
+    for key, js in z_of.items():
+        z_of[key] = list(range(cursor, cursor + len(js)))
+        cursor += len(js)
+    size = cursor
+
+    cost = np.zeros(size)
+    cost[u0:m0] = WEIGHT_SHORTFALL
+    cost[m0:y0] = WEIGHT_MENTOR_SHORTFALL
+    for i, ys in y_of.items():
+        for k, col in enumerate(ys, problem.prior_load.get(members[i].id, 0) + 1):
+            cost[col] = WEIGHT_LOAD_VARIANCE * (2 * k - 1) / active
+    for (i, shift_type), zs in z_of.items():
+        history = problem.type_load.get(members[i].id, {}).get(shift_type, 0)
+        for k, col in enumerate(zs, history + 1):
+            cost[col] = WEIGHT_TYPE_VARIANCE * (2 * k - 1) / type_active[shift_type]
+
+    upper = np.ones(size)
+    rows = _Rows()
+    for j, slot in enumerate(slots):
+        required = max(slot.required_staff, 0)
+        required_mentors = min(max(slot.required_mentors, 0), required)
+        upper[u0 + j] = required
+        upper[m0 + j] = required_mentors
+        on_shift = [(pair_of[(i, j)], 1.0) for i in range(len(members)) if (i, j) in pair_of]
+        # 在岗人数 + 缺人数 = 需求人数
+        rows.add(on_shift + [(u0 + j, 1.0)], required, required)
+        mentors = [(col, val) for col, val in on_shift if not members[pairs[col][0]].is_trainee]
+        rows.add(mentors + [(m0 + j, 1.0)], required_mentors, np.inf)
+
+    for (i, j), col in pair_of.items():
+        member = members[i]
+        if member.is_trainee and member.mentor_id:
+            mentor_col = pair_of[(index.order[index.mentor_of(member).id], j)]
+            rows.add([(col, 1.0), (mentor_col, -1.0)], -np.inf, 0)
+
+    for i, js in by_member.items():
+        # 重叠或休息时间不足的班次两两互斥
+        for a, j in enumerate(js):
+            reach = slots[j].end_time + problem.min_rest
+            for k in js[a + 1:]:
+                if slots[k].start_time >= reach:
+                    break
+                rows.add([(pair_of[(i, j)], 1.0), (pair_of[(i, k)], 1.0)], -np.inf, 1)
+        # 负载 = 负载单位之和
+        rows.add(
+            [(pair_of[(i, j)], 1.0) for j in js] + [(col, -1.0) for col in y_of[i]],
+            0,
+            0,
+        )
+        # 各类型负载 = 类型负载单位之和
+        for shift_type in {slots[j].shift_type for j in js}:
+            rows.add(
+                [(pair_of[(i, j)], 1.0) for j in js if slots[j].shift_type == shift_type]
+                + [(col, -1.0) for col in z_of[(i, shift_type)]],
+                0,
+                0,
+            )
+
+    integrality = np.zeros(size)
+    integrality[:n_x] = 1
+    integrality[y0:] = 1
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None
+    result = milp(
+        cost,
+        constraints=[rows.constraint(size)] if rows.lower else [],
+        integrality=integrality,
+        bounds=Bounds(np.zeros(size), upper),
+        options={"time_limit": remaining, "disp": False},
+    )
+    if result.x is None:
+        return None
+
+    solution = Solution()
+    chosen = np.flatnonzero(result.x[:n_x] > 0.5)
+    for col in chosen.tolist():
+        i, j = pairs[col]
+        solution.assignments.append(PlannedAssignment(user_id=members[i].id, shift_id=slots[j].id, is_primary=True))
+    for j, slot in enumerate(slots):
+        unfilled = int(round(result.x[u0 + j]))
+        if unfilled:
+            solution.unfilled[slot.id] = unfilled
+        unfilled_mentors = int(round(result.x[m0 + j]))
+        if unfilled_mentors:
+            solution.unfilled_mentors[slot.id] = unfilled_mentors
+    return solution
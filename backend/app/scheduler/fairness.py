@@ -0,0 +1,63 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.models.models import FairnessLedger, ScheduleAssignment, Shift
+
+
+@dataclass
+class LedgerEntry:
+    shift_count: int = 0
+    hours: float = 0.0
+
+
+# 用户ID -> 班次类型 -> 累计班次数与工时
+Ledger = Dict[uuid.UUID, Dict[str, LedgerEntry]]
+
+
+def load_ledger(db: Session) -> Ledger:
+    """
+    读取各用户按班次类型累计的班次数与工时
+
+    台账只由 PostgreSQL 的触发器维护：schedule_assignments 与 shifts 上的任何写入
+    （生成、调班、修复、手动排班、版本发布等）都由触发器累加，ORM 的写入路径不更新台账。
+    因此 PostgreSQL 下读取 fairness_ledger，行数只与用户数 × 类型数成正比；
+    其他数据库（如测试与基准使用的 SQLite）没有这些触发器，fairness_ledger 始终为空，
+    此处退化为对全部排班历史聚合，开销与排班总量成正比。
+    结果包含同一事务中尚未提交的写入。
+    """
+    ledger: Ledger = defaultdict(dict)
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.query(
+            FairnessLedger.user_id, FairnessLedger.shift_type, FairnessLedger.shift_count, FairnessLedger.hours
+        ).filter(FairnessLedger.shift_count != 0).all()
+        for row in rows:
+            ledger[row.user_id][row.shift_type] = LedgerEntry(row.shift_count, row.hours)
+        return dict(ledger)
+
+    rows = db.query(
+        ScheduleAssignment.user_id, Shift.shift_type, Shift.start_time, Shift.end_time
+    ).join(Shift).all()
+    for row in rows:
+        entry = ledger[row.user_id].setdefault(row.shift_type, LedgerEntry())
+        entry.shift_count += 1
+        entry.hours += (row.end_time - row.start_time).total_seconds() / 3600
+    return dict(ledger)
+
+
+def type_loads(ledger: Ledger, excluding: Iterable[Tuple[uuid.UUID, str]] = ()) -> Dict[uuid.UUID, Dict[str, int]]:
+    """
+    供求解器使用的各用户各班次类型的班次数
+
+    excluding 为需要扣除的 (用户ID, 班次类型)，如试运行时窗口内即将被替换的现有排班。
+    """
+    loads = {user_id: {shift_type: entry.shift_count for shift_type, entry in types.items()}
+             for user_id, types in ledger.items()}
+    for user_id, shift_type in excluding:
+        counts = loads.get(user_id)
+        if counts and counts.get(shift_type):
+            counts[shift_type] -= 1
+    return loads
@@ -0,0 +1,138 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+import threading
+import time
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import Holiday, Shift
+
+SHIFT_FAMILIES = ("DAY", "NIGHT")
+
+
+class HolidayCalendar:
+    """
+    节假日日历，按日期判断工作日或节假日
+
+    周六、周日默认为休息日，除非被列为调休上班的工作日；
+    法定节假日无论星期几都按节假日处理。
+    """
+
+    def __init__(self, holidays: Iterable[date] = (), workdays: Iterable[date] = ()):
+        self.holidays: Set[date] = set(holidays)
+        self.workdays: Set[date] = set(workdays)
+
+    def is_holiday(self, day: date) -> bool:
+        if day in self.holidays:
+            return True
+        if day in self.workdays:
+            return False
+        return day.weekday() >= 5
+
+    def shift_type(self, family: str, day: date) -> str:
+        """
+        返回班次类别（DAY / NIGHT）在该日的具体班次类型
+        """
+        return f"{family}_{'HOLIDAY' if self.is_holiday(day) else 'WORKDAY'}"
+
+    def merged(self, holidays: Iterable[date] = (), workdays: Iterable[date] = ()) -> "HolidayCalendar":
+        """
+        返回叠加了额外日期的新日历，不修改当前日历
+        """
+        workdays = set(workdays)
+        return HolidayCalendar(
+            (self.holidays - workdays) | set(holidays),
+            (self.workdays | workdays) - set(holidays),
+        )
+
+
+def local_date(moment: datetime) -> date:
+    """
+    班次开始时刻在 SCHEDULER_TIMEZONE 下的日期，无时区信息的时间按UTC处理
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(ZoneInfo(settings.SCHEDULER_TIMEZONE)).date()
+
+
+def local_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    SCHEDULER_TIMEZONE 下某一天的起止时刻（UTC）
+    """
+    tz = ZoneInfo(settings.SCHEDULER_TIMEZONE)
+    start = datetime.combine(day, datetime.min.time(), tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def load_calendar(db: Session) -> HolidayCalendar:
+    rows = db.query(Holiday.date, Holiday.is_workday).all()
+    return HolidayCalendar(
+        holidays=(row.date for row in rows if not row.is_workday),
+        workdays=(row.date for row in rows if row.is_workday),
+    )
+
+
+def reclassify_shifts(db: Session, day: date, calendar: HolidayCalendar) -> int:
+    """
+    按日历重新设置某一天开始的班次的类型，返回更新的行数
+
+    只修改类型中的工作日 / 节假日部分，人数要求保持不变。
+    """
+    start, end = local_day_bounds(day)
+    suffix = "HOLIDAY" if calendar.is_holiday(day) else "WORKDAY"
+    result = db.execute(
+        update(Shift)
+        .where(Shift.start_time >= start, Shift.start_time < end)
+        .values(shift_type=case(
+            *((Shift.shift_type.like(f"{family}\\_%", escape="\\"), f"{family}_{suffix}") for family in SHIFT_FAMILIES),
+            else_=Shift.shift_type,
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+class CalendarCache:
+    """
+    进程内的节假日日历缓存
+
+    启动时加载一次，之后的分类都是内存中的集合查找；管理员修改日历后调用
+    invalidate。多进程部署时其他进程的缓存在 ttl_seconds 后自动重新加载。
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl_seconds = ttl_seconds
+        self._calendar: Optional[HolidayCalendar] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Optional[Session] = None) -> HolidayCalendar:
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            calendar = load_calendar(db)
+        finally:
+            if own_session:
+                db.close()
+        with self._lock:
+            self._calendar = calendar
+            self._loaded_at = time.monotonic()
+        return calendar
+
+    def get(self, db: Optional[Session] = None) -> HolidayCalendar:
+        calendar = self._calendar
+        if calendar is None or time.monotonic() - self._loaded_at > self._ttl_seconds:
+            calendar = self.load(db)
+        return calendar
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._calendar = None
+
+
+holiday_calendar = CalendarCache(ttl_seconds=settings.HOLIDAY_CALENDAR_TTL_SECONDS)
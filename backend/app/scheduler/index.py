@@ -0,0 +1,51 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+import uuid
+
+from app.scheduler.problem import StaffMember
+
+
+class StaffIndex:
+    """
+    人员内存索引，在排班开始前一次性构建
+
+    包含 用户ID -> 人员、角色分桶以及 师傅 -> 新人 邻接表，
+    求解过程中的资格判断和师徒配对都只查询该索引，不再访问数据库。
+    """
+
+    def __init__(self, staff: Iterable[StaffMember]):
+        self.members: List[StaffMember] = list(staff)
+        self.by_id: Dict[uuid.UUID, StaffMember] = {}
+        self.by_role: Dict[str, List[StaffMember]] = defaultdict(list)
+        self.trainees: Dict[uuid.UUID, List[StaffMember]] = defaultdict(list)
+        # 稳定的次序用于负载相同时打破平局
+        self.order: Dict[uuid.UUID, int] = {}
+
+        for i, member in enumerate(self.members):
+            self.by_id[member.id] = member
+            self.by_role[member.role].append(member)
+            self.order[member.id] = i
+
+        for member in self.members:
+            if member.is_trainee and member.mentor_id in self.by_id:
+                self.trainees[member.mentor_id].append(member)
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def get(self, user_id: uuid.UUID) -> Optional[StaffMember]:
+        return self.by_id.get(user_id)
+
+    def mentor_of(self, member: StaffMember) -> Optional[StaffMember]:
+        """
+        返回新人的师傅；师傅不在索引中（如已停用）或本身是新人时返回None
+        """
+        if not member.is_trainee or member.mentor_id is None:
+            return None
+        mentor = self.by_id.get(member.mentor_id)
+        if mentor is None or mentor.is_trainee:
+            return None
+        return mentor
+
+    def trainees_of(self, mentor_id: uuid.UUID) -> List[StaffMember]:
+        return self.trainees.get(mentor_id, [])
@@ -0,0 +1,81 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import uuid
+
+
+class IntervalIndex:
+    """
+    单个用户已排班次的区间索引，按开始时间有序
+
+    已有区间可能互相重叠（只有 PostgreSQL 的排他约束保证不重叠），结束时间不一定
+    随开始时间单调递增，因此同时维护结束时间的前缀最大值：一次二分查找加一次
+    前缀查询即可判断冲突。增删时只重算插入点之后的前缀，按时间顺序追加时开销为常数。
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[datetime, datetime]] = ()):
+        self.intervals: List[Tuple[datetime, datetime]] = sorted(intervals)
+        # max_end[k] 为 intervals[:k + 1] 中最晚的结束时间
+        self.max_end: List[datetime] = []
+        self._rebuild(0)
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def _rebuild(self, i: int) -> None:
+        del self.max_end[i:]
+        latest = self.max_end[i - 1] if i else None
+        for _, end in self.intervals[i:]:
+            if latest is None or end > latest:
+                latest = end
+            self.max_end.append(latest)
+
+    def add(self, start: datetime, end: datetime) -> None:
+        i = bisect_right(self.intervals, (start, end))
+        self.intervals.insert(i, (start, end))
+        self._rebuild(i)
+
+    def remove(self, start: datetime, end: datetime) -> None:
+        i = bisect_left(self.intervals, (start, end))
+        if i < len(self.intervals) and self.intervals[i] == (start, end):
+            del self.intervals[i]
+            self._rebuild(i)
+
+    def conflicts(self, start: datetime, end: datetime, min_rest: timedelta = timedelta(0)) -> bool:
+        """
+        [start, end) 是否与已有区间重叠，或与前后班次的间隔小于 min_rest
+        """
+        # 第一个开始时间不早于 end + min_rest 的区间及其之后的区间都不冲突
+        i = bisect_left(self.intervals, (end + min_rest,))
+        if i == 0:
+            return False
+        # 之前的区间中只要结束最晚的一个不冲突，其余都不冲突
+        return self.max_end[i - 1] + min_rest > start
+
+
+class UserIntervals:
+    """
+    所有用户的区间索引
+    """
+
+    def __init__(self, min_rest: timedelta = timedelta(0)):
+        self.min_rest = min_rest
+        self.by_user: Dict[uuid.UUID, IntervalIndex] = defaultdict(IntervalIndex)
+
+    def load(self, busy: Dict[uuid.UUID, List[Tuple[datetime, datetime]]]) -> None:
+        for user_id, intervals in busy.items():
+            for start, end in intervals:
+                self.by_user[user_id].add(start, end)
+
+    def can_assign(self, user_id: uuid.UUID, start: datetime, end: datetime) -> bool:
+        index = self.by_user.get(user_id)
+        return index is None or not index.conflicts(start, end, self.min_rest)
+
+    def add(self, user_id: uuid.UUID, start: datetime, end: datetime) -> None:
+        self.by_user[user_id].add(start, end)
+
+    def remove(self, user_id: uuid.UUID, start: datetime, end: datetime) -> None:
+        index = self.by_user.get(user_id)
+        if index is not None:
+            index.remove(start, end)
@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+
+
+class JobCancelled(Exception):
+    """
+    任务在执行过程中被取消
+    """
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    status: str = "pending"  # pending / running / succeeded / failed / cancelled
+    phase: str = "queued"
+    progress: float = 0.0
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+    result: Any = None
+    # 局部搜索过程中目标函数的改进记录：{"elapsed": 秒, "objective": 值}
+    improvements: List[Dict[str, float]] = field(default_factory=list)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _phase_started: float = field(default=0.0, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def report(self, phase: str, percent: float) -> None:
+        """
+        进度回调；在阶段切换时记录上一阶段耗时，并在此处响应取消
+        """
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        self._enter(phase)
+        self.progress = round(min(max(percent, 0.0), 100.0), 1)
+
+    def improve(self, elapsed: float, objective: float) -> None:
+        """
+        记录一次目标函数改进，同样在此处响应取消
+        """
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        self.improvements.append({"elapsed": round(elapsed, 3), "objective": objective})
+
+    def _enter(self, phase: str) -> None:
+        now = time.perf_counter()
+        if phase != self.phase:
+            if self.phase not in ("queued", "starting"):
+                self.timings[self.phase] = now - self._phase_started
+            self.phase = phase
+            self._phase_started = now
+
+
+class JobManager:
+    """
+    进程内的后台任务池
+
+    任务在线程池中执行，与发起请求的连接无关，客户端断开后仍会继续运行；
+    已结束的任务保留 SCHEDULER_JOB_TTL_SECONDS 秒供查询。
+    """
+
+    def __init__(self, max_workers: int, ttl_seconds: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schedule-job")
+        self._ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], **params: Any) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        if job.status == "pending":
+            # 尚未开始执行的任务直接标记为已取消
+            job.status = "cancelled"
+            job.phase = "cancelled"
+            job.finished_at = datetime.now(timezone.utc)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        if job.cancel_event.is_set():
+            return
+        job.status = "running"
+        job.phase = "starting"
+        job.started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        try:
+            job.result = fn(job)
+            job._enter("done")
+            job.progress = 100.0
+            job.status = "succeeded"
+        except JobCancelled:
+            job.status = "cancelled"
+            job.phase = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+        finally:
+            job.timings["total"] = time.perf_counter() - started
+            job.finished_at = datetime.now(timezone.utc)
+
+    def _prune(self) -> None:
+        now = datetime.now(timezone.utc)
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and (now - job.finished_at).total_seconds() > self._ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(
+    max_workers=settings.SCHEDULER_JOB_WORKERS,
+    ttl_seconds=settings.SCHEDULER_JOB_TTL_SECONDS,
+)
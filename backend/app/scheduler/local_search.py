@@ -0,0 +1,252 @@
+from typing import Callable, List, Optional
+import random
+import time
+
+import numpy as np
+
+from app.scheduler.index import StaffIndex
+from app.scheduler.intervals import UserIntervals
+from app.scheduler.matrix import ScheduleMatrices, ScheduleScore
+from app.scheduler.problem import PlannedAssignment, ScheduleProblem, Solution
+
+# 发现更优解时的回调：(已用秒数, 目标函数值)
+ImproveCallback = Callable[[float, float], None]
+
+# 两次汇报之间的最短间隔（秒），避免回调过于频繁
+REPORT_INTERVAL = 0.1
+
+
+class LocalSearch:
+    """
+    随时可中断的局部搜索
+
+    从一个可行解（通常是贪心解）出发，先为缺人的班次补人，再反复把岗位调给
+    能使总负载与各班次类型负载更均衡的可行人员。每一步都保持硬约束（资格、人数上限、
+    师徒同班、师傅人数、重叠与休息时间），因此任意时刻持有的都是可行的
+    当前最优解，到达截止时间即可返回。
+    """
+
+    def __init__(
+        self,
+        problem: ScheduleProblem,
+        solution: Solution,
+        index: Optional[StaffIndex] = None,
+        seed: int = 0,
+    ):
+        self.matrices = ScheduleMatrices(problem, index)
+        self.index = self.matrices.index
+        self.members = self.index.members
+        self.slots = self.matrices.slots
+        self.x = self.matrices.encode(solution.assignments)
+        self.load = self.x.sum(axis=1) + self.matrices.base_load
+        self.type_load = self.matrices.type_loads(self.x)
+        self.rng = random.Random(seed)
+
+        self.intervals = UserIntervals(problem.min_rest)
+        self.intervals.load(problem.busy)
+        rows, cols = np.nonzero(self.x)
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            slot = self.slots[j]
+            self.intervals.add(self.members[i].id, slot.start_time, slot.end_time)
+
+        # 每个班次的候选人员下标
+        self.pools: List[np.ndarray] = [
+            np.flatnonzero(self.matrices.eligible[:, j]) for j in range(len(self.slots))
+        ]
+        self.score = self.matrices.evaluate(self.x)
+
+    @classmethod
+    def from_hint(cls, problem: ScheduleProblem, index: Optional[StaffIndex] = None, seed: int = 0) -> "LocalSearch":
+        """
+        以 problem.hint 中可行的部分作为初始解（热启动），剩余名额在 run 中补齐
+        """
+        search = cls(problem, Solution(), index, seed)
+        search._seed(problem.hint)
+        search.score = search.matrices.evaluate(search.x)
+        return search
+
+    def _seed(self, hint: List[PlannedAssignment]) -> None:
+        """
+        按资格、人数上限、重叠与休息时间筛选提示中的排班；先放非新人，使新人的师傅已在班上
+        """
+        coverage = self.x.sum(axis=0)
+        placed = []
+        for item in hint:
+            i = self.index.order.get(item.user_id)
+            j = self.matrices.shift_pos.get(item.shift_id)
+            if i is not None and j is not None and self.matrices.eligible[i, j]:
+                placed.append((i, j))
+        placed.sort(key=lambda pair: (not self.matrices.is_mentor[pair[0]], self.slots[pair[1]].start_time))
+        for i, j in placed:
+            if self.x[i, j] or coverage[j] >= self.matrices.required[j]:
+                continue
+            if self._can_take(i, j):
+                self._place(i, j)
+                coverage[j] += 1
+
+    @property
+    def objective(self) -> float:
+        return self.score.objective
+
+    def _mentor_present(self, trainee: int, j: int, excluding: int = -1) -> bool:
+        mentor = self.index.mentor_of(self.members[trainee])
+        if mentor is None:
+            return False
+        position = self.index.order[mentor.id]
+        return position != excluding and bool(self.x[position, j])
+
+    def _can_take(self, k: int, j: int, replacing: int = -1) -> bool:
+        """
+        人员 k 能否进入班次 j（可选地顶替 replacing）
+        """
+        member = self.members[k]
+        slot = self.slots[j]
+        if member.is_trainee and member.mentor_id and not self._mentor_present(k, j, replacing):
+            return False
+        return self.intervals.can_assign(member.id, slot.start_time, slot.end_time)
+
+    def _place(self, k: int, j: int) -> None:
+        slot = self.slots[j]
+        self.x[k, j] = True
+        self.load[k] += 1
+        self.type_load[k, self.matrices.slot_type[j]] += 1
+        self.intervals.add(self.members[k].id, slot.start_time, slot.end_time)
+
+    def _unplace(self, i: int, j: int) -> None:
+        slot = self.slots[j]
+        self.x[i, j] = False
+        self.load[i] -= 1
+        self.type_load[i, self.matrices.slot_type[j]] -= 1
+        self.intervals.remove(self.members[i].id, slot.start_time, slot.end_time)
+
+    def _try_add(self, j: int) -> bool:
+        """
+        为缺人的班次 j 补一个人，缺师傅时只补非新人
+        """
+        column = self.x[:, j]
+        need_mentor = int(column[self.matrices.is_mentor].sum()) < self.matrices.required_mentors[j]
+        pool = self.pools[j][~column[self.pools[j]]]
+        for k in pool[np.argsort(self.load[pool], kind="stable")].tolist():
+            if need_mentor and not self.matrices.is_mentor[k]:
+                continue
+            if self._can_take(k, j):
+                self._place(k, j)
+                return True
+        return False
+
+    def _try_replace(self, i: int, j: int) -> bool:
+        """
+        把人员 i 在班次 j 的岗位调给可行人员，仅在负载方差与类型方差之和严格下降时执行，
+        优先调给下降最多的人
+        """
+        member = self.members[i]
+        column = self.x[:, j]
+        if not member.is_trainee:
+            # 班上有以 i 为师傅的新人时不能调走
+            for trainee in self.index.trainees_of(member.id):
+                if column[self.index.order[trainee.id]]:
+                    return False
+        mentors_on = int(column[self.matrices.is_mentor].sum())
+        keeps_mentors = member.is_trainee or mentors_on - 1 >= self.matrices.required_mentors[j]
+
+        pool = self.pools[j]
+        pool = pool[~column[pool]]
+        delta = self.matrices.move_delta(self.load, self.type_load, j, i, pool)
+        improving = delta < -1e-12
+        pool, delta = pool[improving], delta[improving]
+        for k in pool[np.argsort(delta, kind="stable")].tolist():
+            if not keeps_mentors and not self.matrices.is_mentor[k]:
+                continue
+            if self._can_take(k, j, replacing=i):
+                self._unplace(i, j)
+                self._place(k, j)
+                return True
+        return False
+
+    def _fill_shortfall(self, deadline: float) -> None:
+        coverage = self.x.sum(axis=0)
+        mentor_coverage = self.x[self.matrices.is_mentor].sum(axis=0)
+        short = (coverage < self.matrices.required) | (mentor_coverage < self.matrices.required_mentors)
+        for j in np.flatnonzero(short).tolist():
+            if time.monotonic() >= deadline:
+                return
+            while self.x[:, j].sum() < self.matrices.required[j] and self._try_add(j):
+                pass
+
+    def run(
+        self,
+        deadline: float,
+        on_improve: Optional[ImproveCallback] = None,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> ScheduleScore:
+        """
+        搜索到 deadline（time.monotonic() 时刻）或局部最优为止，返回最终得分
+        """
+        started = time.monotonic()
+        budget = max(deadline - started, 1e-9)
+        last_report = started
+        if on_improve:
+            on_improve(0.0, self.objective)
+
+        def report(force: bool = False) -> None:
+            nonlocal last_report
+            now = time.monotonic()
+            if not force and now - last_report < REPORT_INTERVAL:
+                return
+            last_report = now
+            score = self.matrices.evaluate(self.x)
+            if score.objective < self.score.objective:
+                self.score = score
+                if on_improve:
+                    on_improve(now - started, score.objective)
+            if progress:
+                progress(min((now - started) / budget, 1.0))
+
+        self._fill_shortfall(deadline)
+        report(force=True)
+
+        active = np.flatnonzero(self.matrices.active_rows)
+        while active.size and time.monotonic() < deadline:
+            improved = False
+            # 负载高的人员先尝试；负载已均衡的人员仍可能通过调换改善班次类型的分布
+            for i in active[np.argsort(-self.load[active], kind="stable")].tolist():
+                if time.monotonic() >= deadline:
+                    break
+                shifts = np.flatnonzero(self.x[i]).tolist()
+                self.rng.shuffle(shifts)
+                for j in shifts:
+                    if self._try_replace(i, j):
+                        improved = True
+                        break
+                report()
+            if not improved:
+                break
+
+        report(force=True)
+        return self.score
+
+    def solution(self) -> Solution:
+        coverage = self.x.sum(axis=0)
+        mentor_coverage = self.x[self.matrices.is_mentor].sum(axis=0)
+        result = Solution(assignments=self.matrices.decode(self.x))
+        for j, slot in enumerate(self.slots):
+            if coverage[j] < self.matrices.required[j]:
+                result.unfilled[slot.id] = int(self.matrices.required[j] - coverage[j])
+            if mentor_coverage[j] < self.matrices.required_mentors[j]:
+                result.unfilled_mentors[slot.id] = int(self.matrices.required_mentors[j] - mentor_coverage[j])
+        return result
+
+
+def improve(
+    problem: ScheduleProblem,
+    solution: Solution,
+    deadline: float,
+    on_improve: Optional[ImproveCallback] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Solution:
+    """
+    在截止时间前改进给定的可行解，返回当前最优解
+    """
+    search = LocalSearch(problem, solution)
+    search.run(deadline, on_improve=on_improve, progress=progress)
+    return search.solution()
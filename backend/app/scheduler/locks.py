@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+# 排班锁在 pg_advisory_xact_lock(int, int) 中使用的命名空间，第二个参数为日期序号
+SCHEDULE_LOCK_NAMESPACE = 0x5343
+
+# PostgreSQL 等待锁超时的错误码 lock_not_available
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class RangeLockTimeout(Exception):
+    """
+    等待日期范围锁超时，说明有重叠范围的排班生成正在进行
+    """
+
+    def __init__(self, detail: str = "Another schedule generation is in progress for an overlapping date range"):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class _InProcessRangeLocks:
+    """
+    进程内的日期范围锁，用于不支持咨询锁的数据库（如 SQLite）
+
+    与 PostgreSQL 下逐日加锁等价：两个闭区间有公共日期时互斥。
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._held: List[Tuple[date, date]] = []
+
+    def _overlaps(self, first: date, last: date) -> bool:
+        return any(start <= last and first <= end for start, end in self._held)
+
+    def acquire(self, first: date, last: date, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._overlaps(first, last):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._held.append((first, last))
+            return True
+
+    def release(self, first: date, last: date) -> None:
+        with self._condition:
+            self._held.remove((first, last))
+            self._condition.notify_all()
+
+
+_local_locks = _InProcessRangeLocks()
+
+
+def _lock_days(start_date: date, end_date: date) -> Tuple[date, date]:
+    """
+    需要加锁的日期范围：生成会读取窗口外 min_rest 以内的已有排班，因此向两侧各扩展
+    """
+    margin = timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS)
+    return start_date - timedelta(days=margin.days + 1), end_date + timedelta(days=margin.days + 1)
+
+
+def _advisory_lock(db: Session, first: date, last: date, timeout: float) -> None:
+    """
+    在当前事务中按日期升序逐日获取咨询锁，事务结束时自动释放
+
+    所有调用方都按相同顺序加锁，重叠范围之间不会死锁；
+    lock_timeout 只在加锁期间生效，随后恢复为会话原值。
+    """
+    previous = db.execute(text("SELECT current_setting('lock_timeout')")).scalar()
+    db.execute(
+        text("SELECT set_config('lock_timeout', :timeout, true)"),
+        {"timeout": f"{int(timeout * 1000)}ms"},
+    )
+    try:
+        db.execute(
+            text(
+                "SELECT pg_advisory_xact_lock(:namespace, day) "
+                "FROM generate_series(CAST(:first AS integer), CAST(:last AS integer)) AS day "
+                "ORDER BY day"
+            ),
+            {"namespace": SCHEDULE_LOCK_NAMESPACE, "first": first.toordinal(), "last": last.toordinal()},
+        )
+    except OperationalError as exc:
+        if getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+            raise RangeLockTimeout() from exc
+        raise
+    db.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": previous})
+
+
+@contextmanager
+def schedule_range_lock(db: Session, start_date: date, end_date: date) -> Iterator[None]:
+    """
+    对日期范围加排他锁，使重叠范围的排班生成串行执行
+
+    PostgreSQL 下使用事务级咨询锁，跨进程生效，随事务提交或回滚释放；
+    其他数据库退化为进程内锁，在离开上下文时释放。调用方应在上下文内提交事务。
+    等待超过 SCHEDULER_LOCK_TIMEOUT_SECONDS 时抛出 RangeLockTimeout。
+    """
+    first, last = _lock_days(start_date, end_date)
+    timeout = settings.SCHEDULER_LOCK_TIMEOUT_SECONDS
+    if db.get_bind().dialect.name == "postgresql":
+        _advisory_lock(db, first, last, timeout)
+        yield
+        return
+
+    if not _local_locks.acquire(first, last, timeout):
+        raise RangeLockTimeout()
+    try:
+        yield
+    finally:
+        _local_locks.release(first, last)
@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+import uuid
+
+import numpy as np
+
+from app.scheduler.engine import ELIGIBLE_ROLES
+from app.scheduler.index import StaffIndex
+from app.scheduler.problem import PlannedAssignment, ScheduleProblem
+
+# 目标函数各项的权重：硬约束违反 > 缺人 > 缺师傅 > 负载不均 > 各班次类型的累计负载不均
+WEIGHT_VIOLATION = 10000.0
+WEIGHT_SHORTFALL = 1000.0
+WEIGHT_MENTOR_SHORTFALL = 100.0
+WEIGHT_LOAD_VARIANCE = 1.0
+WEIGHT_TYPE_VARIANCE = 0.5
+
+
+@dataclass
+class ScheduleScore:
+    shortfall: int
+    mentor_shortfall: int
+    overstaffed: int
+    ineligible: int
+    unpaired_trainees: int
+    load_variance: float
+    # 各班次类型（含历史累计）负载方差之和，使夜班、节假日班跨周期均摊
+    type_variance: float = 0.0
+
+    @property
+    def violations(self) -> int:
+        return self.ineligible + self.unpaired_trainees + self.overstaffed
+
+    @property
+    def objective(self) -> float:
+        """
+        越小越好
+        """
+        return (
+            WEIGHT_VIOLATION * self.violations
+            + WEIGHT_SHORTFALL * self.shortfall
+            + WEIGHT_MENTOR_SHORTFALL * self.mentor_shortfall
+            + WEIGHT_LOAD_VARIANCE * self.load_variance
+            + WEIGHT_TYPE_VARIANCE * self.type_variance
+        )
+
+
+class ScheduleMatrices:
+    """
+    排班问题的矩阵表示
+
+    eligible 为 人员 × 班次 的布尔资格矩阵，一个排班方案编码为同形状的布尔矩阵 X；
+    覆盖率、师傅人数、新人配对和人均负载都以数组运算得出，单步调动的目标变化
+    可在常数时间内计算。
+    """
+
+    def __init__(self, problem: ScheduleProblem, index: Optional[StaffIndex] = None):
+        self.index = index or StaffIndex(problem.staff)
+        self.slots = sorted(problem.shifts, key=lambda s: (s.start_time, s.shift_type))
+        self.shift_pos: Dict[uuid.UUID, int] = {slot.id: j for j, slot in enumerate(self.slots)}
+        members = self.index.members
+
+        roles = np.array([member.role for member in members], dtype=object)
+        families = np.array([slot.family for slot in self.slots], dtype=object)
+        self.eligible = np.zeros((len(members), len(self.slots)), dtype=bool)
+        for family, allowed in ELIGIBLE_ROLES.items():
+            self.eligible[np.ix_(np.isin(roles, allowed), families == family)] = True
+        # 请假时段内的班次视为不可排
+        if problem.availability:
+            self.eligible &= problem.availability.available(
+                [member.id for member in members],
+                [(slot.start_time, slot.end_time) for slot in self.slots],
+            )
+
+        self.required = np.array([max(slot.required_staff, 0) for slot in self.slots], dtype=np.int64)
+        self.required_mentors = np.minimum(
+            np.array([max(slot.required_mentors, 0) for slot in self.slots], dtype=np.int64),
+            self.required,
+        )
+        self.is_mentor = np.array([not member.is_trainee for member in members], dtype=bool)
+        # 问题范围之前已累计的负载，计入负载均衡
+        self.base_load = np.array([problem.prior_load.get(member.id, 0) for member in members], dtype=np.int64)
+
+        # 需要师傅陪同的新人及其师傅的下标；师傅缺失时为 -1
+        trainees, mentors = [], []
+        for i, member in enumerate(members):
+            if member.is_trainee and member.mentor_id:
+                mentor = self.index.mentor_of(member)
+                trainees.append(i)
+                mentors.append(self.index.order[mentor.id] if mentor else -1)
+        self.trainee_rows = np.array(trainees, dtype=np.int64)
+        self.mentor_rows = np.array(mentors, dtype=np.int64)
+        # 参与负载均衡的人员：至少能排一个班次
+        self.active_rows = self.eligible.any(axis=1)
+        self.active_count = int(self.active_rows.sum()) or 1
+
+        # 班次类型：每个班次的类型下标、人员 × 类型 的历史累计班次数（来自公平性台账），
+        # 以及各类型参与均衡的人员（能排该类型的至少一个班次）
+        self.types = sorted({slot.shift_type for slot in self.slots})
+        type_pos = {shift_type: k for k, shift_type in enumerate(self.types)}
+        self.slot_type = np.array([type_pos[slot.shift_type] for slot in self.slots], dtype=np.int64)
+        self.type_onehot = np.eye(len(self.types), dtype=np.int64)[self.slot_type]
+        self.base_type_load = np.zeros((len(members), len(self.types)), dtype=np.int64)
+        for i, member in enumerate(members):
+            for shift_type, count in problem.type_load.get(member.id, {}).items():
+                if shift_type in type_pos:
+                    self.base_type_load[i, type_pos[shift_type]] = count
+        self.type_rows = (self.eligible.astype(np.int64) @ self.type_onehot) > 0
+        self.type_active_count = np.maximum(self.type_rows.sum(axis=0), 1)
+
+    @property
+    def shape(self):
+        return self.eligible.shape
+
+    def encode(self, assignments: Iterable[PlannedAssignment]) -> np.ndarray:
+        x = np.zeros(self.shape, dtype=bool)
+        for item in assignments:
+            i = self.index.order.get(item.user_id)
+            j = self.shift_pos.get(item.shift_id)
+            if i is not None and j is not None:
+                x[i, j] = True
+        return x
+
+    def type_loads(self, x: np.ndarray) -> np.ndarray:
+        """
+        人员 × 类型 的累计班次数（历史 + 方案 x）
+        """
+        return x.astype(np.int64) @ self.type_onehot + self.base_type_load
+
+    def decode(self, x: np.ndarray) -> list:
+        members = self.index.members
+        rows, cols = np.nonzero(x)
+        order = np.lexsort((rows, cols))
+        return [
+            PlannedAssignment(user_id=members[i].id, shift_id=self.slots[j].id, is_primary=True)
+            for i, j in zip(rows[order].tolist(), cols[order].tolist())
+        ]
+
+    def evaluate(self, x: np.ndarray) -> ScheduleScore:
+        coverage = x.sum(axis=0)
+        mentor_coverage = x[self.is_mentor].sum(axis=0)
+        load = x.sum(axis=1) + self.base_load
+
+        unpaired = 0
+        if len(self.trainee_rows):
+            trainee_x = x[self.trainee_rows]
+            mentor_x = np.zeros_like(trainee_x)
+            has_mentor = self.mentor_rows >= 0
+            mentor_x[has_mentor] = x[self.mentor_rows[has_mentor]]
+            unpaired = int((trainee_x & ~mentor_x).sum())
+
+        active_load = load[self.active_rows]
+        type_load = self.type_loads(x)
+        type_variance = sum(
+            float(type_load[self.type_rows[:, k], k].var())
+            for k in range(len(self.types))
+            if self.type_rows[:, k].any()
+        )
+        return ScheduleScore(
+            shortfall=int(np.maximum(self.required - coverage, 0).sum()),
+            mentor_shortfall=int(np.maximum(self.required_mentors - mentor_coverage, 0).sum()),
+            overstaffed=int(np.maximum(coverage - self.required, 0).sum()),
+            ineligible=int((x & ~self.eligible).sum()),
+            unpaired_trainees=unpaired,
+            load_variance=float(active_load.var()) if active_load.size else 0.0,
+            type_variance=type_variance,
+        )
+
+    def move_delta(self, load: np.ndarray, type_load: np.ndarray, j: int, source: int, target) -> np.ndarray:
+        """
+        把班次 j 的一个岗位从 source 调给 target（可为下标数组）时负载方差项与类型方差项的变化量
+        （不含可行性判断）
+        """
+        # 总负载不变，方差的变化即平方和的变化除以人数：
+        # (l_s - 1)^2 + (l_t + 1)^2 - l_s^2 - l_t^2 = 2 (l_t - l_s + 1)；班次类型的负载同理
+        k = self.slot_type[j]
+        load_part = 2.0 * (load[target] - load[source] + 1.0) / self.active_count
+        type_part = 2.0 * (type_load[target, k] - type_load[source, k] + 1.0) / self.type_active_count[k]
+        return WEIGHT_LOAD_VARIANCE * load_part + WEIGHT_TYPE_VARIANCE * type_part
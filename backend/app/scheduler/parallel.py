@@ -0,0 +1,153 @@
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import multiprocessing
+import threading
+
+from app.core.config import settings
+from app.scheduler.engine import ELIGIBLE_ROLES, solve
+from app.scheduler.problem import PlannedAssignment, ScheduleProblem, ShiftSlot, Solution
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # 使用spawn，避免在多线程的服务进程中fork
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.SCHEDULER_SOLVER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _rotation_blocks(slots: List[ShiftSlot], rotation_days: int) -> List[Tuple[datetime, datetime]]:
+    """
+    把全部班次按开始时间切成 rotation_days 天的轮换周期，返回各周期内班次的 (最早开始, 最晚结束)
+    """
+    if not slots:
+        return []
+    origin = min(slot.start_time for slot in slots)
+    spans: Dict[int, Tuple[datetime, datetime]] = {}
+    for slot in slots:
+        block = (slot.start_time - origin).days // rotation_days
+        start, end = spans.get(block, (slot.start_time, slot.end_time))
+        spans[block] = (min(start, slot.start_time), max(end, slot.end_time))
+    return [spans[block] for block in sorted(spans)]
+
+
+def partition_problem(problem: ScheduleProblem, rotation_days: int) -> List[ScheduleProblem]:
+    """
+    按班次类别把排班问题拆成可以独立求解的子问题，每个类别内仍按时间顺序整体求解，
+    负载在整个周期内连续累计
+
+    白班、夜班人员互不相交；管理员可排任何类别，出现在每个类别的子问题中，并按 rotation_days
+    天的周期在各类别间轮换：轮到其他类别的周期在该子问题中记为忙碌时段，因此各子问题的结果
+    合并后不会重叠或休息不足。管理员在每个类别只承担约 1/类别数 的负载，其余部分以 prior_load
+    预先计入，使合并后的总负载与其他人员相当。
+    """
+    slots_by_family: Dict[str, List[ShiftSlot]] = defaultdict(list)
+    for slot in problem.shifts:
+        slots_by_family[slot.family].append(slot)
+    families = sorted(slots_by_family)
+    if not families:
+        return []
+
+    admins = [member for member in problem.staff if member.role == "admin"]
+    admin_families = [family for family in families if "admin" in ELIGIBLE_ROLES.get(family, ())]
+    blocks = _rotation_blocks(problem.shifts, rotation_days)
+    eligible = [
+        member for member in problem.staff
+        if any(member.role in ELIGIBLE_ROLES.get(family, ()) for family in families)
+    ]
+    seats = sum(max(slot.required_staff, 0) for slot in problem.shifts)
+    # 其他类别预计分给每个管理员的名额
+    expected_elsewhere = (
+        seats / len(eligible) * (len(admin_families) - 1) / len(admin_families) if eligible and admin_families else 0
+    )
+
+    parts: List[ScheduleProblem] = []
+    for family in families:
+        pool = [
+            member for member in problem.staff
+            if member.role != "admin" and member.role in ELIGIBLE_ROLES.get(family, ())
+        ]
+        busy = {member.id: problem.busy[member.id] for member in pool if member.id in problem.busy}
+        prior_load = {member.id: problem.prior_load[member.id] for member in pool if member.id in problem.prior_load}
+        if family in admin_families:
+            f = admin_families.index(family)
+            for i, admin in enumerate(admins):
+                busy[admin.id] = list(problem.busy.get(admin.id, ())) + [
+                    span for b, span in enumerate(blocks) if (i + b) % len(admin_families) != f
+                ]
+                prior_load[admin.id] = problem.prior_load.get(admin.id, 0) + round(expected_elsewhere)
+            pool = pool + admins
+        members = {member.id for member in pool}
+        parts.append(ScheduleProblem(
+            shifts=slots_by_family[family],
+            staff=pool,
+            min_rest=problem.min_rest,
+            busy=busy,
+            prior_load=prior_load,
+            last_worked={k: v for k, v in problem.last_worked.items() if k in members},
+            type_load={k: v for k, v in problem.type_load.items() if k in members},
+            availability=problem.availability,
+        ))
+    return parts
+
+
+# 子进程返回的紧凑结果：(人员下标, 班次下标, is_primary) 列表，以及按班次下标的缺额
+_EncodedSolution = Tuple[List[Tuple[int, int, bool]], Dict[int, int], Dict[int, int]]
+
+
+def _solve_encoded(part: ScheduleProblem) -> _EncodedSolution:
+    """
+    在子进程中求解，结果以下标而不是 UUID 返回；反序列化大量 UUID 的开销与求解本身相当
+    """
+    solution = solve(part)
+    members = {member.id: i for i, member in enumerate(part.staff)}
+    slots = {slot.id: i for i, slot in enumerate(part.shifts)}
+    return (
+        [(members[item.user_id], slots[item.shift_id], item.is_primary) for item in solution.assignments],
+        {slots[shift_id]: count for shift_id, count in solution.unfilled.items()},
+        {slots[shift_id]: count for shift_id, count in solution.unfilled_mentors.items()},
+    )
+
+
+def solve_parallel(problem: ScheduleProblem, progress: Optional[Callable[[float], None]] = None) -> Solution:
+    """
+    在进程池中并行求解各子问题并合并结果
+
+    问题规模较小或只能拆出一个子问题时直接顺序求解，避免进程间传输的开销。
+    """
+    seats = sum(max(slot.required_staff, 0) for slot in problem.shifts)
+    if settings.SCHEDULER_SOLVER_PROCESSES <= 1 or seats < settings.SCHEDULER_PARALLEL_MIN_SEATS:
+        return solve(problem, progress)
+    parts = partition_problem(problem, settings.SCHEDULER_ADMIN_ROTATION_DAYS)
+    if len(parts) <= 1:
+        return solve(problem, progress)
+
+    executor = _get_executor()
+    futures: Dict[Future, ScheduleProblem] = {executor.submit(_solve_encoded, part): part for part in parts}
+    merged = Solution()
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            part = futures[future]
+            assignments, unfilled, unfilled_mentors = future.result()
+            merged.assignments.extend(
+                PlannedAssignment(user_id=part.staff[user].id, shift_id=part.shifts[shift].id, is_primary=is_primary)
+                for user, shift, is_primary in assignments
+            )
+            merged.unfilled.update((part.shifts[shift].id, count) for shift, count in unfilled.items())
+            merged.unfilled_mentors.update((part.shifts[shift].id, count) for shift, count in unfilled_mentors.items())
+            if progress:
+                progress(done / len(futures))
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return merged
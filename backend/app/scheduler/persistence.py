@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import List
+import uuid
+
+from sqlalchemy import and_, delete, insert, literal_column, select, text
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import ScheduleAssignment, Shift
+from app.scheduler.problem import PlannedAssignment
+
+# PostgreSQL 上禁止同一用户排班区间重叠的排他约束，见迁移 3f9a1c7e5b21
+OVERLAP_CONSTRAINT = "schedule_assignments_no_overlap"
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    """
+    判断完整性错误是否由排班重叠的排他约束引起
+    """
+    diag = getattr(exc.orig, "diag", None)
+    constraint = getattr(diag, "constraint_name", None)
+    if constraint is not None:
+        return constraint == OVERLAP_CONSTRAINT
+    return OVERLAP_CONSTRAINT in str(exc.orig)
+
+
+def defer_overlap_check(db: Session) -> None:
+    """
+    把排他约束的检查推迟到事务提交时
+
+    用于先产生临时重叠、随后在同一事务内消除的写入，如交换两人的班次、
+    修改班次时间后再做增量修复。
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SET CONSTRAINTS {OVERLAP_CONSTRAINT} DEFERRED"))
+
+
+def on_duty_filter(db: Session, at: datetime):
+    """
+    时间点 at 在岗的排班筛选条件
+
+    PostgreSQL 下使用冗余的 shift_period 区间列，可走GiST索引；
+    其他方言退化为按班次起止时间比较，调用方需 join Shift。
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return literal_column("schedule_assignments.shift_period").op("@>")(at)
+    return and_(Shift.start_time <= at, Shift.end_time > at)
+
+
+def bulk_insert_assignments(db: Session, planned: List[PlannedAssignment], returning: bool = True) -> List[Row]:
+    """
+    以一条批量INSERT ... RETURNING 写入排班分配，返回插入的行
+
+    由驱动的 executemany / insertmanyvalues 合并为少量语句，
+    返回的行已包含服务端生成的时间戳，无需再逐条 refresh。
+    returning=False 时不取回插入的行，返回空列表；用于随后再从数据库分批读出结果的调用方。
+    """
+    if not planned:
+        return []
+
+    table = ScheduleAssignment.__table__
+    params = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": item.user_id,
+            "shift_id": item.shift_id,
+            "is_primary": item.is_primary,
+        }
+        for item in planned
+    ]
+    if not returning:
+        db.execute(insert(table), params)
+        return []
+    stmt = insert(table).returning(
+        table.c.id,
+        table.c.user_id,
+        table.c.shift_id,
+        table.c.is_primary,
+        table.c.created_at,
+        table.c.updated_at,
+    )
+    return db.execute(stmt, params).all()
+
+
+def clear_assignments(db: Session, start_time: datetime, end_time: datetime) -> int:
+    """
+    以一条集合式DELETE清除时间窗口内班次的排班分配，返回删除的行数
+
+    PostgreSQL 下生成 DELETE ... USING shifts；其他方言退化为子查询。
+    不加载任何ORM对象，且与后续的批量插入处于同一事务中。
+    """
+    assignments = ScheduleAssignment.__table__
+    shifts = Shift.__table__
+    in_window = (shifts.c.start_time >= start_time) & (shifts.c.end_time <= end_time)
+
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = delete(assignments).where(assignments.c.shift_id == shifts.c.id, in_window)
+    else:
+        stmt = delete(assignments).where(
+            assignments.c.shift_id.in_(select(shifts.c.id).where(in_window))
+        )
+    result = db.execute(stmt)
+    return result.rowcount
+
+
+def delete_assignments(db: Session, assignment_ids: List[uuid.UUID]) -> int:
+    """
+    按ID集合删除排班分配，返回删除的行数
+    """
+    if not assignment_ids:
+        return 0
+    assignments = ScheduleAssignment.__table__
+    result = db.execute(delete(assignments).where(assignments.c.id.in_(assignment_ids)))
+    return result.rowcount
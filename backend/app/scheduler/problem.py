@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import uuid
+
+if TYPE_CHECKING:
+    from app.scheduler.availability import AvailabilityMask
+
+
+# 排班问题的纯内存表示，与ORM对象解耦，便于求解器独立运行
+@dataclass
+class StaffMember:
+    id: uuid.UUID
+    role: str
+    is_trainee: bool = False
+    mentor_id: Optional[uuid.UUID] = None
+
+
+@dataclass
+class ShiftSlot:
+    id: uuid.UUID
+    start_time: datetime
+    end_time: datetime
+    shift_type: str
+    required_staff: int = 1
+    required_mentors: int = 0
+
+    @property
+    def family(self) -> str:
+        # DAY_WORKDAY -> DAY, NIGHT_HOLIDAY -> NIGHT
+        return self.shift_type.split("_", 1)[0]
+
+
+@dataclass
+class PlannedAssignment:
+    user_id: uuid.UUID
+    shift_id: uuid.UUID
+    is_primary: bool = True
+
+
+@dataclass
+class ScheduleProblem:
+    shifts: List[ShiftSlot]
+    staff: List[StaffMember]
+    # 两个班次之间的最短休息时间
+    min_rest: timedelta = timedelta(0)
+    # 问题范围之外已占用的时间段（如窗口前后已有的排班），用户ID -> [(开始, 结束)]
+    busy: Dict[uuid.UUID, List[Tuple[datetime, datetime]]] = field(default_factory=dict)
+    # 问题范围之前已累计的班次数，用户ID -> 班次数；负载均衡时计入，使公平性跨窗口延续
+    prior_load: Dict[uuid.UUID, int] = field(default_factory=dict)
+    # 问题范围之前每个用户最近一次班次的结束时间；负载相同时优先排最久未上班的人，使轮转得以延续
+    last_worked: Dict[uuid.UUID, datetime] = field(default_factory=dict)
+    # 各用户历史上按班次类型（如 NIGHT_HOLIDAY）累计的班次数，来自公平性台账；
+    # 负载相同时优先把该类型的班次排给累计较少的人，使夜班、节假日班跨周期均摊
+    type_load: Dict[uuid.UUID, Dict[str, int]] = field(default_factory=dict)
+    # 热启动的初始解（如上一周期平移而来的排班），可以不可行，使用前由求解器筛选
+    hint: List["PlannedAssignment"] = field(default_factory=list)
+    # 人员请假等不可用时段的位图，落在其中的班次不能排给该人员
+    availability: Optional["AvailabilityMask"] = None
+
+
+@dataclass
+class Solution:
+    assignments: List[PlannedAssignment] = field(default_factory=list)
+    # 班次ID -> 缺少的人数
+    unfilled: Dict[uuid.UUID, int] = field(default_factory=dict)
+    # 班次ID -> 缺少的师傅人数
+    unfilled_mentors: Dict[uuid.UUID, int] = field(default_factory=dict)
+    # 求得该解的策略名
+    strategy: str = ""
+
+
+def to_slot(shift) -> ShiftSlot:
+    """
+    由Shift ORM对象构建班次
+    """
+    return ShiftSlot(
+        id=shift.id,
+        start_time=shift.start_time,
+        end_time=shift.end_time,
+        shift_type=shift.shift_type,
+        required_staff=shift.required_staff or 0,
+        required_mentors=shift.required_mentors or 0,
+    )
+
+
+def to_member(user) -> StaffMember:
+    """
+    由User ORM对象构建人员
+    """
+    return StaffMember(
+        id=user.id,
+        role=user.role,
+        is_trainee=bool(user.is_trainee),
+        mentor_id=user.mentor_id,
+    )
+
+
+def build_problem(
+    shifts: Iterable,
+    users: Iterable,
+    min_rest: timedelta = timedelta(0),
+    busy: Optional[Dict[uuid.UUID, List[Tuple[datetime, datetime]]]] = None,
+    prior_load: Optional[Dict[uuid.UUID, int]] = None,
+) -> ScheduleProblem:
+    """
+    由Shift/User ORM对象构建排班问题
+    """
+    return ScheduleProblem(
+        shifts=[to_slot(shift) for shift in shifts],
+        staff=[to_member(user) for user in users],
+        min_rest=min_rest,
+        busy=busy or {},
+        prior_load=prior_load or {},
+    )
@@ -0,0 +1,147 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import uuid
+
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ScheduleAssignment, Shift, User
+from app.schemas.schemas import ScheduleAssignment as ScheduleAssignmentSchema
+from app.scheduler.availability import load_availability
+from app.scheduler.engine import SchedulePlanner, is_eligible
+from app.scheduler.index import StaffIndex
+from app.scheduler.persistence import bulk_insert_assignments, defer_overlap_check, delete_assignments
+from app.scheduler.problem import ShiftSlot, StaffMember, to_member, to_slot
+from app.scheduler.service import assignment_schemas
+
+# 计算负载时参考的前后时间范围
+REPAIR_LOAD_WINDOW = timedelta(days=28)
+
+
+@dataclass
+class RepairResult:
+    affected_shifts: List[uuid.UUID] = field(default_factory=list)
+    removed: List[uuid.UUID] = field(default_factory=list)
+    rows: List[Row] = field(default_factory=list)
+    unfilled: Dict[uuid.UUID, int] = field(default_factory=dict)
+    users_by_id: Dict[uuid.UUID, User] = field(default_factory=dict)
+    shifts_by_id: Dict[uuid.UUID, Shift] = field(default_factory=dict)
+
+    def to_schemas(self) -> List[ScheduleAssignmentSchema]:
+        return assignment_schemas(self.rows, self.users_by_id, self.shifts_by_id)
+
+
+def _keep_valid(
+    index: StaffIndex,
+    planner: SchedulePlanner,
+    slot: ShiftSlot,
+    current: List[Row],
+    removed: List[uuid.UUID],
+) -> List[StaffMember]:
+    """
+    从班次现有人员中保留仍然有效的部分，其余记入 removed
+
+    无效指：已停用、角色不再符合班次类型、在请假时段内、与本人其他班次重叠或休息不足、
+    新人的师傅不在班上，或超出人数要求。
+    """
+    valid = []
+    for row in current:
+        member = index.get(row.user_id)
+        # 先把本班次移出区间索引，班次时间可能已被修改，需要重新判断是否冲突
+        planner.intervals.remove(row.user_id, slot.start_time, slot.end_time)
+        if (
+            member is None
+            or not is_eligible(member, slot)
+            or not planner.is_free(member.id, slot)
+        ):
+            removed.append(row.id)
+            if member is not None:
+                planner.add_load(member.id, -1)
+            continue
+        valid.append((member, row))
+
+    # 非新人优先、负载低者优先保留，新人随后判断其师傅是否仍在班上
+    valid.sort(key=lambda item: (item[0].is_trainee, planner.load_of(item[0].id)))
+    kept: Dict[uuid.UUID, StaffMember] = {}
+    for member, row in valid:
+        mentor = index.mentor_of(member)
+        if len(kept) >= slot.required_staff or (
+            member.is_trainee and member.mentor_id and (mentor is None or mentor.id not in kept)
+        ):
+            removed.append(row.id)
+            planner.add_load(member.id, -1)
+            continue
+        kept[member.id] = member
+        planner.intervals.add(member.id, slot.start_time, slot.end_time)
+    return list(kept.values())
+
+
+def repair_shifts(db: Session, shift_ids: Iterable[uuid.UUID]) -> RepairResult:
+    """
+    只重新求解受影响的班次：保留其中仍然有效的排班，仅为空出的名额选人
+
+    其他班次保持不变；负载与区间索引取受影响班次前后 REPAIR_LOAD_WINDOW 内的已有排班。
+    不提交事务。
+    """
+    shift_ids = list(set(shift_ids))
+    if not shift_ids:
+        return RepairResult()
+    # 修改班次时间可能使现有排班暂时重叠，修复会移除冲突的人员，提交时再检查
+    defer_overlap_check(db)
+    # 会话未开启autoflush，先把调用方的修改（如停用用户、修改班次）写入
+    db.flush()
+
+    shifts = db.query(Shift).filter(Shift.id.in_(shift_ids)).order_by(Shift.start_time).all()
+    if not shifts:
+        return RepairResult()
+    users = db.query(User).filter(User.is_active == True).all()
+    index = StaffIndex(to_member(user) for user in users)
+
+    current: Dict[uuid.UUID, List[Row]] = defaultdict(list)
+    for row in db.query(
+        ScheduleAssignment.id, ScheduleAssignment.user_id, ScheduleAssignment.shift_id
+    ).filter(ScheduleAssignment.shift_id.in_(shift_ids)):
+        current[row.shift_id].append(row)
+
+    planner = SchedulePlanner(index, timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS))
+    # 邻近范围内的已有排班：用于计算负载并建立区间索引
+    nearby = db.query(ScheduleAssignment.user_id, Shift.start_time, Shift.end_time).join(Shift).filter(
+        Shift.start_time >= shifts[0].start_time - REPAIR_LOAD_WINDOW,
+        Shift.start_time <= shifts[-1].end_time + REPAIR_LOAD_WINDOW,
+    ).all()
+    loads: Dict[uuid.UUID, int] = defaultdict(int)
+    for row in nearby:
+        loads[row.user_id] += 1
+        planner.intervals.add(row.user_id, row.start_time, row.end_time)
+    planner.set_loads(loads)
+    planner.availability = load_availability(db, shifts[0].start_time, max(shift.end_time for shift in shifts))
+
+    removed: List[uuid.UUID] = []
+    for shift in shifts:
+        slot = to_slot(shift)
+        kept = _keep_valid(index, planner, slot, current[shift.id], removed)
+        planner.fill(slot, fixed=kept)
+
+    delete_assignments(db, removed)
+    rows = bulk_insert_assignments(db, planner.solution.assignments)
+    return RepairResult(
+        affected_shifts=[shift.id for shift in shifts],
+        removed=removed,
+        rows=rows,
+        unfilled=planner.solution.unfilled,
+        users_by_id={user.id: user for user in users},
+        shifts_by_id={shift.id: shift for shift in shifts},
+    )
+
+
+def repair_user(db: Session, user_id: uuid.UUID, since: Optional[datetime] = None) -> RepairResult:
+    """
+    修复某个用户（如被停用）在 since 之后的班次
+    """
+    query = db.query(ScheduleAssignment.shift_id).join(Shift).filter(ScheduleAssignment.user_id == user_id)
+    if since is not None:
+        query = query.filter(Shift.start_time >= since)
+    return repair_shifts(db, [row.shift_id for row in query])
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List
+
+
+@dataclass
+class HorizonWindow:
+    """
+    滚动时域中的一个求解窗口
+
+    求解 [solve_from, solve_to] 内的全部班次，但只固定 fix_to 及之前开始的班次；
+    fix_to 之后的重叠部分在下一个窗口中带着更远的前瞻重新求解。
+    """
+
+    solve_from: date
+    solve_to: date
+    fix_to: date
+
+
+def rolling_windows(start_date: date, end_date: date, window_days: int, overlap_days: int) -> List[HorizonWindow]:
+    """
+    把日期范围切成长度为 window_days、相邻窗口重叠 overlap_days 天的求解窗口
+
+    各窗口的固定部分首尾相接、恰好覆盖整个范围；最后一个窗口固定到 end_date。
+    """
+    window_days = max(window_days, 1)
+    step = max(window_days - max(overlap_days, 0), 1)
+    windows: List[HorizonWindow] = []
+    solve_from = start_date
+    while True:
+        solve_to = min(solve_from + timedelta(days=window_days - 1), end_date)
+        if solve_to >= end_date:
+            windows.append(HorizonWindow(solve_from, end_date, end_date))
+            return windows
+        fix_to = solve_from + timedelta(days=step - 1)
+        windows.append(HorizonWindow(solve_from, solve_to, fix_to))
+        solve_from = fix_to + timedelta(days=1)
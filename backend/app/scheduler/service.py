@@ -0,0 +1,525 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import time
+import uuid
+
+from fastapi import status
+from sqlalchemy import and_
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import ScheduleAssignment, Shift, User
+from app.schemas.schemas import ScheduleAssignment as ScheduleAssignmentSchema
+from app.scheduler.availability import AvailabilityMask, load_availability
+from app.scheduler.diff import ScheduleDiff, diff_assignments
+from app.scheduler.fairness import load_ledger, type_loads
+from app.scheduler.jobs import Job, job_manager
+from app.scheduler.local_search import ImproveCallback
+from app.scheduler.locks import schedule_range_lock
+from app.scheduler.matrix import ScheduleMatrices, ScheduleScore
+from app.scheduler.persistence import bulk_insert_assignments, clear_assignments, is_overlap_violation
+from app.scheduler.problem import (
+    PlannedAssignment,
+    ScheduleProblem,
+    ShiftSlot,
+    Solution,
+    build_problem,
+    to_member,
+    to_slot,
+)
+from app.scheduler.rolling import rolling_windows
+from app.scheduler.strategies import STRATEGIES, choose_strategy
+
+# 进度回调：(阶段, 总体完成百分比)
+ProgressCallback = Callable[[str, float], None]
+
+
+class GenerationError(Exception):
+    """
+    排班生成失败，携带对应的HTTP状态码
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class GenerationResult:
+    rows: List[Row]
+    users_by_id: Dict[uuid.UUID, User]
+    shifts_by_id: Dict[uuid.UUID, Shift]
+    solution: Solution
+    cleared: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def to_schemas(self) -> List[ScheduleAssignmentSchema]:
+        return assignment_schemas(self.rows, self.users_by_id, self.shifts_by_id)
+
+
+def iter_assignment_schemas(
+    rows: List[Row],
+    users_by_id: Dict[uuid.UUID, User],
+    shifts_by_id: Dict[uuid.UUID, Shift],
+) -> Iterator[ScheduleAssignmentSchema]:
+    """
+    用写入返回的行和已加载的用户、班次逐条构建响应，不再额外查询
+    """
+    for row in rows:
+        yield ScheduleAssignmentSchema.model_validate(
+            {
+                **row._asdict(),
+                "user": users_by_id[row.user_id],
+                "shift": shifts_by_id[row.shift_id],
+            },
+            from_attributes=True,
+        )
+
+
+def assignment_schemas(
+    rows: List[Row],
+    users_by_id: Dict[uuid.UUID, User],
+    shifts_by_id: Dict[uuid.UUID, Shift],
+) -> List[ScheduleAssignmentSchema]:
+    return list(iter_assignment_schemas(rows, users_by_id, shifts_by_id))
+
+
+def _noop_progress(phase: str, percent: float) -> None:
+    pass
+
+
+def _window(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date, datetime.max.time()),
+    )
+
+
+def _load_inputs(db: Session, window_start: datetime, window_end: datetime) -> Tuple[List[Shift], List[User]]:
+    """
+    获取指定时间窗口内的班次和所有活跃用户
+    """
+    shifts = db.query(Shift).filter(
+        and_(
+            Shift.start_time >= window_start,
+            Shift.end_time <= window_end
+        )
+    ).all()
+    if not shifts:
+        raise GenerationError(status.HTTP_404_NOT_FOUND, "No shifts found in the specified date range")
+
+    users = db.query(User).filter(User.is_active == True).all()
+    if not users:
+        raise GenerationError(status.HTTP_404_NOT_FOUND, "No active users found")
+    return shifts, users
+
+
+def _busy_near(
+    db: Session,
+    window_start: datetime,
+    window_end: datetime,
+    min_rest: timedelta,
+) -> Dict[uuid.UUID, List[Tuple[datetime, datetime]]]:
+    """
+    窗口之外、但距窗口边界不足 min_rest 的已有排班，作为求解时的既有占用
+    """
+    rows = db.query(ScheduleAssignment.user_id, Shift.start_time, Shift.end_time).join(Shift).filter(
+        and_(
+            Shift.end_time > window_start - min_rest,
+            Shift.start_time < window_end + min_rest,
+            ~and_(Shift.start_time >= window_start, Shift.end_time <= window_end),
+        )
+    ).all()
+    busy: Dict[uuid.UUID, List[Tuple[datetime, datetime]]] = defaultdict(list)
+    for row in rows:
+        busy[row.user_id].append((row.start_time, row.end_time))
+    return dict(busy)
+
+
+def _availability(db: Session, shifts: List[Shift]) -> AvailabilityMask:
+    """
+    覆盖这些班次的请假位图，起点取最早班次的开始时间
+    """
+    return load_availability(
+        db,
+        min(shift.start_time for shift in shifts),
+        max(shift.end_time for shift in shifts),
+    )
+
+
+def _previous_period(
+    db: Session,
+    window_start: datetime,
+    window_end: datetime,
+    slots: List[ShiftSlot],
+) -> Tuple[Dict[uuid.UUID, int], Dict[uuid.UUID, datetime], List[PlannedAssignment]]:
+    """
+    热启动所需的上一周期排班：各用户的班次数、最近一次班次的结束时间，
+    以及平移到本窗口的排班（作为局部搜索的初始解）
+
+    上一周期为窗口之前、长度为整周且不短于窗口的时间段，平移后星期几对齐；
+    平移后找不到同一时刻、同一类别班次的排班被忽略。只执行一条查询。
+    """
+    days = (window_end.date() - window_start.date()).days + 1
+    lookback = timedelta(days=-(-days // 7) * 7)
+    rows = db.query(
+        ScheduleAssignment.user_id, Shift.start_time, Shift.end_time, Shift.shift_type
+    ).join(Shift).filter(
+        and_(
+            Shift.start_time >= window_start - lookback,
+            Shift.start_time < window_start,
+        )
+    ).all()
+
+    slot_at = {(slot.start_time, slot.family): slot.id for slot in slots}
+    prior_load: Counter = Counter()
+    last_worked: Dict[uuid.UUID, datetime] = {}
+    hint: List[PlannedAssignment] = []
+    for row in rows:
+        prior_load[row.user_id] += 1
+        if row.user_id not in last_worked or row.end_time > last_worked[row.user_id]:
+            last_worked[row.user_id] = row.end_time
+        shift_id = slot_at.get((row.start_time + lookback, row.shift_type.split("_", 1)[0]))
+        if shift_id is not None:
+            hint.append(PlannedAssignment(user_id=row.user_id, shift_id=shift_id))
+    return dict(prior_load), last_worked, hint
+
+
+def _solve(
+    problem: ScheduleProblem,
+    deadline: float,
+    latency_target: float,
+    strategy: Optional[str],
+    report: ProgressCallback,
+    on_improve: Optional[ImproveCallback],
+) -> Solution:
+    """
+    按指定策略求解；未指定时由调度器按问题规模与延迟目标选择
+
+    求解阶段占总进度的 20 ~ 80。
+    """
+    solver = STRATEGIES[strategy] if strategy else choose_strategy(problem, latency_target)
+    solution = solver.solve(
+        problem,
+        deadline,
+        progress=lambda fraction: report("solving", 20 + 60 * fraction),
+        on_improve=on_improve,
+    )
+    solution.strategy = solver.name
+    return solution
+
+
+def generate(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    progress: Optional[ProgressCallback] = None,
+    time_budget: Optional[float] = None,
+    on_improve: Optional[ImproveCallback] = None,
+    strategy: Optional[str] = None,
+    rolling: bool = False,
+    warm_start: bool = True,
+    returning: bool = True,
+) -> GenerationResult:
+    """
+    在给定会话中生成排班：加载 -> 清除 -> 求解 -> 批量写入
+
+    time_budget 为整个生成过程的时间预算（秒），默认为 SCHEDULER_LATENCY_TARGET_SECONDS；
+    可持续改进的策略在预算内改进，到时返回当前最优解。
+    rolling=True 时按滚动时域逐窗口求解，见 _generate_rolling。
+    warm_start=True 时以上一周期的排班热启动：延续累计负载与轮转次序，并作为局部搜索的初始解。
+    returning=False 时不取回写入的行（结果的 rows 为空），由调用方在提交后从数据库分批读出。
+    不提交事务，由调用方决定提交或回滚。
+    """
+    report = progress or _noop_progress
+    latency_target = time_budget or settings.SCHEDULER_LATENCY_TARGET_SECONDS
+    deadline = time.monotonic() + latency_target
+    if rolling:
+        return _generate_rolling(db, start_date, end_date, report, deadline, strategy, on_improve, warm_start, returning)
+    window_start, window_end = _window(start_date, end_date)
+    timings: Dict[str, float] = {}
+
+    report("loading", 0)
+    started = time.perf_counter()
+    shifts, users = _load_inputs(db, window_start, window_end)
+    timings["loading"] = time.perf_counter() - started
+
+    # 清除指定日期范围内的现有排班
+    report("clearing", 10)
+    started = time.perf_counter()
+    cleared = clear_assignments(db, window_start, window_end)
+    timings["clearing"] = time.perf_counter() - started
+
+    # 交由排班引擎求解：按角色筛选候选人，并精确满足人数与师傅人数要求
+    report("solving", 20)
+    started = time.perf_counter()
+    min_rest = timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS)
+    problem = build_problem(shifts, users, min_rest, _busy_near(db, window_start, window_end, min_rest))
+    # 窗口内的旧排班已清除，台账中只剩窗口之外的历史
+    problem.type_load = type_loads(load_ledger(db))
+    problem.availability = _availability(db, shifts)
+    if warm_start:
+        problem.prior_load, problem.last_worked, problem.hint = _previous_period(
+            db, window_start, window_end, problem.shifts,
+        )
+    solution = _solve(problem, deadline, latency_target, strategy, report, on_improve)
+    timings["solving"] = time.perf_counter() - started
+
+    report("persisting", 80)
+    started = time.perf_counter()
+    try:
+        rows = bulk_insert_assignments(db, solution.assignments, returning)
+    except IntegrityError as exc:
+        # 生成期间其他管理员手动排入了重叠的班次
+        if is_overlap_violation(exc):
+            raise GenerationError(status.HTTP_409_CONFLICT, "Generated schedule overlaps concurrent assignments")
+        raise
+    timings["persisting"] = time.perf_counter() - started
+
+    return GenerationResult(
+        rows=rows,
+        users_by_id={user.id: user for user in users},
+        shifts_by_id={shift.id: shift for shift in shifts},
+        solution=solution,
+        cleared=cleared,
+        timings=timings,
+    )
+
+
+def _generate_rolling(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    report: ProgressCallback,
+    deadline: float,
+    strategy: Optional[str],
+    on_improve: Optional[ImproveCallback],
+    warm_start: bool,
+    returning: bool = True,
+) -> GenerationResult:
+    """
+    滚动时域生成：按 SCHEDULER_ROLLING_WINDOW_DAYS 天的窗口逐个求解，相邻窗口重叠
+    SCHEDULER_ROLLING_OVERLAP_DAYS 天，每个窗口只写入不重叠的部分
+
+    求解器每次只持有一个窗口的班次与候选矩阵，内存与总时长无关，耗时随窗口数线性增长。
+    窗口之间延续的边界状态：
+    - 休息时间：已写入的前序窗口排班经 _busy_near 成为下一窗口的既有占用；
+    - 公平性：各用户已固定的班次数作为 prior_load 计入负载均衡，按班次类型的累计数
+      （初始来自公平性台账）随已固定的排班递增；
+    - 师徒同班：师傅在边界处的占用同样来自既有占用，新人只在师傅可排时排入。
+    热启动时第一个窗口的累计负载来自范围之前的上一周期，每个窗口的轮转次序与初始解
+    来自其之前的一个周期（包括刚写入的前序窗口）。时间预算在剩余窗口间均分。
+    """
+    window_start, window_end = _window(start_date, end_date)
+    timings: Dict[str, float] = defaultdict(float)
+
+    report("loading", 0)
+    started = time.perf_counter()
+    users = db.query(User).filter(User.is_active == True).all()
+    if not users:
+        raise GenerationError(status.HTTP_404_NOT_FOUND, "No active users found")
+    staff = [to_member(user) for user in users]
+    timings["loading"] += time.perf_counter() - started
+
+    report("clearing", 10)
+    started = time.perf_counter()
+    cleared = clear_assignments(db, window_start, window_end)
+    timings["clearing"] = time.perf_counter() - started
+
+    min_rest = timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS)
+    windows = rolling_windows(
+        start_date,
+        end_date,
+        settings.SCHEDULER_ROLLING_WINDOW_DAYS,
+        settings.SCHEDULER_ROLLING_OVERLAP_DAYS,
+    )
+    loads: Counter = Counter()
+    type_load = type_loads(load_ledger(db))
+    rows: List[Row] = []
+    shifts_by_id: Dict[uuid.UUID, Shift] = {}
+    solution = Solution()
+
+    for n, horizon in enumerate(windows):
+        solve_start, solve_end = _window(horizon.solve_from, horizon.solve_to)
+        fixed_end = _window(horizon.fix_to, horizon.fix_to)[1]
+
+        started = time.perf_counter()
+        # 按开始时间归入窗口，跨越窗口末尾的夜班不会在两个窗口之间遗漏
+        shifts = db.query(Shift).filter(
+            and_(
+                Shift.start_time >= solve_start,
+                Shift.start_time <= solve_end,
+                Shift.end_time <= window_end,
+            )
+        ).all()
+        busy = _busy_near(db, solve_start, solve_end, min_rest)
+        timings["loading"] += time.perf_counter() - started
+        if not shifts:
+            continue
+
+        started = time.perf_counter()
+        problem = ScheduleProblem(
+            shifts=[to_slot(shift) for shift in shifts],
+            staff=staff,
+            min_rest=min_rest,
+            busy=busy,
+            prior_load=dict(loads),
+            type_load=type_load,
+            availability=_availability(db, shifts),
+        )
+        if warm_start:
+            prior_load, problem.last_worked, problem.hint = _previous_period(
+                db, solve_start, solve_end, problem.shifts,
+            )
+            if n == 0:
+                loads.update(prior_load)
+                problem.prior_load = prior_load
+        budget = max(deadline - time.monotonic(), 0.0) / (len(windows) - n)
+
+        def window_report(phase: str, percent: float, n: int = n) -> None:
+            # _solve 的进度在 20 ~ 80 之间，按窗口序号换算为整体进度
+            report(phase, 20 + 60 * (n + (percent - 20) / 60) / len(windows))
+
+        part = _solve(problem, time.monotonic() + budget, budget, strategy, window_report, on_improve)
+        timings["solving"] += time.perf_counter() - started
+
+        fixed = {shift.id for shift in shifts if shift.start_time <= fixed_end}
+        planned = [item for item in part.assignments if item.shift_id in fixed]
+        started = time.perf_counter()
+        try:
+            rows.extend(bulk_insert_assignments(db, planned, returning))
+        except IntegrityError as exc:
+            if is_overlap_violation(exc):
+                raise GenerationError(status.HTTP_409_CONFLICT, "Generated schedule overlaps concurrent assignments")
+            raise
+        timings["persisting"] += time.perf_counter() - started
+
+        loads.update(item.user_id for item in planned)
+        shift_types = {shift.id: shift.shift_type for shift in shifts}
+        for item in planned:
+            counts = type_load.setdefault(item.user_id, {})
+            counts[shift_types[item.shift_id]] = counts.get(shift_types[item.shift_id], 0) + 1
+        solution.assignments.extend(planned)
+        solution.unfilled.update({k: v for k, v in part.unfilled.items() if k in fixed})
+        solution.unfilled_mentors.update({k: v for k, v in part.unfilled_mentors.items() if k in fixed})
+        solution.strategy = part.strategy
+        shifts_by_id.update((shift.id, shift) for shift in shifts if shift.id in fixed)
+
+    if not shifts_by_id:
+        raise GenerationError(status.HTTP_404_NOT_FOUND, "No shifts found in the specified date range")
+    report("persisting", 80)
+
+    return GenerationResult(
+        rows=rows,
+        users_by_id={user.id: user for user in users},
+        shifts_by_id=shifts_by_id,
+        solution=solution,
+        cleared=cleared,
+        timings=dict(timings),
+    )
+
+
+def preview(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    time_budget: Optional[float] = None,
+    strategy: Optional[str] = None,
+    warm_start: bool = True,
+) -> Tuple[ScheduleDiff, Solution, ScheduleScore]:
+    """
+    试运行：完全在内存中求解，并返回与现有排班的差异
+
+    只执行普通的SELECT，不写入任何数据，也不持有锁。
+    """
+    latency_target = time_budget or settings.SCHEDULER_LATENCY_TARGET_SECONDS
+    deadline = time.monotonic() + latency_target
+    window_start, window_end = _window(start_date, end_date)
+    shifts, users = _load_inputs(db, window_start, window_end)
+    current = db.query(ScheduleAssignment.shift_id, ScheduleAssignment.user_id).join(Shift).filter(
+        and_(
+            Shift.start_time >= window_start,
+            Shift.end_time <= window_end
+        )
+    ).all()
+
+    min_rest = timedelta(hours=settings.SCHEDULER_MIN_REST_HOURS)
+    problem = build_problem(shifts, users, min_rest, _busy_near(db, window_start, window_end, min_rest))
+    # 试运行不清除旧排班，从台账中扣除窗口内的现有排班
+    shift_types = {shift.id: shift.shift_type for shift in shifts}
+    problem.type_load = type_loads(
+        load_ledger(db),
+        excluding=[(row.user_id, shift_types[row.shift_id]) for row in current],
+    )
+    problem.availability = _availability(db, shifts)
+    if warm_start:
+        problem.prior_load, problem.last_worked, problem.hint = _previous_period(
+            db, window_start, window_end, problem.shifts,
+        )
+    solution = _solve(problem, deadline, latency_target, strategy, _noop_progress, None)
+    matrices = ScheduleMatrices(problem)
+    score = matrices.evaluate(matrices.encode(solution.assignments))
+    diff = diff_assignments(
+        [(row.shift_id, row.user_id) for row in current],
+        solution.assignments,
+        {shift.id: shift.start_time for shift in shifts},
+    )
+    return diff, solution, score
+
+
+def submit_generation_job(
+    start_date: date,
+    end_date: date,
+    time_budget: Optional[float] = None,
+    strategy: Optional[str] = None,
+    rolling: bool = False,
+    warm_start: bool = True,
+) -> Job:
+    """
+    把排班生成放入后台任务池，立即返回任务
+
+    任务使用独立的数据库会话，持有日期范围锁，仅在完成后提交；取消或失败时整体回滚。
+    局部搜索的每次改进记录在 job.improvements 中。
+    """
+
+    def run(job: Job) -> List[ScheduleAssignmentSchema]:
+        db = SessionLocal()
+        try:
+            with schedule_range_lock(db, start_date, end_date):
+                result = generate(
+                    db,
+                    start_date,
+                    end_date,
+                    progress=job.report,
+                    time_budget=time_budget,
+                    on_improve=job.improve,
+                    strategy=strategy,
+                    rolling=rolling,
+                    warm_start=warm_start,
+                )
+                job.report("committing", 95)
+                assignments = result.to_schemas()
+                db.commit()
+            return assignments
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return job_manager.submit(
+        "generate_schedule",
+        run,
+        start_date=start_date.isoformat(),
+        end_date=end_date.isoformat(),
+        **({"time_budget": str(time_budget)} if time_budget else {}),
+        **({"strategy": strategy} if strategy else {}),
+        **({"rolling": "true"} if rolling else {}),
+        **({} if warm_start else {"warm_start": "false"}),
+    )
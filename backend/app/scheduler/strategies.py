@@ -0,0 +1,151 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+import time
+
+from app.core.config import settings
+from app.scheduler.engine import RoundRobinPlanner, solve
+from app.scheduler.exact import solve_exact
+from app.scheduler.local_search import ImproveCallback, LocalSearch, improve
+from app.scheduler.matrix import ScheduleMatrices
+from app.scheduler.parallel import solve_parallel
+from app.scheduler.problem import ScheduleProblem, Solution
+
+# 进度回调：已完成比例（0~1）
+FractionCallback = Callable[[float], None]
+
+
+class SolverStrategy(ABC):
+    """
+    排班求解策略
+
+    seconds_per_cell 为每个 人员 × 班次 单元的大致耗时（在 500 人 × 180 班次的
+    实例上测得），调度器据此估算各策略能否满足延迟目标。
+    """
+
+    name = ""
+    seconds_per_cell = 0.0
+    # 是否会利用截止时间之前的剩余时间继续改进
+    anytime = False
+
+    @abstractmethod
+    def solve(
+        self,
+        problem: ScheduleProblem,
+        deadline: float,
+        progress: Optional[FractionCallback] = None,
+        on_improve: Optional[ImproveCallback] = None,
+    ) -> Solution:
+        """
+        在截止时间 deadline（time.monotonic() 时刻）之前求解
+        """
+
+
+STRATEGIES: Dict[str, SolverStrategy] = {}
+
+
+def register_strategy(strategy: SolverStrategy) -> SolverStrategy:
+    STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+class RoundRobinStrategy(SolverStrategy):
+    """
+    轮转分配：不按负载排序，代价最低，用于超出延迟目标的超大规模问题
+    """
+
+    name = "round_robin"
+    seconds_per_cell = 3e-7
+
+    def solve(self, problem, deadline, progress=None, on_improve=None):
+        return solve(problem, progress, planner_class=RoundRobinPlanner)
+
+
+class GreedyStrategy(SolverStrategy):
+    """
+    按负载最小的贪心指派，规模足够大时在进程池中并行求解
+    """
+
+    name = "greedy"
+    seconds_per_cell = 7e-7
+
+    def solve(self, problem, deadline, progress=None, on_improve=None):
+        return solve_parallel(problem, progress)
+
+
+class LocalSearchStrategy(SolverStrategy):
+    """
+    贪心初始解 + 局部搜索，截止时间前持续改进；问题带有热启动提示时以提示为初始解
+    """
+
+    name = "local_search"
+    seconds_per_cell = 1.5e-6
+    anytime = True
+
+    def solve(self, problem, deadline, progress=None, on_improve=None):
+        if problem.hint:
+            search = LocalSearch.from_hint(problem)
+            search.run(deadline, on_improve=on_improve, progress=progress)
+            return search.solution()
+        solution = solve_parallel(problem, (lambda fraction: progress(fraction / 2)) if progress else None)
+        return improve(
+            problem,
+            solution,
+            deadline,
+            on_improve=on_improve,
+            progress=(lambda fraction: progress(0.5 + fraction / 2)) if progress else None,
+        )
+
+
+class ExactStrategy(SolverStrategy):
+    """
+    混合整数规划精确求解，仅用于小规模问题；超时未得到可行解时退回贪心解
+    """
+
+    name = "exact"
+    seconds_per_cell = 2e-4
+    anytime = True
+
+    def solve(self, problem, deadline, progress=None, on_improve=None):
+        incumbent = solve(problem)
+        matrices = ScheduleMatrices(problem)
+        best = matrices.evaluate(matrices.encode(incumbent.assignments)).objective
+        if on_improve:
+            on_improve(0.0, best)
+        started = time.monotonic()
+        solution = solve_exact(problem, deadline)
+        if progress:
+            progress(1.0)
+        if solution is None:
+            return incumbent
+        objective = matrices.evaluate(matrices.encode(solution.assignments)).objective
+        if objective >= best:
+            return incumbent
+        if on_improve:
+            on_improve(time.monotonic() - started, objective)
+        return solution
+
+
+for _strategy in (RoundRobinStrategy(), GreedyStrategy(), LocalSearchStrategy(), ExactStrategy()):
+    register_strategy(_strategy)
+
+
+def problem_size(problem: ScheduleProblem) -> int:
+    return len(problem.staff) * len(problem.shifts)
+
+
+def choose_strategy(problem: ScheduleProblem, latency_target: float) -> SolverStrategy:
+    """
+    按问题规模（人员 × 班次）与延迟目标选择策略
+
+    小规模问题精确求解；贪心耗时不超过目标的一半时用剩余时间做局部搜索；
+    否则退化为贪心，贪心也超出目标时使用轮转分配。
+    """
+    size = problem_size(problem)
+    exact = STRATEGIES.get("exact")
+    if exact is not None and size <= settings.SCHEDULER_EXACT_MAX_SIZE:
+        return exact
+    if size * STRATEGIES["greedy"].seconds_per_cell * 2 <= latency_target:
+        return STRATEGIES["local_search"]
+    if size * STRATEGIES["greedy"].seconds_per_cell <= latency_target:
+        return STRATEGIES["greedy"]
+    return STRATEGIES["round_robin"]
@@ -0,0 +1,96 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+from zoneinfo import ZoneInfo
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Shift, ShiftTemplate
+from app.scheduler.holidays import HolidayCalendar
+
+
+def _occurs_on(template: ShiftTemplate, day: date) -> bool:
+    if day < template.valid_from:
+        return False
+    if template.valid_until is not None and day > template.valid_until:
+        return False
+    return bool(template.weekdays & (1 << day.weekday()))
+
+
+def expand_templates(
+    templates: Iterable[ShiftTemplate],
+    start_date: date,
+    end_date: date,
+    calendar: HolidayCalendar,
+) -> List[Dict]:
+    """
+    把模板在 [start_date, end_date] 内展开为班次行（字典），不访问数据库
+
+    开始时刻按 SCHEDULER_TIMEZONE 的当地时间解释，再换算为UTC；
+    工作日 / 节假日决定班次类型与人数要求。
+    """
+    tz = ZoneInfo(settings.SCHEDULER_TIMEZONE)
+    days: List[Tuple[date, bool]] = []
+    day = start_date
+    while day <= end_date:
+        days.append((day, calendar.is_holiday(day)))
+        day += timedelta(days=1)
+
+    rows: List[Dict] = []
+    for template in templates:
+        duration = timedelta(minutes=template.duration_minutes)
+        for day, holiday in days:
+            if not _occurs_on(template, day):
+                continue
+            start = datetime.combine(day, template.start_time, tzinfo=tz).astimezone(timezone.utc)
+            rows.append({
+                "id": uuid.uuid4(),
+                "template_id": template.id,
+                "start_time": start,
+                "end_time": start + duration,
+                "shift_type": calendar.shift_type(template.shift_family, day),
+                "required_staff": template.holiday_required_staff if holiday else template.workday_required_staff,
+                "required_mentors": template.holiday_required_mentors if holiday else template.workday_required_mentors,
+            })
+    return rows
+
+
+def insert_template_shifts(db: Session, rows: List[Dict]) -> int:
+    """
+    以一条批量INSERT写入展开的班次，返回实际新增的行数
+
+    (template_id, start_time) 已存在的班次由 ON CONFLICT DO NOTHING 跳过，
+    重复展开同一时间段不会产生重复班次，并发展开也不会冲突。
+    """
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(Shift.__table__)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(Shift.__table__)
+    else:
+        stmt = None
+
+    table = Shift.__table__
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[table.c.template_id, table.c.start_time]
+        ).returning(table.c.id)
+        return len(db.execute(stmt, rows).all())
+
+    # 其他方言：先查询已存在的班次再插入
+    existing = set(
+        db.query(Shift.template_id, Shift.start_time).filter(
+            Shift.template_id.in_({row["template_id"] for row in rows}),
+            Shift.start_time >= min(row["start_time"] for row in rows),
+            Shift.start_time <= max(row["start_time"] for row in rows),
+        ).all()
+    )
+    fresh = [row for row in rows if (row["template_id"], row["start_time"]) not in existing]
+    if fresh:
+        db.execute(insert(table), fresh)
+    return len(fresh)
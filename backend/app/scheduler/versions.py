@@ -0,0 +1,246 @@
+from datetime import date, datetime, timezone
+import hashlib
+from typing import List, Optional, Tuple
+import uuid
+
+from fastapi import status
+from sqlalchemy import and_, delete, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.models import ScheduleAssignment, ScheduleVersion, ScheduleVersionChange, Shift
+from app.scheduler.diff import ScheduleDiff
+from app.scheduler.persistence import bulk_insert_assignments, defer_overlap_check, is_overlap_violation
+from app.scheduler.problem import PlannedAssignment, Solution
+
+ADD = "add"
+REMOVE = "remove"
+
+OVERLAP_DETAIL = "Version conflicts with assignments made since it was drafted"
+DRIFT_DETAIL = "Assignments in the version's date range changed since it was drafted"
+ROLLBACK_DRIFT_DETAIL = "Assignments in the version's date range changed since it was published"
+
+
+class VersionError(Exception):
+    """
+    版本操作失败，携带对应的HTTP状态码
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def published_version(db: Session, for_update: bool = False) -> Optional[ScheduleVersion]:
+    """
+    当前已发布的版本（版本指针），尚未发布过任何版本时返回 None
+
+    for_update=true 时对该行加行锁，使并发的发布与回滚串行执行。
+    """
+    query = db.query(ScheduleVersion).filter(ScheduleVersion.status == "published")
+    if for_update:
+        query = query.with_for_update()
+    return query.first()
+
+
+def window_checksum(db: Session, window: Tuple[datetime, datetime]) -> str:
+    """
+    窗口内现有排班的校验和，用于发布时判断草稿求解所依据的排班是否已被改动
+    """
+    window_start, window_end = window
+    rows = db.query(
+        ScheduleAssignment.shift_id, ScheduleAssignment.user_id, ScheduleAssignment.is_primary,
+    ).join(Shift).filter(
+        and_(
+            Shift.start_time >= window_start,
+            Shift.end_time <= window_end
+        )
+    ).order_by(ScheduleAssignment.shift_id, ScheduleAssignment.user_id)
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(f"{row.shift_id}:{row.user_id}:{int(bool(row.is_primary))}\n".encode())
+    return digest.hexdigest()
+
+
+def _version_window(version: ScheduleVersion) -> Tuple[datetime, datetime]:
+    return (
+        datetime.combine(version.start_date, datetime.min.time()),
+        datetime.combine(version.end_date, datetime.max.time()),
+    )
+
+
+def create_draft(
+    db: Session,
+    name: str,
+    start_date: date,
+    end_date: date,
+    window: Tuple[datetime, datetime],
+    diff: ScheduleDiff,
+    solution: Solution,
+    checksum: str,
+    created_by: Optional[uuid.UUID] = None,
+) -> ScheduleVersion:
+    """
+    以试运行得到的差异创建草稿版本，只保存新增与移除的排班
+
+    调动拆成一条移除与一条新增；被移除排班的 is_primary 取自现有排班，便于回滚时原样恢复。
+    checksum 为求解前窗口内排班的校验和（见 window_checksum），发布时据此检查排班是否已被改动。
+    """
+    head = published_version(db)
+    version = ScheduleVersion(
+        name=name,
+        status="draft",
+        start_date=start_date,
+        end_date=end_date,
+        base_version_id=head.id if head else None,
+        window_checksum=checksum,
+        created_by=created_by,
+    )
+    db.add(version)
+    db.flush()
+
+    primary = {(item.shift_id, item.user_id): item.is_primary for item in solution.assignments}
+    added = list(diff.added) + [(to_shift, user_id) for user_id, _, to_shift in diff.moved]
+    removed = list(diff.removed) + [(from_shift, user_id) for user_id, from_shift, _ in diff.moved]
+    window_start, window_end = window
+    current = dict(
+        ((row.shift_id, row.user_id), row.is_primary)
+        for row in db.query(
+            ScheduleAssignment.shift_id, ScheduleAssignment.user_id, ScheduleAssignment.is_primary,
+        ).join(Shift).filter(
+            and_(
+                Shift.start_time >= window_start,
+                Shift.end_time <= window_end
+            )
+        )
+    )
+
+    table = ScheduleVersionChange.__table__
+    changes = [
+        {"version_id": version.id, "shift_id": shift_id, "user_id": user_id,
+         "action": ADD, "is_primary": primary.get((shift_id, user_id), True)}
+        for shift_id, user_id in added
+    ] + [
+        {"version_id": version.id, "shift_id": shift_id, "user_id": user_id,
+         "action": REMOVE, "is_primary": current.get((shift_id, user_id), True)}
+        for shift_id, user_id in removed
+    ]
+    if changes:
+        db.execute(table.insert(), changes)
+    version.added_count = len(added)
+    version.removed_count = len(removed)
+    return version
+
+
+def _apply(db: Session, version_id: uuid.UUID, insert_action: str, delete_action: str) -> Tuple[int, int]:
+    """
+    把版本的增量集合式地应用到排班表，返回 (插入行数, 删除行数)
+
+    删除为一条 DELETE ... WHERE (shift_id, user_id) IN (SELECT ...)；
+    插入跳过已存在的排班（如发布后又手动排过），由批量 INSERT 一次写入。
+    排班表始终保存当前生效的排班，读取方无需经过版本指针，因此发布与回滚的开销与增量大小成正比。
+    """
+    changes = ScheduleVersionChange.__table__
+    assignments = ScheduleAssignment.__table__
+    pair = tuple_(assignments.c.shift_id, assignments.c.user_id)
+    defer_overlap_check(db)
+
+    deleted = db.execute(
+        delete(assignments).where(
+            pair.in_(
+                select(changes.c.shift_id, changes.c.user_id).where(
+                    changes.c.version_id == version_id,
+                    changes.c.action == delete_action,
+                )
+            )
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    missing = db.execute(
+        select(changes.c.shift_id, changes.c.user_id, changes.c.is_primary).where(
+            changes.c.version_id == version_id,
+            changes.c.action == insert_action,
+            ~select(assignments.c.id).where(
+                assignments.c.shift_id == changes.c.shift_id,
+                assignments.c.user_id == changes.c.user_id,
+            ).exists(),
+        )
+    ).all()
+    try:
+        inserted = bulk_insert_assignments(db, [
+            PlannedAssignment(user_id=row.user_id, shift_id=row.shift_id, is_primary=row.is_primary)
+            for row in missing
+        ])
+    except IntegrityError as exc:
+        if is_overlap_violation(exc):
+            raise VersionError(status.HTTP_409_CONFLICT, OVERLAP_DETAIL)
+        raise
+    return len(inserted), deleted
+
+
+def publish(db: Session, version: ScheduleVersion) -> Tuple[int, int]:
+    """
+    发布草稿版本：应用其增量并把版本指针移到该版本，返回 (插入行数, 删除行数)
+
+    只能发布以当前已发布版本为基线、且窗口内排班自创建以来未被改动的草稿，否则增量已过时，返回 409。
+    指针的移动只是两行状态的更新；数据的写入与增量大小成正比，而不是与排班总量成正比。
+    调用方负责持有日期范围锁并提交事务，校验和在锁内比较。
+    """
+    if version.status != "draft":
+        raise VersionError(status.HTTP_400_BAD_REQUEST, "Only draft versions can be published")
+    head = published_version(db, for_update=True)
+    if (head.id if head else None) != version.base_version_id:
+        raise VersionError(status.HTTP_409_CONFLICT, "Version is based on a schedule that is no longer published")
+    # 迁移前创建的草稿没有校验和，不做检查
+    if version.window_checksum is not None and window_checksum(db, _version_window(version)) != version.window_checksum:
+        raise VersionError(status.HTTP_409_CONFLICT, DRIFT_DETAIL)
+
+    counts = _apply(db, version.id, ADD, REMOVE)
+    if head is not None:
+        head.status = "archived"
+        # 先写入旧指针的状态，避免部分唯一索引上同时出现两个已发布版本
+        db.flush()
+    version.status = "published"
+    version.published_at = datetime.now(timezone.utc)
+    # 记录发布后的窗口，回滚时据此检查发布之后是否又有改动
+    version.published_checksum = window_checksum(db, _version_window(version))
+    db.flush()
+    return counts
+
+
+def rollback(db: Session) -> Tuple[ScheduleVersion, Optional[ScheduleVersion], int, int]:
+    """
+    回滚当前已发布的版本：反向应用其增量，指针退回到其基线版本
+
+    发布之后窗口内的排班又被改动过时返回 409，避免反向增量覆盖或破坏这些改动。
+    被回滚的版本恢复为草稿，之后可以重新发布。
+    返回 (被回滚的版本, 新的已发布版本, 插入行数, 删除行数)。调用方负责持有日期范围锁并提交事务。
+    """
+    head = published_version(db, for_update=True)
+    if head is None:
+        raise VersionError(status.HTTP_404_NOT_FOUND, "No published schedule version to roll back")
+    # 迁移前发布的版本没有校验和，不做检查
+    if head.published_checksum is not None and window_checksum(db, _version_window(head)) != head.published_checksum:
+        raise VersionError(status.HTTP_409_CONFLICT, ROLLBACK_DRIFT_DETAIL)
+
+    inserted, deleted = _apply(db, head.id, REMOVE, ADD)
+    head.status = "draft"
+    head.published_at = None
+    head.published_checksum = None
+    db.flush()
+    base = db.get(ScheduleVersion, head.base_version_id) if head.base_version_id else None
+    if base is not None:
+        base.status = "published"
+        base.published_at = datetime.now(timezone.utc)
+        db.flush()
+    return head, base, inserted, deleted
+
+
+def version_changes(db: Session, version_id: uuid.UUID) -> List[ScheduleVersionChange]:
+    """
+    版本的全部增量，按班次时间排序
+    """
+    return db.query(ScheduleVersionChange).join(Shift).filter(
+        ScheduleVersionChange.version_id == version_id
+    ).order_by(Shift.start_time, ScheduleVersionChange.action).all()
@@ -1,6 +1,6 @@
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel, EmailStr, UUID4
-from datetime import datetime
+from datetime import datetime, date, time
 
 
 # 用户相关模型
@@ -72,6 +72,7 @@ class ShiftUpdate(BaseModel):
 
 class ShiftInDBBase(ShiftBase):
     id: UUID4
+    template_id: Optional[UUID4] = None
     created_at: datetime
     updated_at: datetime
 
@@ -83,6 +84,119 @@ class Shift(ShiftInDBBase):
     pass
 
 
+# 班次模板相关模型
+class ShiftTemplateBase(BaseModel):
+    name: str
+    shift_family: str
+    start_time: time
+    duration_minutes: int
+    weekdays: int = 0b1111111
+    valid_from: date
+    valid_until: Optional[date] = None
+    workday_required_staff: int = 1
+    workday_required_mentors: int = 0
+    holiday_required_staff: int = 1
+    holiday_required_mentors: int = 0
+    is_active: bool = True
+
+
+class ShiftTemplateCreate(ShiftTemplateBase):
+    pass
+
+
+class ShiftTemplateUpdate(BaseModel):
+    name: Optional[str] = None
+    shift_family: Optional[str] = None
+    start_time: Optional[time] = None
+    duration_minutes: Optional[int] = None
+    weekdays: Optional[int] = None
+    valid_from: Optional[date] = None
+    valid_until: Optional[date] = None
+    workday_required_staff: Optional[int] = None
+    workday_required_mentors: Optional[int] = None
+    holiday_required_staff: Optional[int] = None
+    holiday_required_mentors: Optional[int] = None
+    is_active: Optional[bool] = None
+
+
+class ShiftTemplateInDBBase(ShiftTemplateBase):
+    id: UUID4
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class ShiftTemplate(ShiftTemplateInDBBase):
+    pass
+
+
+class ShiftTemplateExpand(BaseModel):
+    start_date: date
+    end_date: date
+    # 为空时展开所有启用的模板
+    template_ids: Optional[List[UUID4]] = None
+    # 在节假日日历之外额外指定的节假日，以及周末调休上班的日期
+    holidays: List[date] = []
+    workdays: List[date] = []
+
+
+class ShiftTemplateExpansion(BaseModel):
+    created: int
+    skipped: int
+
+
+# 节假日相关模型
+class HolidayBase(BaseModel):
+    date: date
+    name: str
+    is_workday: bool = False
+
+
+class HolidayCreate(HolidayBase):
+    pass
+
+
+class HolidayInDBBase(HolidayBase):
+    id: UUID4
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class Holiday(HolidayInDBBase):
+    pass
+
+
+# 请假相关模型
+class StaffLeaveBase(BaseModel):
+    user_id: UUID4
+    start_time: datetime
+    end_time: datetime
+    kind: str = "leave"
+    reason: Optional[str] = None
+
+
+class StaffLeaveCreate(StaffLeaveBase):
+    pass
+
+
+class StaffLeaveInDBBase(StaffLeaveBase):
+    id: UUID4
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class StaffLeave(StaffLeaveInDBBase):
+    pass
+
+
 # 排班分配相关模型
 class ScheduleAssignmentBase(BaseModel):
     user_id: UUID4
@@ -112,6 +226,151 @@ class ScheduleAssignment(ScheduleAssignmentInDBBase):
     shift: Shift
 
 
+# 排班生成任务
+class ScheduleJob(BaseModel):
+    id: str
+    status: str
+    phase: str
+    progress: float
+    params: Dict[str, str] = {}
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    timings: Dict[str, float] = {}
+    error: Optional[str] = None
+    improvements: List[Dict[str, float]] = []
+    result: Optional[List[ScheduleAssignment]] = None
+
+    class Config:
+        orm_mode = True
+
+
+# 试运行差异
+class ScheduleDiffEntry(BaseModel):
+    shift_id: UUID4
+    user_id: UUID4
+
+
+class ScheduleMove(BaseModel):
+    user_id: UUID4
+    from_shift_id: UUID4
+    to_shift_id: UUID4
+
+
+class ScheduleScore(BaseModel):
+    shortfall: int
+    mentor_shortfall: int
+    overstaffed: int
+    ineligible: int
+    unpaired_trainees: int
+    load_variance: float
+    type_variance: float = 0.0
+    violations: int
+    objective: float
+
+    class Config:
+        orm_mode = True
+
+
+class ScheduleDiff(BaseModel):
+    # 均为必填，避免作为联合响应模型的一员时误匹配任务对象
+    added: List[ScheduleDiffEntry]
+    removed: List[ScheduleDiffEntry]
+    moved: List[ScheduleMove]
+    unchanged: int
+    unfilled: Dict[UUID4, int] = {}
+    score: Optional[ScheduleScore] = None
+    strategy: Optional[str] = None
+
+
+# 增量修复结果
+class ScheduleRepair(BaseModel):
+    affected_shifts: List[UUID4] = []
+    removed: List[UUID4] = []
+    added: List[ScheduleAssignment] = []
+    unfilled: Dict[UUID4, int] = {}
+
+
+# 排班版本
+class ScheduleVersionChange(BaseModel):
+    shift_id: UUID4
+    user_id: UUID4
+    action: str
+    is_primary: bool = True
+
+    class Config:
+        orm_mode = True
+
+
+class ScheduleVersion(BaseModel):
+    id: UUID4
+    name: str
+    status: str
+    start_date: date
+    end_date: date
+    base_version_id: Optional[UUID4] = None
+    added_count: int = 0
+    removed_count: int = 0
+    created_by: Optional[UUID4] = None
+    created_at: datetime
+    published_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ScheduleVersionDetail(ScheduleVersion):
+    changes: List[ScheduleVersionChange] = []
+
+
+class ScheduleVersionPublish(BaseModel):
+    # 操作后的已发布版本，回滚到最初状态时为空
+    published_version_id: Optional[UUID4] = None
+    version: ScheduleVersion
+    inserted: int = 0
+    deleted: int = 0
+
+
+# 覆盖率报告
+class ShiftCoverage(BaseModel):
+    shift_id: UUID4
+    start_time: datetime
+    end_time: datetime
+    shift_type: str
+    required_staff: int
+    staffed: int
+    required_mentors: int
+    mentors: int
+    shortfall: int = 0
+    excess: int = 0
+    mentor_shortfall: int = 0
+
+
+class CoverageReport(BaseModel):
+    understaffed: int = 0
+    overstaffed: int = 0
+    missing_mentors: int = 0
+    shifts: List[ShiftCoverage] = []
+
+
+# 公平性统计
+class FairnessCount(BaseModel):
+    shift_count: int
+    hours: float
+
+
+class FairnessStats(BaseModel):
+    user_id: UUID4
+    username: str
+    name: str
+    role: str
+    total_shifts: int = 0
+    total_hours: float = 0.0
+    night_shifts: int = 0
+    holiday_shifts: int = 0
+    by_type: Dict[str, FairnessCount] = {}
+
+
 # 调班申请相关模型
 class ShiftSwapRequestBase(BaseModel):
     requester_id: UUID4
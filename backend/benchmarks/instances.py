@@ -0,0 +1,143 @@
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+import random
+import uuid
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Shift, User
+from app.scheduler.problem import ScheduleProblem, ShiftSlot, StaffMember
+
+# 基准实例的起始日期，固定以保证可复现
+EPOCH = date(2030, 1, 7)
+
+
+@dataclass
+class InstanceSpec:
+    """
+    合成排班实例的参数
+
+    role_mix 为 (白班, 夜班, 管理员) 的人数比例；每个非管理员以 trainee_ratio
+    的概率成为新人，师傅从同角色的非新人中随机选择。
+    """
+
+    name: str
+    users: int
+    days: int
+    staff_per_shift: int
+    mentors_per_shift: int = 1
+    role_mix: Tuple[float, float, float] = (0.48, 0.48, 0.04)
+    trainee_ratio: float = 0.15
+    min_rest_hours: int = 8
+    seed: int = 0
+
+    @property
+    def start_date(self) -> date:
+        return EPOCH
+
+    @property
+    def end_date(self) -> date:
+        return EPOCH + timedelta(days=self.days - 1)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+PRESETS: Dict[str, InstanceSpec] = {
+    spec.name: spec
+    for spec in (
+        InstanceSpec("tiny", users=8, days=7, staff_per_shift=2),
+        InstanceSpec("small", users=24, days=14, staff_per_shift=4),
+        InstanceSpec("medium", users=120, days=30, staff_per_shift=10, mentors_per_shift=2),
+        InstanceSpec("large", users=500, days=90, staff_per_shift=20, mentors_per_shift=5),
+        InstanceSpec("xlarge", users=2000, days=180, staff_per_shift=60, mentors_per_shift=10),
+    )
+}
+
+
+def _staff(spec: InstanceSpec, rng: random.Random) -> List[StaffMember]:
+    day, night, _ = spec.role_mix
+    total = sum(spec.role_mix)
+    members: List[StaffMember] = []
+    for i in range(spec.users):
+        r = rng.random() * total
+        role = "day_shift" if r < day else "night_shift" if r < day + night else "admin"
+        members.append(StaffMember(id=uuid.UUID(int=rng.getrandbits(128), version=4), role=role))
+
+    mentors: Dict[str, List[StaffMember]] = {}
+    for member in members:
+        if member.role != "admin" and rng.random() < spec.trainee_ratio:
+            member.is_trainee = True
+    for member in members:
+        if not member.is_trainee:
+            mentors.setdefault(member.role, []).append(member)
+    for member in members:
+        if member.is_trainee and mentors.get(member.role):
+            member.mentor_id = rng.choice(mentors[member.role]).id
+    return members
+
+
+def _slots(spec: InstanceSpec, rng: random.Random) -> List[ShiftSlot]:
+    slots: List[ShiftSlot] = []
+    start = datetime.combine(spec.start_date, datetime.min.time(), tzinfo=timezone.utc)
+    for d in range(spec.days):
+        day = start + timedelta(days=d)
+        kind = "HOLIDAY" if day.weekday() >= 5 else "WORKDAY"
+        for family, hour in (("DAY", 8), ("NIGHT", 20)):
+            begin = day + timedelta(hours=hour)
+            slots.append(ShiftSlot(
+                id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                start_time=begin,
+                end_time=begin + timedelta(hours=12),
+                shift_type=f"{family}_{kind}",
+                required_staff=spec.staff_per_shift,
+                required_mentors=spec.mentors_per_shift,
+            ))
+    return slots
+
+
+def make_problem(spec: InstanceSpec) -> ScheduleProblem:
+    """
+    生成内存中的排班问题，相同参数得到相同实例
+    """
+    rng = random.Random(spec.seed)
+    staff = _staff(spec, rng)
+    return ScheduleProblem(
+        shifts=_slots(spec, rng),
+        staff=staff,
+        min_rest=timedelta(hours=spec.min_rest_hours),
+    )
+
+
+def seed_database(db: Session, problem: ScheduleProblem) -> None:
+    """
+    把内存实例写入数据库，供端到端基准使用
+    """
+    db.add_all([
+        User(
+            id=member.id,
+            username=f"bench-{member.id.hex[:12]}",
+            password_hash="-",
+            name=f"bench-{member.id.hex[:12]}",
+            email=f"{member.id.hex[:12]}@bench.example.com",
+            role=member.role,
+            is_trainee=member.is_trainee,
+            mentor_id=member.mentor_id,
+            is_active=True,
+        )
+        for member in problem.staff
+    ])
+    db.flush()
+    db.add_all([
+        Shift(
+            id=slot.id,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+            shift_type=slot.shift_type,
+            required_staff=slot.required_staff,
+            required_mentors=slot.required_mentors,
+        )
+        for slot in problem.shifts
+    ])
+    db.commit()
@@ -0,0 +1,179 @@
+"""
+排班求解基准
+
+在合成实例上运行所有求解策略，记录耗时、内存峰值、SQL语句数与解的质量，
+结果写入 JSON 计分板。只依赖内存实例与内存 SQLite，不需要外部服务。
+
+用法（在 backend 目录下）：
+
+    python -m benchmarks.run --instances tiny,small,medium --output benchmarks/scoreboard.json
+"""
+import os
+
+# 必须在导入 app 之前设置，使应用的引擎指向 SQLite 而不是 PostgreSQL
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db.session import Base
+from app.scheduler.matrix import ScheduleMatrices
+from app.scheduler.problem import ScheduleProblem, Solution
+from app.scheduler.service import generate
+from app.scheduler.strategies import STRATEGIES, problem_size
+from benchmarks.instances import PRESETS, InstanceSpec, make_problem, seed_database
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    # 模型使用 PostgreSQL 的 UUID 类型，SQLite 下以定长字符串存储
+    return "CHAR(32)"
+
+
+def rest_violations(problem: ScheduleProblem, solution: Solution) -> int:
+    """
+    独立于求解器复核：同一用户相邻班次重叠或间隔小于 min_rest 的次数
+    """
+    slots = {slot.id: slot for slot in problem.shifts}
+    by_user: Dict = defaultdict(list)
+    for item in solution.assignments:
+        slot = slots[item.shift_id]
+        by_user[item.user_id].append((slot.start_time, slot.end_time))
+    count = 0
+    for intervals in by_user.values():
+        intervals.sort()
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            if start < end + problem.min_rest:
+                count += 1
+    return count
+
+
+def quality(problem: ScheduleProblem, solution: Solution, matrices: ScheduleMatrices) -> Dict:
+    x = matrices.encode(solution.assignments)
+    score = matrices.evaluate(x)
+    required = int(matrices.required.sum()) or 1
+    required_mentors = int(matrices.required_mentors.sum()) or 1
+    load = x.sum(axis=1)[matrices.active_rows]
+    return {
+        "objective": score.objective,
+        "coverage": 1 - score.shortfall / required,
+        "mentor_coverage": 1 - score.mentor_shortfall / required_mentors,
+        "shortfall": score.shortfall,
+        "load_variance": score.load_variance,
+        "load_spread": int(load.max() - load.min()) if load.size else 0,
+        "violations": score.violations,
+        "rest_violations": rest_violations(problem, solution),
+    }
+
+
+def run_in_memory(problem: ScheduleProblem, strategy: str, budget: float, repeat: int) -> Dict:
+    solver = STRATEGIES[strategy]
+    wall_times: List[float] = []
+    solution = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        solution = solver.solve(problem, time.monotonic() + budget)
+        wall_times.append(time.perf_counter() - started)
+
+    # 内存峰值单独测量，tracemalloc 会拖慢执行
+    tracemalloc.start()
+    solver.solve(problem, time.monotonic() + budget)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_time": min(wall_times),
+        "peak_memory_bytes": peak,
+        "solution": solution,
+    }
+
+
+def run_database(spec: InstanceSpec, problem: ScheduleProblem, strategy: str, budget: float) -> Dict:
+    """
+    端到端：在内存 SQLite 中写入实例，统计一次生成的耗时与SQL语句数
+    """
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    db = Session()
+    try:
+        seed_database(db, problem)
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+        started = time.perf_counter()
+        generate(db, spec.start_date, spec.end_date, time_budget=budget, strategy=strategy)
+        db.commit()
+        return {"wall_time": time.perf_counter() - started, "queries": len(statements)}
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="排班求解基准")
+    parser.add_argument("--instances", default="tiny,small,medium,large", help="逗号分隔的预设实例名")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="逗号分隔的策略名")
+    parser.add_argument("--budget", type=float, default=settings.SCHEDULER_LATENCY_TARGET_SECONDS,
+                        help="每次求解的时间预算（秒）")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数，取最小值")
+    parser.add_argument("--exact-max-size", type=int, default=settings.SCHEDULER_EXACT_MAX_SIZE * 4,
+                        help="超过该规模（人员 × 班次）时跳过精确求解")
+    parser.add_argument("--no-db", action="store_true", help="跳过 SQLite 端到端测量")
+    parser.add_argument("--output", default="benchmarks/scoreboard.json")
+    args = parser.parse_args(argv)
+
+    scoreboard = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "budget": args.budget,
+        "results": [],
+    }
+    for name in args.instances.split(","):
+        spec = PRESETS[name]
+        problem = make_problem(spec)
+        matrices = ScheduleMatrices(problem)
+        size = problem_size(problem)
+        for strategy in args.strategies.split(","):
+            entry = {"instance": spec.to_dict(), "size": size, "strategy": strategy}
+            if strategy == "exact" and size > args.exact_max_size:
+                entry["skipped"] = "instance too large for exact solver"
+                scoreboard["results"].append(entry)
+                continue
+            measured = run_in_memory(problem, strategy, args.budget, args.repeat)
+            entry.update(wall_time=measured["wall_time"], peak_memory_bytes=measured["peak_memory_bytes"])
+            entry["quality"] = quality(problem, measured["solution"], matrices)
+            if not args.no_db:
+                entry["database"] = run_database(spec, problem, strategy, args.budget)
+            scoreboard["results"].append(entry)
+            print(
+                f"{name:8s} {strategy:13s} {entry['wall_time']:8.3f}s "
+                f"{entry['peak_memory_bytes'] / 2 ** 20:8.1f}MiB "
+                f"objective={entry['quality']['objective']:.3f} "
+                f"coverage={entry['quality']['coverage']:.3f} "
+                f"queries={entry.get('database', {}).get('queries', '-')}"
+            )
+
+    with open(args.output, "w") as f:
+        json.dump(scoreboard, f, indent=2)
+    return scoreboard
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.db.session import Base
-from app.models.models import User, Shift, ScheduleAssignment, ShiftSwapRequest, Notification, SystemSetting
+from app.models.models import User, Shift, ShiftTemplate, Holiday, ScheduleAssignment, ShiftSwapRequest, Notification, SystemSetting, IdempotencyKey, FairnessLedger, ScheduleVersion, ScheduleVersionChange, StaffLeave
 from app.core.config import settings
 
 # this is the Alembic Config object, which provides
@@ -31,6 +31,13 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# 由迁移和触发器维护、未映射到模型的数据库对象，autogenerate 时忽略
+UNMAPPED_OBJECTS = {"shift_period", "ix_schedule_assignments_shift_period"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (reflected and compare_to is None and name in UNMAPPED_OBJECTS)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -55,6 +62,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -76,7 +84,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
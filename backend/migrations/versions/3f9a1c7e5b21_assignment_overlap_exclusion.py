@@ -0,0 +1,95 @@
+"""Assignment shift period and overlap exclusion constraint
+
+Revision ID: 3f9a1c7e5b21
+Revises: 08c40233d114
+Create Date: 2026-10-18 09:12:40.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c7e5b21'
+down_revision: Union[str, None] = '08c40233d114'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # uuid 的相等比较需要 btree_gist 才能与范围类型一起放入 GiST 索引
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    # 冗余存储班次的时间区间 [start_time, end_time)，由触发器维护，不映射到ORM
+    op.add_column('schedule_assignments', sa.Column('shift_period', postgresql.TSTZRANGE(), nullable=True))
+    op.execute("""
+        UPDATE schedule_assignments AS sa
+        SET shift_period = tstzrange(s.start_time, s.end_time, '[)')
+        FROM shifts AS s
+        WHERE s.id = sa.shift_id
+    """)
+    op.alter_column('schedule_assignments', 'shift_period', nullable=False)
+
+    # 插入排班或更换班次时填充区间
+    op.execute("""
+        CREATE FUNCTION schedule_assignments_set_shift_period() RETURNS trigger AS $$
+        BEGIN
+            SELECT tstzrange(s.start_time, s.end_time, '[)') INTO NEW.shift_period
+            FROM shifts AS s
+            WHERE s.id = NEW.shift_id;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER schedule_assignments_shift_period
+        BEFORE INSERT OR UPDATE OF shift_id ON schedule_assignments
+        FOR EACH ROW EXECUTE FUNCTION schedule_assignments_set_shift_period()
+    """)
+
+    # 班次时间修改时同步其所有排班的区间
+    op.execute("""
+        CREATE FUNCTION shifts_sync_assignment_period() RETURNS trigger AS $$
+        BEGIN
+            UPDATE schedule_assignments
+            SET shift_period = tstzrange(NEW.start_time, NEW.end_time, '[)')
+            WHERE shift_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER shifts_assignment_period
+        AFTER UPDATE OF start_time, end_time ON shifts
+        FOR EACH ROW
+        WHEN (OLD.start_time IS DISTINCT FROM NEW.start_time OR OLD.end_time IS DISTINCT FROM NEW.end_time)
+        EXECUTE FUNCTION shifts_sync_assignment_period()
+    """)
+
+    # 按时间点 / 时间段查询在岗人员
+    op.create_index(
+        'ix_schedule_assignments_shift_period',
+        'schedule_assignments',
+        ['shift_period'],
+        postgresql_using='gist',
+    )
+    # 同一用户的排班区间不得重叠；可延迟，以便调班时在同一事务内交换用户
+    op.execute("""
+        ALTER TABLE schedule_assignments
+        ADD CONSTRAINT schedule_assignments_no_overlap
+        EXCLUDE USING gist (user_id WITH =, shift_period WITH &&)
+        DEFERRABLE INITIALLY IMMEDIATE
+    """)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE schedule_assignments DROP CONSTRAINT schedule_assignments_no_overlap")
+    op.drop_index('ix_schedule_assignments_shift_period', table_name='schedule_assignments')
+    op.execute("DROP TRIGGER shifts_assignment_period ON shifts")
+    op.execute("DROP FUNCTION shifts_sync_assignment_period()")
+    op.execute("DROP TRIGGER schedule_assignments_shift_period ON schedule_assignments")
+    op.execute("DROP FUNCTION schedule_assignments_set_shift_period()")
+    op.drop_column('schedule_assignments', 'shift_period')
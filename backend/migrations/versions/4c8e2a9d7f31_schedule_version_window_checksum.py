@@ -0,0 +1,27 @@
+"""Schedule version window checksum
+
+Revision ID: 4c8e2a9d7f31
+Revises: 9b1e4f7a2c60
+Create Date: 2026-10-19 14:36:02.517930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e2a9d7f31'
+down_revision: Union[str, None] = '9b1e4f7a2c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 已有的草稿没有校验和，发布时跳过检查
+    op.add_column('schedule_versions', sa.Column('window_checksum', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('schedule_versions', 'window_checksum')
@@ -0,0 +1,27 @@
+"""Schedule version published checksum
+
+Revision ID: 7a3d5e1c9b84
+Revises: 4c8e2a9d7f31
+Create Date: 2026-10-20 09:48:17.362054
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d5e1c9b84'
+down_revision: Union[str, None] = '4c8e2a9d7f31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 已发布的版本没有校验和，回滚时跳过检查
+    op.add_column('schedule_versions', sa.Column('published_checksum', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('schedule_versions', 'published_checksum')
@@ -0,0 +1,39 @@
+"""Idempotency keys per endpoint, pending records
+
+Revision ID: 9b1e4f7a2c60
+Revises: f2b7c9d40e18
+Create Date: 2026-10-19 10:12:44.108395
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4f7a2c60'
+down_revision: Union[str, None] = 'f2b7c9d40e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+    op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['key', 'endpoint'])
+    # 第一次请求处理完成前记录为未完成状态
+    op.alter_column('idempotency_keys', 'status_code', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('idempotency_keys', 'response', existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM idempotency_keys WHERE status_code IS NULL")
+    op.alter_column('idempotency_keys', 'response', existing_type=sa.Text(), nullable=False)
+    op.alter_column('idempotency_keys', 'status_code', existing_type=sa.Integer(), nullable=False)
+    # 同一个键只保留最早的记录
+    op.execute(
+        "DELETE FROM idempotency_keys a USING idempotency_keys b "
+        "WHERE a.key = b.key AND (a.created_at, a.endpoint) > (b.created_at, b.endpoint)"
+    )
+    op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+    op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['key'])
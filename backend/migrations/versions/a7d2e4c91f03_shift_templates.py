@@ -0,0 +1,54 @@
+"""Shift templates
+
+Revision ID: a7d2e4c91f03
+Revises: 3f9a1c7e5b21
+Create Date: 2026-10-18 10:03:17.240381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e4c91f03'
+down_revision: Union[str, None] = '3f9a1c7e5b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('shift_templates',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('shift_family', sa.String(length=10), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('weekdays', sa.Integer(), nullable=True),
+    sa.Column('valid_from', sa.Date(), nullable=False),
+    sa.Column('valid_until', sa.Date(), nullable=True),
+    sa.Column('workday_required_staff', sa.Integer(), nullable=True),
+    sa.Column('workday_required_mentors', sa.Integer(), nullable=True),
+    sa.Column('holiday_required_staff', sa.Integer(), nullable=True),
+    sa.Column('holiday_required_mentors', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint("shift_family IN ('DAY', 'NIGHT')"),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.add_column('shifts', sa.Column('template_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'shifts_template_id_fkey', 'shifts', 'shift_templates',
+        ['template_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_unique_constraint('shifts_template_id_start_time_key', 'shifts', ['template_id', 'start_time'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('shifts_template_id_start_time_key', 'shifts', type_='unique')
+    op.drop_constraint('shifts_template_id_fkey', 'shifts', type_='foreignkey')
+    op.drop_column('shifts', 'template_id')
+    op.drop_table('shift_templates')
@@ -0,0 +1,139 @@
+"""Fairness ledger
+
+Revision ID: b83f2d6e0a45
+Revises: e5a90c3b7d16
+Create Date: 2026-10-18 15:40:12.093516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83f2d6e0a45'
+down_revision: Union[str, None] = 'e5a90c3b7d16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 把 (user_id, shift_type, 班次数增量, 工时增量) 的集合累加进台账
+UPSERT = """
+    INSERT INTO fairness_ledger (user_id, shift_type, shift_count, hours, updated_at)
+    SELECT d.user_id, d.shift_type, sum(d.sign), sum(d.sign * d.hours), now()
+    FROM ({deltas}) AS d
+    GROUP BY d.user_id, d.shift_type
+    ON CONFLICT (user_id, shift_type) DO UPDATE
+    SET shift_count = fairness_ledger.shift_count + EXCLUDED.shift_count,
+        hours = fairness_ledger.hours + EXCLUDED.hours,
+        updated_at = EXCLUDED.updated_at
+"""
+
+HOURS = "EXTRACT(EPOCH FROM (s.end_time - s.start_time)) / 3600.0"
+
+
+# 更换了用户或班次的行（如调班）更新前后的值；只改其他列的更新不影响台账
+REASSIGNED = """
+    (SELECT {side}.* FROM old_rows AS o JOIN new_rows AS n ON n.id = o.id
+     WHERE (o.user_id, o.shift_id) IS DISTINCT FROM (n.user_id, n.shift_id))
+"""
+REASSIGNED_OLD = REASSIGNED.format(side="o")
+REASSIGNED_NEW = REASSIGNED.format(side="n")
+
+
+def _deltas(rows: str, sign: int) -> str:
+    return f"""
+        SELECT r.user_id, s.shift_type, {sign} AS sign, {HOURS} AS hours
+        FROM {rows} AS r JOIN shifts AS s ON s.id = r.shift_id
+    """
+
+# 班次改时间或类型时，其所有排班从旧类型、旧工时移到新的
+SHIFT_CHANGED = """
+    SELECT a.user_id, OLD.shift_type AS shift_type, -1 AS sign,
+           EXTRACT(EPOCH FROM (OLD.end_time - OLD.start_time)) / 3600.0 AS hours
+    FROM schedule_assignments AS a WHERE a.shift_id = NEW.id
+    UNION ALL
+    SELECT a.user_id, NEW.shift_type, 1,
+           EXTRACT(EPOCH FROM (NEW.end_time - NEW.start_time)) / 3600.0
+    FROM schedule_assignments AS a WHERE a.shift_id = NEW.id
+"""
+
+
+def upgrade() -> None:
+    op.create_table('fairness_ledger',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('shift_type', sa.String(length=20), nullable=False),
+    sa.Column('shift_count', sa.Integer(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'shift_type')
+    )
+    op.execute(UPSERT.format(deltas=_deltas("schedule_assignments", 1)))
+
+    # 排班的增删改以语句级触发器按转换表整体累加，批量写入只执行一次聚合
+    op.execute(f"""
+        CREATE FUNCTION fairness_ledger_track_assignments() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {UPSERT.format(deltas=_deltas("new_rows", 1))};
+            ELSIF TG_OP = 'DELETE' THEN
+                {UPSERT.format(deltas=_deltas("old_rows", -1))};
+            ELSE
+                {UPSERT.format(deltas=_deltas(REASSIGNED_OLD, -1) + " UNION ALL " + _deltas(REASSIGNED_NEW, 1))};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # 带转换表的触发器只能对应一种事件
+    op.execute("""
+        CREATE TRIGGER fairness_ledger_insert
+        AFTER INSERT ON schedule_assignments
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION fairness_ledger_track_assignments()
+    """)
+    op.execute("""
+        CREATE TRIGGER fairness_ledger_delete
+        AFTER DELETE ON schedule_assignments
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION fairness_ledger_track_assignments()
+    """)
+    op.execute("""
+        CREATE TRIGGER fairness_ledger_update
+        AFTER UPDATE ON schedule_assignments
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION fairness_ledger_track_assignments()
+    """)
+
+    # 班次改时间或重新分类（如节假日变更）
+    op.execute(f"""
+        CREATE FUNCTION fairness_ledger_track_shifts() RETURNS trigger AS $$
+        BEGIN
+            {UPSERT.format(deltas=SHIFT_CHANGED)};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER fairness_ledger_shifts
+        AFTER UPDATE OF start_time, end_time, shift_type ON shifts
+        FOR EACH ROW
+        WHEN (
+            OLD.start_time IS DISTINCT FROM NEW.start_time
+            OR OLD.end_time IS DISTINCT FROM NEW.end_time
+            OR OLD.shift_type IS DISTINCT FROM NEW.shift_type
+        )
+        EXECUTE FUNCTION fairness_ledger_track_shifts()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER fairness_ledger_shifts ON shifts")
+    op.execute("DROP FUNCTION fairness_ledger_track_shifts()")
+    op.execute("DROP TRIGGER fairness_ledger_update ON schedule_assignments")
+    op.execute("DROP TRIGGER fairness_ledger_delete ON schedule_assignments")
+    op.execute("DROP TRIGGER fairness_ledger_insert ON schedule_assignments")
+    op.execute("DROP FUNCTION fairness_ledger_track_assignments()")
+    op.drop_table('fairness_ledger')
@@ -0,0 +1,35 @@
+"""Holiday calendar
+
+Revision ID: c41e8b5d2a97
+Revises: a7d2e4c91f03
+Create Date: 2026-10-18 11:26:51.904412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8b5d2a97'
+down_revision: Union[str, None] = 'a7d2e4c91f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('holidays',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('is_workday', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('holidays')
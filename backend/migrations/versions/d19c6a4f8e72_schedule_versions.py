@@ -0,0 +1,59 @@
+"""Schedule versions
+
+Revision ID: d19c6a4f8e72
+Revises: b83f2d6e0a45
+Create Date: 2026-10-18 17:21:45.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd19c6a4f8e72'
+down_revision: Union[str, None] = 'b83f2d6e0a45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('schedule_versions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('base_version_id', sa.UUID(), nullable=True),
+    sa.Column('added_count', sa.Integer(), nullable=False),
+    sa.Column('removed_count', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('published_at', sa.DateTime(timezone=True), nullable=True),
+    sa.CheckConstraint("status IN ('draft', 'published', 'archived')"),
+    sa.ForeignKeyConstraint(['base_version_id'], ['schedule_versions.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # 同一时刻至多一个已发布版本
+    op.create_index('uq_schedule_versions_published', 'schedule_versions', ['status'], unique=True,
+                    postgresql_where=sa.text("status = 'published'"))
+    op.create_table('schedule_version_changes',
+    sa.Column('version_id', sa.UUID(), nullable=False),
+    sa.Column('shift_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('action', sa.String(length=10), nullable=False),
+    sa.Column('is_primary', sa.Boolean(), nullable=True),
+    sa.CheckConstraint("action IN ('add', 'remove')"),
+    sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['version_id'], ['schedule_versions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('version_id', 'shift_id', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('schedule_version_changes')
+    op.drop_index('uq_schedule_versions_published', table_name='schedule_versions')
+    op.drop_table('schedule_versions')
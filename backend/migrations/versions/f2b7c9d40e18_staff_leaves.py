@@ -0,0 +1,43 @@
+"""Staff leaves
+
+Revision ID: f2b7c9d40e18
+Revises: d19c6a4f8e72
+Create Date: 2026-10-18 18:36:09.770342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c9d40e18'
+down_revision: Union[str, None] = 'd19c6a4f8e72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('staff_leaves',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=True),
+    sa.Column('reason', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint("kind IN ('leave', 'unavailable')"),
+    sa.CheckConstraint('end_time > start_time'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_staff_leaves_user_id'), 'staff_leaves', ['user_id'], unique=False)
+    op.create_index('ix_staff_leaves_period', 'staff_leaves', ['start_time', 'end_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_staff_leaves_period', table_name='staff_leaves')
+    op.drop_index(op.f('ix_staff_leaves_user_id'), table_name='staff_leaves')
+    op.drop_table('staff_leaves')
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+# 必须在导入 app 之前设置，使应用的两个引擎都指向临时的 SQLite 文件
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+from app.api import auth
+from app.db.session import Base, SessionLocal, engine
+from app.main import app
+from app.models.models import User
+from benchmarks.instances import PRESETS, make_problem, seed_database
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    # 模型使用 PostgreSQL 的 UUID 类型，SQLite 下以定长字符串存储
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def problem():
+    return make_problem(PRESETS["small"])
+
+
+@pytest.fixture
+def seeded(db, problem):
+    """
+    把 small 实例的人员与班次写入数据库
+    """
+    seed_database(db, problem)
+    return problem
+
+
+@pytest.fixture
+def admin(db):
+    user = User(username="admin", password_hash="-", name="admin", email="admin@example.com", role="admin")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    return user
+
+
+@pytest.fixture
+def client(db, admin):
+    dependencies = (
+        auth.get_current_user, auth.get_current_active_user, auth.get_current_admin_user,
+        auth.get_current_user_sync, auth.get_current_active_user_sync, auth.get_current_admin_user_sync,
+    )
+    for dependency in dependencies:
+        app.dependency_overrides[dependency] = lambda: admin
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from app.scheduler.engine import solve
+from app.scheduler.exact import solve_exact
+from app.scheduler.local_search import improve
+from app.scheduler.matrix import ScheduleMatrices
+from app.scheduler.strategies import STRATEGIES
+from benchmarks.instances import PRESETS, make_problem
+
+
+@pytest.mark.parametrize("preset", ["tiny", "small"])
+def test_exact_is_at_least_as_good_as_heuristics(preset):
+    problem = make_problem(PRESETS[preset])
+    matrices = ScheduleMatrices(problem)
+
+    def objective(solution):
+        return matrices.evaluate(matrices.encode(solution.assignments)).objective
+
+    greedy = solve(problem)
+    searched = improve(problem, greedy, time.monotonic() + 2)
+    exact = solve_exact(problem, time.monotonic() + 10)
+    assert exact is not None
+    assert matrices.evaluate(matrices.encode(exact.assignments)).violations == 0
+    assert objective(exact) <= objective(searched) + 1e-6
+    assert objective(exact) <= objective(greedy) + 1e-6
+
+
+def test_expired_deadline_falls_back_to_greedy():
+    problem = make_problem(PRESETS["tiny"])
+    assert solve_exact(problem, time.monotonic() - 1) is None
+
+    reports = []
+    solution = STRATEGIES["exact"].solve(
+        problem,
+        time.monotonic() - 1,
+        on_improve=lambda elapsed, objective: reports.append(objective),
+    )
+    greedy = solve(problem)
+    assert {(item.user_id, item.shift_id) for item in solution.assignments} == {
+        (item.user_id, item.shift_id) for item in greedy.assignments
+    }
+    assert len(reports) == 1
@@ -0,0 +1,91 @@
+import time
+
+from app.api import shifts
+from app.core import idempotency
+from app.db.session import SessionLocal
+from app.models.models import IdempotencyKey, ScheduleAssignment
+from benchmarks.instances import PRESETS
+
+SPEC = PRESETS["small"]
+PARAMS = {"start_date": str(SPEC.start_date), "end_date": str(SPEC.end_date), "strategy": "greedy"}
+GENERATE = "/api/shifts/schedules/generate"
+
+
+def test_replay_returns_first_response(client, seeded, db):
+    first = client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k1"})
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    count = db.query(ScheduleAssignment).count()
+
+    second = client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k1"})
+    assert second.status_code == 200
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+    assert db.query(ScheduleAssignment).count() == count
+
+
+def test_key_reused_with_different_parameters(client, seeded):
+    assert client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k2"}).status_code == 200
+    other = dict(PARAMS, strategy="round_robin")
+    assert client.post(GENERATE, params=other, headers={"Idempotency-Key": "k2"}).status_code == 422
+
+
+def test_keys_are_scoped_per_endpoint(client, seeded, db, admin):
+    db.add(IdempotencyKey(key="k3", endpoint="other_endpoint", request_hash="-", status_code=200, response="{}"))
+    db.commit()
+    response = client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k3"})
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+    assert db.query(IdempotencyKey).filter(IdempotencyKey.key == "k3").count() == 2
+
+
+def test_pending_key_conflicts(client, seeded, db, admin):
+    fingerprint = idempotency.request_fingerprint(
+        admin.id, SPEC.start_date, SPEC.end_date, False, None, "greedy", False, False, True,
+    )
+    db.add(IdempotencyKey(key="k4", endpoint="generate_schedule", request_hash=fingerprint, user_id=admin.id))
+    db.commit()
+    response = client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k4"})
+    assert response.status_code == 409
+    assert db.query(ScheduleAssignment).count() == 0
+
+
+def test_concurrent_first_use_replays(client, seeded, db, monkeypatch):
+    """
+    另一个请求在本请求检查之后、占用之前提交了同一个键：本请求不再求解，而是重放对方的结果
+    """
+    claim_key = idempotency.claim_key
+
+    def racing_claim(session, key, endpoint, fingerprint, user_id=None):
+        winner = SessionLocal()
+        try:
+            record = claim_key(winner, key, endpoint, fingerprint, user_id)
+            idempotency.complete_key(winner, record, 200, [])
+            winner.commit()
+        finally:
+            winner.close()
+        return claim_key(session, key, endpoint, fingerprint, user_id)
+
+    monkeypatch.setattr(shifts, "claim_key", racing_claim)
+    response = client.post(GENERATE, params=PARAMS, headers={"Idempotency-Key": "k5"})
+    assert response.status_code == 200
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert response.json() == []
+    assert db.query(ScheduleAssignment).count() == 0
+
+
+def test_background_replay_returns_current_job_state(client, seeded):
+    params = dict(PARAMS, background=True)
+    first = client.post(GENERATE, params=params, headers={"Idempotency-Key": "k6"})
+    assert first.status_code == 202
+    job_id = first.json()["id"]
+    for _ in range(100):
+        if client.get(f"/api/shifts/schedules/jobs/{job_id}").json()["status"] in ("succeeded", "failed", "cancelled"):
+            break
+        time.sleep(0.05)
+
+    replayed = client.post(GENERATE, params=params, headers={"Idempotency-Key": "k6"})
+    assert replayed.status_code == 202
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["id"] == job_id
+    assert replayed.json()["status"] == "succeeded"
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from app.scheduler.intervals import IntervalIndex, UserIntervals
+
+BASE = datetime(2026, 11, 2)
+
+
+def at(hours: int) -> datetime:
+    return BASE + timedelta(hours=hours)
+
+
+def test_overlap_and_rest():
+    index = IntervalIndex([(at(8), at(20))])
+    assert index.conflicts(at(19), at(21))
+    assert not index.conflicts(at(20), at(32))
+    assert index.conflicts(at(20), at(32), timedelta(hours=8))
+    assert not index.conflicts(at(28), at(40), timedelta(hours=8))
+    # 之后的班次同样受休息时间约束
+    assert index.conflicts(at(0), at(4), timedelta(hours=8))
+
+
+def test_nested_intervals():
+    # 未受排他约束保护时已有区间可能互相重叠，结束最晚的不一定是最后开始的
+    index = IntervalIndex([(at(1), at(10)), (at(2), at(3))])
+    assert index.conflicts(at(5), at(6))
+    index.remove(at(1), at(10))
+    assert not index.conflicts(at(5), at(6))
+    index.add(at(0), at(7))
+    assert index.conflicts(at(5), at(6))
+    assert not index.conflicts(at(8), at(9))
+
+
+def test_user_intervals():
+    busy = UserIntervals(timedelta(hours=8))
+    busy.add("a", at(8), at(20))
+    assert not busy.can_assign("a", at(20), at(32))
+    assert busy.can_assign("b", at(20), at(32))
+    busy.remove("a", at(8), at(20))
+    assert busy.can_assign("a", at(20), at(32))
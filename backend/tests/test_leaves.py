@@ -0,0 +1,22 @@
+from app.models.models import ScheduleAssignment, Shift
+from benchmarks.instances import PRESETS
+
+SPEC = PRESETS["small"]
+PARAMS = {"start_date": str(SPEC.start_date), "end_date": str(SPEC.end_date), "strategy": "greedy"}
+
+
+def test_leave_repairs_assignments_in_period(client, seeded, db):
+    assert client.post("/api/shifts/schedules/generate", params=PARAMS).status_code == 200
+    assignment, shift = db.query(ScheduleAssignment, Shift).join(Shift).order_by(Shift.start_time).first()
+    user_id = assignment.user_id
+
+    response = client.post("/api/leaves/", json={
+        "user_id": str(user_id),
+        "start_time": shift.start_time.isoformat(),
+        "end_time": shift.end_time.isoformat(),
+    })
+    assert response.status_code == 200
+    db.expire_all()
+    assigned = {row.user_id for row in db.query(ScheduleAssignment).filter(ScheduleAssignment.shift_id == shift.id)}
+    assert user_id not in assigned
+    assert len(assigned) == shift.required_staff
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from app.scheduler.engine import solve
+from app.scheduler.local_search import improve
+from app.scheduler.matrix import ScheduleMatrices
+from benchmarks.instances import PRESETS, make_problem
+
+
+@pytest.fixture(params=["tiny", "small", "medium"])
+def problem(request):
+    return make_problem(PRESETS[request.param])
+
+
+def test_never_worse_than_greedy(problem):
+    matrices = ScheduleMatrices(problem)
+    greedy = solve(problem)
+    before = matrices.evaluate(matrices.encode(greedy.assignments))
+
+    improved = improve(problem, greedy, time.monotonic() + 2)
+    after = matrices.evaluate(matrices.encode(improved.assignments))
+    assert after.violations == 0
+    assert after.objective <= before.objective + 1e-9
+    assert after.shortfall == sum(improved.unfilled.values())
+
+
+def test_reports_improvements_in_order(problem):
+    reports = []
+    improved = improve(
+        problem,
+        solve(problem),
+        time.monotonic() + 2,
+        on_improve=lambda elapsed, objective: reports.append((elapsed, objective)),
+    )
+    matrices = ScheduleMatrices(problem)
+    final = matrices.evaluate(matrices.encode(improved.assignments)).objective
+
+    # 第一次汇报为初始解，之后的目标值严格下降，最后一次即返回的解
+    assert reports
+    elapsed = [item[0] for item in reports]
+    objectives = [item[1] for item in reports]
+    assert elapsed == sorted(elapsed)
+    assert all(later < earlier for earlier, later in zip(objectives, objectives[1:]))
+    assert objectives[-1] == pytest.approx(final)
+
+
+def test_expired_deadline_returns_initial_solution():
+    problem = make_problem(PRESETS["medium"])
+    greedy = solve(problem)
+    improved = improve(problem, greedy, time.monotonic() - 1)
+    assert {(item.user_id, item.shift_id) for item in improved.assignments} == {
+        (item.user_id, item.shift_id) for item in greedy.assignments
+    }
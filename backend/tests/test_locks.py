@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.scheduler.locks import RangeLockTimeout, schedule_range_lock
+from benchmarks.instances import PRESETS
+
+SPEC = PRESETS["small"]
+GENERATE = "/api/shifts/schedules/generate"
+
+
+@pytest.fixture
+def short_timeout(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_LOCK_TIMEOUT_SECONDS", 0.2)
+
+
+def test_overlapping_ranges_time_out(db, short_timeout):
+    with schedule_range_lock(db, date(2030, 1, 7), date(2030, 1, 13)):
+        with pytest.raises(RangeLockTimeout):
+            with schedule_range_lock(db, date(2030, 1, 13), date(2030, 1, 20)):
+                pass
+        # 锁范围向两侧扩展了最短休息时间，相隔较远的范围互不影响
+        with schedule_range_lock(db, date(2030, 2, 1), date(2030, 2, 7)):
+            pass
+
+
+def test_lock_released_after_exit(db, short_timeout):
+    with schedule_range_lock(db, date(2030, 1, 7), date(2030, 1, 13)):
+        pass
+    with schedule_range_lock(db, date(2030, 1, 7), date(2030, 1, 13)):
+        pass
+
+
+def test_waiter_acquires_after_release(db, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_LOCK_TIMEOUT_SECONDS", 5)
+    acquired = threading.Event()
+
+    def wait_for_lock():
+        with schedule_range_lock(db, date(2030, 1, 7), date(2030, 1, 13)):
+            acquired.set()
+
+    with schedule_range_lock(db, date(2030, 1, 7), date(2030, 1, 13)):
+        waiter = threading.Thread(target=wait_for_lock)
+        waiter.start()
+        assert not acquired.wait(0.2)
+    waiter.join(5)
+    assert acquired.is_set()
+
+
+def test_generate_returns_409_while_range_is_locked(client, seeded, db, short_timeout):
+    params = {"start_date": str(SPEC.start_date), "end_date": str(SPEC.end_date), "strategy": "greedy"}
+    with schedule_range_lock(db, SPEC.start_date, SPEC.start_date + timedelta(days=1)):
+        response = client.post(GENERATE, params=params)
+    assert response.status_code == 409
+    assert client.post(GENERATE, params=params).status_code == 200
@@ -0,0 +1,17 @@
+from sqlalchemy.exc import OperationalError
+
+from app import main
+from app.scheduler.holidays import HolidayCalendar
+
+
+def test_startup_survives_database_outage(monkeypatch):
+    def unavailable(db=None):
+        raise OperationalError("SELECT", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(main.holiday_calendar, "load", unavailable)
+    main.load_holiday_calendar()
+
+
+def test_calendar_loads_on_first_use(db):
+    main.holiday_calendar.invalidate()
+    assert isinstance(main.holiday_calendar.get(db), HolidayCalendar)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from app.scheduler.engine import is_eligible, solve
+from app.scheduler.matrix import WEIGHT_LOAD_VARIANCE, WEIGHT_TYPE_VARIANCE, ScheduleMatrices
+from benchmarks.instances import PRESETS, make_problem
+
+
+@pytest.fixture(params=["tiny", "small", "medium"])
+def problem(request):
+    return make_problem(PRESETS[request.param])
+
+
+def test_eligibility_matches_roles(problem):
+    matrices = ScheduleMatrices(problem)
+    expected = np.array(
+        [[is_eligible(member, slot) for slot in matrices.slots] for member in matrices.index.members]
+    )
+    assert (matrices.eligible == expected).all()
+
+
+def test_encode_decode_round_trip(problem):
+    matrices = ScheduleMatrices(problem)
+    solution = solve(problem)
+    x = matrices.encode(solution.assignments)
+    assert int(x.sum()) == len(solution.assignments)
+    pairs = {(item.user_id, item.shift_id) for item in matrices.decode(x)}
+    assert pairs == {(item.user_id, item.shift_id) for item in solution.assignments}
+
+
+def test_evaluate_greedy_solution(problem):
+    matrices = ScheduleMatrices(problem)
+    solution = solve(problem)
+    score = matrices.evaluate(matrices.encode(solution.assignments))
+    assert score.violations == 0
+    assert score.shortfall == sum(solution.unfilled.values())
+    assert score.mentor_shortfall == sum(solution.unfilled_mentors.values())
+
+
+def test_move_delta_matches_evaluate(problem):
+    matrices = ScheduleMatrices(problem)
+    x = matrices.encode(solve(problem).assignments)
+    load = x.sum(axis=1) + matrices.base_load
+    type_load = matrices.type_loads(x)
+    before = matrices.evaluate(x)
+
+    # 把每个班次的第一个岗位调给一个不在班上的可排人员，增量应与重新计算一致
+    checked = 0
+    for j in range(x.shape[1]):
+        on = np.flatnonzero(x[:, j])
+        off = np.flatnonzero(matrices.eligible[:, j] & ~x[:, j])
+        if not on.size or not off.size:
+            continue
+        source, target = int(on[0]), int(off[0])
+        delta = matrices.move_delta(load, type_load, j, source, np.array([target]))[0]
+        moved = x.copy()
+        moved[source, j], moved[target, j] = False, True
+        after = matrices.evaluate(moved)
+        expected = (
+            WEIGHT_LOAD_VARIANCE * (after.load_variance - before.load_variance)
+            + WEIGHT_TYPE_VARIANCE * (after.type_variance - before.type_variance)
+        )
+        assert delta == pytest.approx(expected, abs=1e-9)
+        checked += 1
+        if checked == 20:
+            break
+    assert checked
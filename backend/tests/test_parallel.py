@@ -0,0 +1,65 @@
+from collections import Counter
+
+import pytest
+
+from app.core.config import settings
+from app.scheduler.engine import solve
+from app.scheduler.matrix import ScheduleMatrices
+from app.scheduler.parallel import partition_problem, solve_parallel
+from benchmarks.instances import PRESETS, make_problem
+from benchmarks.run import rest_violations
+
+# 并行求解的目标值最多比顺序求解差 20%
+TOLERANCE = 1.2
+
+
+@pytest.fixture
+def parallel_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEDULER_SOLVER_PROCESSES", 2)
+    monkeypatch.setattr(settings, "SCHEDULER_PARALLEL_MIN_SEATS", 0)
+
+
+def test_partitions_by_family_and_shares_admins():
+    problem = make_problem(PRESETS["medium"])
+    admins = {member.id for member in problem.staff if member.role == "admin"}
+    assert admins
+    parts = partition_problem(problem, settings.SCHEDULER_ADMIN_ROTATION_DAYS)
+    assert sorted({slot.family for part in parts for slot in part.shifts}) == ["DAY", "NIGHT"]
+    assert len(parts) == 2
+
+    owners = Counter(member.id for part in parts for member in part.staff)
+    # 管理员出现在每个类别中，其他人员只属于一个类别
+    assert all(owners[admin] == 2 for admin in admins)
+    assert all(count == 1 for user_id, count in owners.items() if user_id not in admins)
+
+
+@pytest.mark.parametrize("name", ["medium", "large"])
+def test_partitioned_solution_matches_sequential(parallel_settings, name):
+    problem = make_problem(PRESETS[name])
+    matrices = ScheduleMatrices(problem)
+    sequential = matrices.evaluate(matrices.encode(solve(problem).assignments))
+
+    solution = solve_parallel(problem)
+    score = matrices.evaluate(matrices.encode(solution.assignments))
+    assert score.violations == 0
+    assert rest_violations(problem, solution) == 0
+    assert score.shortfall == sequential.shortfall
+    assert score.objective <= sequential.objective * TOLERANCE
+
+    # 管理员分担到各类别，总负载不偏离平均
+    load = Counter(item.user_id for item in solution.assignments)
+    average = len(solution.assignments) / len(problem.staff)
+    admins = [member.id for member in problem.staff if member.role == "admin"]
+    assert {shift.family for shift in problem.shifts if any(
+        item.shift_id == shift.id and item.user_id in admins for item in solution.assignments
+    )} == {"DAY", "NIGHT"}
+    assert all(abs(load[admin] - average) <= 3 for admin in admins)
+
+
+def test_largest_presets_take_the_parallel_path():
+    # 阈值按基准预设校准，large 与 xlarge 应走并行求解
+    for name in ("large", "xlarge"):
+        spec = PRESETS[name]
+        assert spec.days * 2 * spec.staff_per_shift >= settings.SCHEDULER_PARALLEL_MIN_SEATS
+    spec = PRESETS["medium"]
+    assert spec.days * 2 * spec.staff_per_shift < settings.SCHEDULER_PARALLEL_MIN_SEATS
@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.scheduler.rolling import rolling_windows
+
+
+@pytest.mark.parametrize(
+    "days, window_days, overlap_days",
+    [(1, 14, 3), (14, 14, 3), (15, 14, 3), (90, 14, 3), (90, 7, 0), (30, 5, 10)],
+)
+def test_fixed_parts_tile_the_range(days, window_days, overlap_days):
+    start = date(2030, 1, 7)
+    end = start + timedelta(days=days - 1)
+    windows = rolling_windows(start, end, window_days, overlap_days)
+
+    # 固定部分首尾相接、恰好覆盖整个范围
+    assert windows[0].solve_from == start
+    assert windows[-1].solve_to == windows[-1].fix_to == end
+    for previous, window in zip(windows, windows[1:]):
+        assert window.solve_from == previous.fix_to + timedelta(days=1)
+    for window in windows:
+        assert window.solve_from <= window.fix_to <= window.solve_to <= end
+        assert (window.solve_to - window.solve_from).days < max(window_days, 1)
+
+
+def test_windows_overlap_by_lookahead():
+    start = date(2030, 1, 7)
+    windows = rolling_windows(start, start + timedelta(days=89), 14, 3)
+    assert len(windows) == 8
+    for window in windows[:-1]:
+        assert (window.solve_to - window.fix_to).days == 3
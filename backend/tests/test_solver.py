@@ -0,0 +1,95 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+import time
+import uuid
+
+import pytest
+
+from app.scheduler.engine import is_eligible, solve
+from app.scheduler.problem import ScheduleProblem, ShiftSlot, StaffMember
+from app.scheduler.strategies import STRATEGIES
+from benchmarks.instances import PRESETS, make_problem
+
+
+def _day_shifts(count, required_staff=1):
+    start = datetime(2030, 1, 7, 8)
+    return [
+        ShiftSlot(
+            id=uuid.uuid4(),
+            start_time=start + timedelta(days=day),
+            end_time=start + timedelta(days=day, hours=12),
+            shift_type="DAY_WORKDAY",
+            required_staff=required_staff,
+        )
+        for day in range(count)
+    ]
+
+
+@pytest.fixture(params=["tiny", "small", "medium"])
+def instance(request):
+    return make_problem(PRESETS[request.param])
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_solution_is_feasible(instance, strategy):
+    solution = STRATEGIES[strategy].solve(instance, time.monotonic() + 2)
+    slots = {slot.id: slot for slot in instance.shifts}
+    members = {member.id: member for member in instance.staff}
+
+    pairs = [(item.shift_id, item.user_id) for item in solution.assignments]
+    assert len(pairs) == len(set(pairs))
+    by_shift = defaultdict(set)
+    by_user = defaultdict(list)
+    for shift_id, user_id in pairs:
+        assert is_eligible(members[user_id], slots[shift_id])
+        by_shift[shift_id].add(user_id)
+        by_user[user_id].append((slots[shift_id].start_time, slots[shift_id].end_time))
+
+    # 同一用户的班次不重叠，且间隔不少于 min_rest
+    for intervals in by_user.values():
+        intervals.sort()
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            assert start >= end + instance.min_rest
+
+    for slot in instance.shifts:
+        chosen = by_shift[slot.id]
+        # 未满的名额如实记入 unfilled
+        assert len(chosen) + solution.unfilled.get(slot.id, 0) == slot.required_staff
+        mentors = sum(1 for user_id in chosen if not members[user_id].is_trainee)
+        required_mentors = min(slot.required_mentors, slot.required_staff)
+        assert mentors + solution.unfilled_mentors.get(slot.id, 0) >= required_mentors
+        # 新人只与其师傅同班
+        for user_id in chosen:
+            member = members[user_id]
+            if member.is_trainee and member.mentor_id:
+                assert member.mentor_id in chosen
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_small_instance_is_fully_covered(strategy):
+    problem = make_problem(PRESETS["small"])
+    solution = STRATEGIES[strategy].solve(problem, time.monotonic() + 2)
+    assert not solution.unfilled
+    assert not solution.unfilled_mentors
+    assert Counter(item.shift_id for item in solution.assignments) == {
+        slot.id: slot.required_staff for slot in problem.shifts
+    }
+
+
+def test_greedy_spreads_load_over_eligible_staff():
+    day_staff = [StaffMember(id=uuid.uuid4(), role="day_shift") for _ in range(3)]
+    night = StaffMember(id=uuid.uuid4(), role="night_shift")
+    problem = ScheduleProblem(shifts=_day_shifts(6), staff=day_staff + [night])
+
+    solution = solve(problem)
+    loads = Counter(item.user_id for item in solution.assignments)
+    assert loads == {member.id: 2 for member in day_staff}
+    assert not solution.unfilled
+
+
+def test_greedy_reports_unfilled_seats():
+    staff = [StaffMember(id=uuid.uuid4(), role="day_shift") for _ in range(2)]
+    shifts = _day_shifts(1, required_staff=3)
+    solution = solve(ScheduleProblem(shifts=shifts, staff=staff))
+    assert len(solution.assignments) == 2
+    assert solution.unfilled == {shifts[0].id: 1}
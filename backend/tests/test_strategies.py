@@ -0,0 +1,28 @@
+import pytest
+
+from app.core.config import settings
+from app.scheduler.strategies import STRATEGIES, SolverStrategy, choose_strategy, problem_size
+from benchmarks.instances import PRESETS, make_problem
+
+
+def test_strategy_must_implement_solve():
+    class Incomplete(SolverStrategy):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_registered_strategies():
+    assert sorted(STRATEGIES) == ["exact", "greedy", "local_search", "round_robin"]
+    assert all(strategy.name == name for name, strategy in STRATEGIES.items())
+
+
+def test_dispatch_by_size():
+    small = make_problem(PRESETS["small"])
+    assert problem_size(small) <= settings.SCHEDULER_EXACT_MAX_SIZE
+    assert choose_strategy(small, settings.SCHEDULER_LATENCY_TARGET_SECONDS).name == "exact"
+
+    large = make_problem(PRESETS["large"])
+    assert choose_strategy(large, settings.SCHEDULER_LATENCY_TARGET_SECONDS).name == "local_search"
+    assert choose_strategy(large, 1e-6).name == "round_robin"
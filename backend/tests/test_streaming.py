@@ -0,0 +1,32 @@
+import json
+
+from app.models.models import ScheduleAssignment
+from benchmarks.instances import PRESETS
+
+SPEC = PRESETS["small"]
+PARAMS = {"start_date": str(SPEC.start_date), "end_date": str(SPEC.end_date), "strategy": "greedy"}
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_generate_streams_committed_assignments(client, seeded, db):
+    response = client.post("/api/shifts/schedules/generate", params=dict(PARAMS, stream=True))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = ndjson(response)
+
+    stored = {(row.id, row.shift_id, row.user_id) for row in db.query(ScheduleAssignment)}
+    assert len(lines) == len(stored) > 0
+    assert {(line["id"], line["shift_id"], line["user_id"]) for line in lines} == {
+        (str(assignment_id), str(shift_id), str(user_id)) for assignment_id, shift_id, user_id in stored
+    }
+    assert all(line["user"] and line["shift"] for line in lines)
+
+
+def test_schedule_listing_streams_the_same_rows(client, seeded):
+    generated = client.post("/api/shifts/schedules/generate", params=PARAMS).json()
+    response = client.get("/api/shifts/schedules", params={"stream": True})
+    assert response.status_code == 200
+    assert sorted(line["id"] for line in ndjson(response)) == sorted(item["id"] for item in generated)
@@ -0,0 +1,106 @@
+import uuid
+
+import pytest
+
+from app.models.models import ScheduleAssignment, ScheduleVersion
+from app.scheduler.versions import DRIFT_DETAIL, ROLLBACK_DRIFT_DETAIL, VersionError, publish
+from benchmarks.instances import PRESETS
+
+SPEC = PRESETS["small"]
+PARAMS = {"start_date": str(SPEC.start_date), "end_date": str(SPEC.end_date), "strategy": "greedy"}
+VERSIONS = "/api/shifts/schedules/versions"
+
+
+def snapshot(db):
+    db.expire_all()
+    return {(row.shift_id, row.user_id, row.is_primary) for row in db.query(ScheduleAssignment)}
+
+
+def create_version(client, db, name, **params):
+    response = client.post(VERSIONS, params=dict(PARAMS, name=name, **params))
+    assert response.status_code == 200
+    return db.get(ScheduleVersion, uuid.UUID(response.json()["id"]))
+
+
+def publish_version(db, version):
+    counts = publish(db, version)
+    db.commit()
+    return counts
+
+
+def test_publish_and_rollback_round_trip(client, seeded, db):
+    first = create_version(client, db, "v1")
+    assert first.status == "draft"
+    assert first.added_count > 0
+    # 草稿不改动排班表
+    assert snapshot(db) == set()
+
+    assert publish_version(db, first) == (first.added_count, 0)
+    after_first = snapshot(db)
+    assert len(after_first) == first.added_count
+
+    second = create_version(client, db, "v2", strategy="round_robin", warm_start=False)
+    assert second.base_version_id == first.id
+    publish_version(db, second)
+    after_second = snapshot(db)
+    db.refresh(first)
+    assert first.status == "archived"
+
+    rolled = client.post(f"{VERSIONS}/rollback")
+    assert rolled.status_code == 200
+    assert rolled.json()["published_version_id"] == str(first.id)
+    assert rolled.json()["version"]["status"] == "draft"
+    assert snapshot(db) == after_first
+
+    # 被回滚的版本可以重新发布
+    db.refresh(second)
+    publish_version(db, second)
+    assert snapshot(db) == after_second
+
+    assert client.post(f"{VERSIONS}/rollback").status_code == 200
+    assert client.post(f"{VERSIONS}/rollback").status_code == 200
+    assert snapshot(db) == set()
+    assert client.post(f"{VERSIONS}/rollback").status_code == 404
+
+
+def test_stale_base_is_rejected(client, seeded, db):
+    first = create_version(client, db, "v1")
+    second = create_version(client, db, "v2", strategy="round_robin")
+    publish_version(db, first)
+    with pytest.raises(VersionError) as exc:
+        publish(db, second)
+    assert exc.value.status_code == 409
+
+
+def test_drift_since_draft_is_rejected(client, seeded, db):
+    publish_version(db, create_version(client, db, "v1"))
+    second = create_version(client, db, "v2", strategy="round_robin", warm_start=False)
+
+    # 草稿创建之后、发布之前，窗口内的排班被手动改动
+    db.delete(db.query(ScheduleAssignment).first())
+    db.commit()
+    before = snapshot(db)
+
+    with pytest.raises(VersionError) as exc:
+        publish(db, second)
+    assert (exc.value.status_code, exc.value.detail) == (409, DRIFT_DETAIL)
+    db.rollback()
+    assert snapshot(db) == before
+    assert db.get(ScheduleVersion, second.id).status == "draft"
+
+
+def test_drift_since_publish_blocks_rollback(client, seeded, db):
+    first = create_version(client, db, "v1")
+    publish_version(db, first)
+
+    # 发布之后窗口内的排班被手动改动，回滚会覆盖这些改动
+    db.delete(db.query(ScheduleAssignment).first())
+    db.commit()
+    before = snapshot(db)
+
+    response = client.post(f"{VERSIONS}/rollback")
+    assert response.status_code == 409
+    assert response.json()["detail"] == ROLLBACK_DRIFT_DETAIL
+    assert snapshot(db) == before
+    db.refresh(first)
+    assert first.status == "published"
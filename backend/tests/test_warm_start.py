@@ -0,0 +1,40 @@
+import time
+import uuid
+
+from app.scheduler.engine import solve
+from app.scheduler.local_search import LocalSearch
+from app.scheduler.matrix import ScheduleMatrices
+from app.scheduler.problem import PlannedAssignment
+from app.scheduler.strategies import STRATEGIES
+from benchmarks.instances import PRESETS, make_problem
+
+
+def test_feasible_hint_is_kept():
+    problem = make_problem(PRESETS["medium"])
+    greedy = solve(problem)
+    problem.hint = greedy.assignments
+    matrices = ScheduleMatrices(problem)
+
+    search = LocalSearch.from_hint(problem)
+    seeded = {(item.user_id, item.shift_id) for item in search.solution().assignments}
+    assert seeded == {(item.user_id, item.shift_id) for item in greedy.assignments}
+
+    search.run(time.monotonic() + 2)
+    before = matrices.evaluate(matrices.encode(greedy.assignments)).objective
+    assert search.objective <= before + 1e-9
+
+
+def test_infeasible_hint_is_filtered():
+    problem = make_problem(PRESETS["small"])
+    # 提示中包含所有人的所有班次以及未知的人员和班次
+    problem.hint = [
+        PlannedAssignment(user_id=member.id, shift_id=slot.id)
+        for member in problem.staff
+        for slot in problem.shifts
+    ] + [PlannedAssignment(user_id=uuid.uuid4(), shift_id=problem.shifts[0].id)]
+
+    solution = STRATEGIES["local_search"].solve(problem, time.monotonic() + 2)
+    matrices = ScheduleMatrices(problem)
+    score = matrices.evaluate(matrices.encode(solution.assignments))
+    assert score.violations == 0
+    assert score.shortfall == 0